@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark e tabela de casos da inferência por conteúdo
+
+Confere FieldNormalizer._infer_by_content contra uma tabela de casos
+(chave, valor, campo esperado) e compara o tempo com a implementação
+anterior (várias varreduras `unit in value` por lista de unidades),
+reconstruída aqui como referência. Termina com código 1 se algum caso
+da tabela falhar.
+
+Uso:
+    python -m benchmarks.bench_content_inference
+    python -m benchmarks.bench_content_inference --values 200000 --json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+project_root = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+from ocr.normalizer import FieldNormalizer  # noqa: E402
+
+# (chave, valor, campo esperado)
+CASES: List[Tuple[str, Any, Optional[str]]] = [
+    # Pressões: unidade no valor, campo pela chave
+    ('PMTA', '14.5 kgf/cm²', 'pressao_maxima_trabalho'),
+    ('Max Pressure', '10 bar', 'pressao_maxima_trabalho'),
+    ('Pressão de trabalho', '1,2 MPa', 'pressao_maxima_trabalho'),
+    ('Test Pressure', '21.75 kgf/cm2', 'pressao_teste_hidrostatico'),
+    ('Hidrostático', '300 psi', 'pressao_teste_hidrostatico'),
+    ('Operating', '800 kPa', 'pressao_operacao'),
+    ('Pressão máxima de operação', '10 bar', 'pressao_operacao'),
+    ('P.T.H.', '150 psig', None),  # chave sem indicação do tipo de pressão
+    ('Valor', '14.5 kgf/cm²', None),  # kgf/cm² não é área (m²)
+    ('Valor', '12 kg/cm2', None),
+    # Anos e categorias (valor inteiro)
+    ('Ano', '2020', 'ano_fabricacao'),
+    ('Built', 1998, 'ano_fabricacao'),
+    ('Número', '20200', None),
+    ('Classe', 'II', 'categoria'),
+    ('Classe', 'iv', 'categoria'),
+    ('Grupo', ' B ', 'categoria'),
+    ('Grupo', 'VI', None),
+    # Vazão de vapor
+    ('Produção', '1500 kg/h', 'capacidade_producao_vapor'),
+    ('Steam', '10 t/h', 'capacidade_producao_vapor'),
+    ('Steam', '2 ton / h', 'capacidade_producao_vapor'),
+    # Área
+    ('Superfície', '35 m²', 'area_superficie_aquecimento'),
+    ('Superfície', '12 M2', 'area_superficie_aquecimento'),
+    # Volume: "l" só como unidade isolada
+    ('Capacidade', '500 L', 'volume'),
+    ('Capacidade', '500l', 'volume'),
+    ('Capacidade', '300 litros', 'volume'),
+    ('Capacidade', '2 m³', 'volume'),
+    ('Capacidade', '2,5 m3', 'volume'),
+    ('Material', 'Carbon Steel', None),
+    ('Fabricante', 'Caldeiras Aalborg Ltda', None),
+    ('Combustível', 'Óleo', None),
+    ('Local', 'Embarcação', None),
+    ('Tipo', 'Barrilete', None),
+    ('Diâmetro', '1200 mm', None),
+    ('Vazio', '', None),
+]
+
+
+def legacy_infer(raw_key: str, value: Any) -> Optional[str]:
+    """Implementação anterior de _infer_by_content (referência)"""
+    if not value:
+        return None
+    value_str = str(value).lower().strip()
+    raw_key_lower = raw_key.lower()
+    pressure_units = ['kgf', 'bar', 'psi', 'kpa', 'mpa', 'kg/cm']
+    if any(unit in value_str for unit in pressure_units):
+        if any(word in raw_key_lower for word in ['test', 'hidro']):
+            return 'pressao_teste_hidrostatico'
+        elif any(word in raw_key_lower for word in ['oper']):
+            return 'pressao_operacao'
+        elif any(word in raw_key_lower for word in ['max', 'trab', 'pmta']):
+            return 'pressao_maxima_trabalho'
+    if re.match(r'^(19|20)\d{2}$', value_str):
+        return 'ano_fabricacao'
+    if value_str.upper() in ['I', 'II', 'III', 'IV', 'V', 'A', 'B', 'C', 'D', 'E']:
+        return 'categoria'
+    if any(unit in value_str for unit in ['kg/h', 't/h', 'ton/h']):
+        return 'capacidade_producao_vapor'
+    if any(unit in value_str for unit in ['m²', 'm2']):
+        return 'area_superficie_aquecimento'
+    if any(unit in value_str for unit in ['l', 'm³', 'm3', 'litros']):
+        return 'volume'
+    return None
+
+
+def check_cases(infer: Callable[[str, Any], Optional[str]]) -> List[dict]:
+    """Casos da tabela em que o resultado difere do esperado"""
+    failures = []
+    for key, value, expected in CASES:
+        got = infer(key, value)
+        if got != expected:
+            failures.append({'chave': key, 'valor': value, 'esperado': expected, 'obtido': got})
+    return failures
+
+
+def time_infer(infer: Callable[[str, Any], Optional[str]], inputs: List[Tuple[str, Any]]) -> float:
+    start = time.perf_counter()
+    for key, value in inputs:
+        infer(key, value)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inferência por conteúdo: casos e desempenho")
+    parser.add_argument('--values', type=int, default=100000)
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    args = parser.parse_args()
+
+    infer = FieldNormalizer()._infer_by_content
+    failures = check_cases(infer)
+    legacy_failures = check_cases(legacy_infer)
+
+    rng = random.Random(42)
+    inputs = [(key, value) for key, value, _ in (rng.choice(CASES) for _ in range(args.values))]
+    legacy_s = time_infer(legacy_infer, inputs)
+    current_s = time_infer(infer, inputs)
+
+    report = {
+        'casos': len(CASES),
+        'falhas': failures,
+        'falhas_implementacao_anterior': len(legacy_failures),
+        'valores': len(inputs),
+        'anterior_us': round(legacy_s / len(inputs) * 1e6, 3),
+        'atual_us': round(current_s / len(inputs) * 1e6, 3),
+        'ganho': round(legacy_s / current_s, 2) if current_s else 0.0
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"Casos: {len(CASES)} | falhas: {len(failures)} "
+              f"(implementação anterior: {len(legacy_failures)})")
+        for failure in failures:
+            print(f"   ✗ {failure['chave']!r}={failure['valor']!r}: "
+                  f"esperado {failure['esperado']}, obtido {failure['obtido']}")
+        print(f"Tempo por valor: anterior {report['anterior_us']} µs | atual {report['atual_us']} µs "
+              f"({report['ganho']}x)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
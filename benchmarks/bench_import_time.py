@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de inicialização (python -X importtime)
+
+Importa cada ponto de entrada em um interpretador novo, soma o tempo
+cumulativo reportado pelo -X importtime e compara com o orçamento de
+inicialização. Também falha se alguma dependência pesada (requests,
+yaml, PIL, pandas...) for carregada só por importar o módulo: elas
+devem ser importadas sob demanda.
+
+Uso:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --budget-ms 60 --runs 7
+    python -m benchmarks.bench_import_time --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Any
+
+project_root = Path(__file__).parent.parent.absolute()
+
+DEFAULT_MODULES = ("main", "utils", "services", "ocr.processor")
+HEAVY_MODULES = ("requests", "urllib3", "yaml", "PIL", "pandas", "plotly", "streamlit", "numpy",
+                 "http.server", "cProfile")
+DEFAULT_BUDGET_MS = 50.0
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Importa o módulo em um subprocesso e interpreta a saída do -X importtime"""
+    statement = f"import {module}" if module else "pass"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=project_root, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}: {proc.stderr.strip().splitlines()[-1:]}")
+
+    # Linhas no formato "import time: self [us] | cumulative | imported package"
+    modules: Dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        cumulative_us = int(cumulative)
+        modules[name.strip()] = cumulative_us
+        # Apenas imports de nível superior (indentação de 1 espaço) somam no total
+        if not name.startswith("  "):
+            total_us += cumulative_us
+
+    return {'modules': modules, 'total_ms': total_us / 1000}
+
+
+def best_of(module: str, runs: int) -> Dict[str, Any]:
+    """Melhor de N execuções (descarta ruído de cache frio)"""
+    samples = [measure_import(module) for _ in range(runs)]
+    best = min(samples, key=lambda sample: sample['total_ms'])
+    best['samples_ms'] = [sample['total_ms'] for sample in samples]
+    return best
+
+
+def run(modules: List[str], runs: int) -> Dict[str, Any]:
+    """Custo de cada import descontando a inicialização do interpretador (site, .pth)"""
+    interpreter = best_of("", runs)
+    results = {}
+    for module in modules:
+        best = best_of(module, runs)
+        loaded = {name: us for name, us in best['modules'].items() if name not in interpreter['modules']}
+        results[module] = {
+            'total_ms': best['total_ms'] - interpreter['total_ms'],
+            'samples_ms': [round(ms - interpreter['total_ms'], 2) for ms in best['samples_ms']],
+            'heavy': sorted(name for name in loaded if name.split('.')[0] in HEAVY_MODULES
+                            or name in HEAVY_MODULES),
+            'slowest': sorted(loaded.items(), key=lambda item: item[1], reverse=True)
+        }
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tempo de import dos pontos de entrada")
+    parser.add_argument('--modules', default=",".join(DEFAULT_MODULES),
+                        help="Módulos separados por vírgula")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Orçamento de inicialização para 'import main'")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="Imports mais lentos exibidos")
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    modules = [module.strip() for module in args.modules.split(",") if module.strip()]
+    results = run(modules, args.runs)
+
+    failures = []
+    budgeted = results.get("main")
+    if budgeted and budgeted['total_ms'] > args.budget_ms:
+        failures.append(f"import main: {budgeted['total_ms']:.1f}ms > orçamento {args.budget_ms:.0f}ms")
+    if budgeted and budgeted['heavy']:
+        failures.append(f"import main carrega dependências pesadas: {', '.join(budgeted['heavy'])}")
+
+    if args.json:
+        print(json.dumps({
+            'budget_ms': args.budget_ms,
+            'results': {name: {**data, 'slowest': data['slowest'][:args.top]} for name, data in results.items()},
+            'failures': failures
+        }, indent=2, ensure_ascii=False))
+        return 1 if failures else 0
+
+    for module, data in results.items():
+        heavy = f"  (pesados: {', '.join(data['heavy'])})" if data['heavy'] else ""
+        print(f"📦 import {module:<15} {data['total_ms']:>8.1f}ms{heavy}")
+        for name, cumulative_us in data['slowest'][:args.top]:
+            print(f"     {cumulative_us / 1000:>8.2f}ms  {name}")
+
+    if failures:
+        print("\n❌ Orçamento de inicialização violado:")
+        for failure in failures:
+            print(f"   • {failure}")
+        return 1
+
+    print(f"\n✅ Inicialização dentro do orçamento ({args.budget_ms:.0f}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
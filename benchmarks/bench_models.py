@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark do registro compacto PlacaNR13
+
+Compara o PlacaNR13 com __slots__ com a versão dataclass anterior
+(reconstruída aqui como referência) sobre resultados normalizados
+sintéticos: bytes por registro (tracemalloc), construção a partir do
+dicionário normalizado e to_dict.
+
+Uso:
+    python -m benchmarks.bench_models
+    python -m benchmarks.bench_models --records 50000 --json
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, field, make_dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+project_root = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+from benchmarks.synthetic import generate_raw_records  # noqa: E402
+from ocr.models import PLACA_FIELDS, PlacaNR13  # noqa: E402
+from ocr.normalizer import FieldNormalizer  # noqa: E402
+
+
+def _legacy_to_dict(self, include_metadata: bool = True) -> Dict:
+    data = {k: v for k, v in asdict(self).items() if v is not None}
+    if not include_metadata:
+        data.pop('_metadata', None)
+        data.pop('_raw_extraction', None)
+    return data
+
+
+# PlacaNR13 como dataclass (asdict + filtro de None), antes do registro compacto
+LegacyPlaca = make_dataclass(
+    'LegacyPlaca',
+    [(name, Optional[str], None) for name in PLACA_FIELDS]
+    + [(name, Dict[str, Any], field(default_factory=dict))
+       for name in ('outros_dados', '_metadata', '_raw_extraction')],
+    namespace={'to_dict': _legacy_to_dict}
+)
+
+
+def build_legacy(record: Dict[str, Any]) -> Any:
+    return LegacyPlaca(**{key: value for key, value in record.items()
+                          if key in LegacyPlaca.__dataclass_fields__})
+
+
+def build_records(count: int) -> List[Dict[str, Any]]:
+    """Resultados normalizados com metadados, como gravados em output/json"""
+    normalizer = FieldNormalizer()
+    records = []
+    for i, raw in enumerate(generate_raw_records(count)):
+        record = normalizer.normalize(raw)
+        record['_metadata'] = {'arquivo': f"placa_{i:05d}.jpg", 'modo': 'sync',
+                               'processado_em': '2025-01-01T00:00:00', 'processing_time': 1.5,
+                               'validacao': {'valid': True, 'completeness': 100.0}}
+        records.append(record)
+    return records
+
+
+def measure_memory(factory: Callable[[Dict[str, Any]], Any], records: List[Dict[str, Any]]) -> float:
+    """Bytes alocados por registro para manter a lista de objetos viva"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(record) for record in records]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / len(records)
+
+
+def measure_rate(fn: Callable[[Any], Any], items: List[Any], repeat: int) -> float:
+    """Operações por segundo (melhor de `repeat`)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best if best > 0 else 0.0
+
+
+def run(count: int, repeat: int) -> Dict[str, Any]:
+    records = build_records(count)
+    variants = {'dataclass': build_legacy, 'slots': PlacaNR13.from_dict}
+    results = {}
+    for name, factory in variants.items():
+        objects = [factory(record) for record in records]
+        results[name] = {
+            'bytes_per_record': round(measure_memory(factory, records)),
+            'build_per_s': round(measure_rate(factory, records, repeat)),
+            'to_dict_per_s': round(measure_rate(lambda obj: obj.to_dict(), objects, repeat))
+        }
+
+    # As duas versões precisam produzir o mesmo dicionário
+    mismatches = sum(1 for record in records
+                     if build_legacy(record).to_dict() != PlacaNR13.from_dict(record).to_dict())
+    return {'records': count, 'results': results, 'mismatches': mismatches}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Memória e serialização do PlacaNR13")
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    report = run(args.records, args.repeat)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 1 if report['mismatches'] else 0
+
+    print(f"📦 {report['records']} registros normalizados")
+    print(f"   {'versão':<10} {'bytes/reg':>10} {'build/s':>12} {'to_dict/s':>12}")
+    for name, data in report['results'].items():
+        print(f"   {name:<10} {data['bytes_per_record']:>10} {data['build_per_s']:>12} {data['to_dict_per_s']:>12}")
+
+    legacy, slots = report['results']['dataclass'], report['results']['slots']
+    print(f"\n   memória: {legacy['bytes_per_record'] / max(slots['bytes_per_record'], 1):.1f}x menor, "
+          f"to_dict: {slots['to_dict_per_s'] / max(legacy['to_dict_per_s'], 1):.1f}x mais rápido")
+
+    if report['mismatches']:
+        print(f"\n❌ {report['mismatches']} registros com to_dict divergente")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
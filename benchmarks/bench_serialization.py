@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização JSON
+
+Compara os backends de ocr.serialization instalados (json, orjson,
+msgspec) nos modos indentado e compacto sobre resultados normalizados
+sintéticos: tempo de dumps, loads, load_placa e bytes gerados.
+
+Uso:
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --records 20000 --json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+project_root = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+from benchmarks.bench_models import build_records  # noqa: E402
+from ocr.serialization import get_codec, load_placa  # noqa: E402
+
+
+def bench_backend(name: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Tempos e tamanhos de um backend nos dois modos"""
+    codec = get_codec(name)
+    rows = []
+    for pretty in (True, False):
+        start = time.perf_counter()
+        encoded = [codec.dumps(record, pretty) for record in records]
+        dump_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for data in encoded:
+            codec.loads(data)
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for data in encoded:
+            load_placa(codec.loads(data))
+        placa_s = time.perf_counter() - start
+
+        rows.append({
+            'backend': codec.name,
+            'modo': 'pretty' if pretty else 'compact',
+            'dumps_us': round(dump_s / len(records) * 1e6, 2),
+            'loads_us': round(load_s / len(records) * 1e6, 2),
+            'load_placa_us': round(placa_s / len(records) * 1e6, 2),
+            'bytes_medio': round(sum(map(len, encoded)) / len(records), 1)
+        })
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos backends JSON")
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    args = parser.parse_args()
+
+    records = build_records(args.records)
+    report = []
+    for name in ('json', 'orjson', 'msgspec'):
+        try:
+            report.extend(bench_backend(name, records))
+        except ImportError:
+            continue  # backend não instalado
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{'backend':<8} {'modo':<8} {'dumps µs':>9} {'loads µs':>9} {'placa µs':>9} {'bytes':>8}")
+    for row in report:
+        print(f"{row['backend']:<8} {row['modo']:<8} {row['dumps_us']:>9} {row['loads_us']:>9} "
+              f"{row['load_placa_us']:>9} {row['bytes_medio']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponta a ponta do pipeline OCR
+
+Mede throughput e percentis de latência por estágio (listagem,
+codificação, chamada à API via stub local, normalização, validação e
+gravação) e compara os modos sync e batch em diferentes tamanhos.
+Cada estágio é medido `--repeat` vezes e fica o melhor valor de cada
+métrica, o que filtra interferência passageira da máquina. Os resultados são gravados
+em JSON e comparados com um baseline gravado com os mesmos parâmetros
+(senão a comparação é recusada). Estágios com p50 abaixo de
+NOISY_STAGE_MS são comparados só pelo throughput, com o dobro da
+tolerância: nessa escala uma única preempção do agendador (ou a
+resolução do relógio, nos estágios de microssegundos) domina o p95.
+
+Uso:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --images 200 --sizes 5,50,200
+    python -m benchmarks.run_benchmarks --save-baseline
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Iterable, Tuple
+
+project_root = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+from config.settings import settings
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+_LOCAL_ARGS = ('output', 'baseline', 'save_baseline')
+# Parâmetros que não mudam as medições por estágio comparadas com o baseline
+_UNCOMPARED_PARAMS = ('sizes', 'skip_modes', 'tolerance')
+# Estágios com p50 abaixo disso (ms) comparam só throughput, com tolerância ampliada
+NOISY_STAGE_MS = 5.0
+DEFAULT_RESULTS_DIR = BENCH_DIR / "results"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil com interpolação linear"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def summarize(stage: str, latencies: List[float], total: float, items: int) -> Dict[str, Any]:
+    """Resume tempos de um estágio"""
+    return {
+        'stage': stage,
+        'items': items,
+        'total_s': round(total, 6),
+        'throughput_per_s': round(items / total, 2) if total > 0 else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4)
+    }
+
+
+def time_each(fn: Callable[[Any], Any], inputs: Iterable[Any]) -> Tuple[List[float], float, List[Any]]:
+    """Executa fn para cada entrada medindo a latência individual"""
+    latencies = []
+    outputs = []
+    start = time.perf_counter()
+    for item in inputs:
+        t0 = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start, outputs
+
+
+def configure_sandbox(workdir: Path, stub_url: str):
+    """Redireciona diretórios de saída e clientes para o ambiente do benchmark"""
+    settings.INPUT_DIR = workdir / "input"
+    # Também move métricas, tabela, manifesto e agregados derivados de OUTPUT_*
+    settings.set_output_dir(workdir / "output")
+    # Fila de retry e miniaturas derivadas de DATA_DIR vão junto
+    settings.set_data_dir(workdir / "data")
+    settings.LOGS_DIR = workdir / "logs"
+    settings.MISTRAL_BASE_URL = stub_url
+    settings.MISTRAL_API_KEY = settings.MISTRAL_API_KEY or "benchmark"
+    settings.OCR_BACKEND = "api"
+    settings.BATCH_CHECK_INTERVAL = 0.2
+    for path in [settings.INPUT_DIR, settings.OUTPUT_JSON, settings.OUTPUT_BATCH,
+                 settings.OUTPUT_REPORTS, settings.DATA_DIR, settings.LOGS_DIR]:
+        path.mkdir(parents=True, exist_ok=True)
+
+
+def run_stage_benchmarks(processor, images: List[Path], raw_records: List[Dict],
+                         listing_rounds: int) -> List[Dict[str, Any]]:
+    """Mede cada estágio isoladamente"""
+    results = []
+
+    latencies, total, _ = time_each(lambda _: processor.files.list_images(settings.INPUT_DIR),
+                                    range(listing_rounds))
+    results.append(summarize('listing', latencies, total, listing_rounds))
+
+    latencies, total, encoded = time_each(processor.files.encode_image, images)
+    stage = summarize('encode', latencies, total, len(images))
+    stage['bytes_per_item'] = int(sum(len(e) for e in encoded) / max(len(encoded), 1))
+    results.append(stage)
+
+    pairs = list(zip(encoded, images))
+    latencies, total, _ = time_each(lambda p: processor.api.process_image(p[0], p[1].name), pairs)
+    results.append(summarize('api', latencies, total, len(pairs)))
+
+    latencies, total, normalized = time_each(processor.normalizer.normalize, raw_records)
+    results.append(summarize('normalize', latencies, total, len(raw_records)))
+
+    latencies, total, _ = time_each(processor.validator.validate, normalized)
+    results.append(summarize('validate', latencies, total, len(normalized)))
+
+    # Agregação do conjunto: máscaras + resumo vetorizado
+    start = time.perf_counter()
+    processor.validator.summarize(processor.validator.masks(normalized))
+    elapsed = time.perf_counter() - start
+    results.append(summarize('validate_set', [elapsed / max(len(normalized), 1)] * len(normalized),
+                             elapsed, len(normalized)))
+
+    chunks = [normalized[i:i + 10] for i in range(0, len(normalized), 10)]
+    latencies, total, _ = time_each(lambda chunk: processor._save_results(chunk, 'sync'), chunks)
+    per_item = [lat / len(chunk) for lat, chunk in zip(latencies, chunks)]
+    results.append(summarize('save', per_item, total, len(normalized)))
+
+    return results
+
+
+def best_of(rounds: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Melhor valor de cada métrica entre as rodadas, por estágio
+
+    Interferência da máquina só deixa uma rodada mais lenta, então o
+    melhor valor (maior throughput, menores tempos) é o mais estável.
+    """
+    best: Dict[str, Dict[str, Any]] = {}
+    for stages in rounds:
+        for stage in stages:
+            current = best.get(stage['stage'])
+            if current is None:
+                best[stage['stage']] = dict(stage)
+                continue
+            current['throughput_per_s'] = max(current['throughput_per_s'], stage['throughput_per_s'])
+            current['total_s'] = min(current['total_s'], stage['total_s'])
+            for key in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'):
+                current[key] = min(current[key], stage[key])
+    return list(best.values())
+
+
+def run_mode_benchmarks(processor, images: List[Path], sizes: List[int]) -> List[Dict[str, Any]]:
+    """Compara modos sync e batch ponta a ponta"""
+    results = []
+    for size in sizes:
+        subset = images[:size]
+        for mode in ('sync', 'batch'):
+            start = time.time()
+            if mode == 'sync':
+                summary = processor._process_sync(subset, start)
+            else:
+                summary = processor._process_batch(subset, start)
+            elapsed = time.time() - start
+            results.append({
+                'mode': mode,
+                'size': len(subset),
+                'total_s': round(elapsed, 4),
+                'throughput_per_s': round(len(subset) / elapsed, 2) if elapsed > 0 else 0.0,
+                'success': summary.get('sucesso', 0)
+            })
+    return results
+
+
+def param_mismatches(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Parâmetros de medição que diferem do baseline (comparação só vale se vazio)"""
+    base_params = baseline.get('params', {})
+    return [
+        f"{name}={value} (baseline: {base_params.get(name, 'ausente')})"
+        for name, value in current.get('params', {}).items()
+        if name not in _UNCOMPARED_PARAMS and base_params.get(name) != value
+    ]
+
+
+def compare_with_baseline(current: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float) -> Tuple[List[str], List[str]]:
+    """
+    Regressões de throughput/latência acima da tolerância e estágios sem baseline
+
+    Compara throughput e p95; estágios com p50 do baseline abaixo de
+    NOISY_STAGE_MS comparam só o throughput, com o dobro da tolerância.
+    """
+    regressions = []
+    missing = []
+    base_stages = {s['stage']: s for s in baseline.get('stages', [])}
+
+    for stage in current.get('stages', []):
+        base = base_stages.get(stage['stage'])
+        if not base:
+            missing.append(stage['stage'])
+            continue
+        noisy = base['p50_ms'] < NOISY_STAGE_MS
+        allowed = tolerance * 2 if noisy else tolerance
+        if base['throughput_per_s'] and stage['throughput_per_s'] < base['throughput_per_s'] * (1 - allowed):
+            regressions.append(
+                f"{stage['stage']}: throughput {stage['throughput_per_s']}/s "
+                f"< baseline {base['throughput_per_s']}/s"
+            )
+        if not noisy and base['p95_ms'] and stage['p95_ms'] > base['p95_ms'] * (1 + allowed):
+            regressions.append(
+                f"{stage['stage']}: p95 {stage['p95_ms']}ms > baseline {base['p95_ms']}ms"
+            )
+
+    return regressions, missing
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline OCR NR-13")
+    parser.add_argument('--images', type=int, default=60, help="Imagens sintéticas geradas")
+    parser.add_argument('--records', type=int, default=500, help="Dicionários OCR para normalização")
+    parser.add_argument('--sizes', default="5,20,60", help="Tamanhos para sync vs batch")
+    parser.add_argument('--listing-rounds', type=int, default=50)
+    parser.add_argument('--stub-latency-ms', type=float, default=20.0)
+    parser.add_argument('--repeat', type=int, default=5, help="Rodadas por estágio (fica o melhor valor de cada métrica)")
+    parser.add_argument('--skip-modes', action='store_true', help="Não executa sync vs batch")
+    parser.add_argument('--output', type=Path, help="Arquivo JSON de resultados")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Variação aceita antes de acusar regressão (0.25 = 25%%)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    import stub_server
+    from benchmarks.synthetic import generate_images, generate_raw_records
+
+    stub = stub_server.start_in_background(stub_server.StubConfig(
+        port=0, latency_dist='fixed', latency_ms=args.stub_latency_ms,
+        batch_base_delay=0.5, batch_per_item=0.002, seed=42
+    ))
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+
+    with tempfile.TemporaryDirectory(prefix="nr13_bench_") as tmp:
+        configure_sandbox(Path(tmp), stub_url)
+
+        from ocr.processor import OCRProcessor
+        logging.getLogger().setLevel(logging.WARNING)
+        processor = OCRProcessor()
+
+        print(f"🧪 Gerando {args.images} imagens e {args.records} registros sintéticos...")
+        images = generate_images(settings.INPUT_DIR, args.images)
+        raw_records = generate_raw_records(args.records)
+
+        print("⏱️  Medindo estágios...")
+        stages = best_of([run_stage_benchmarks(processor, images, raw_records, args.listing_rounds)
+                          for _ in range(max(1, args.repeat))])
+
+        modes = []
+        if not args.skip_modes:
+            print("⏱️  Comparando sync vs batch...")
+            sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+            modes = run_mode_benchmarks(processor, images, sizes)
+
+    stub.shutdown()
+
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        # Só os parâmetros da medição: caminhos de saída/baseline dependem da máquina
+        'params': {k: str(v) for k, v in vars(args).items() if k not in _LOCAL_ARGS},
+        'stages': stages,
+        'modes': modes
+    }
+
+    print(f"\n{'Estágio':<10} {'itens':>7} {'itens/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage in stages:
+        print(f"{stage['stage']:<10} {stage['items']:>7} {stage['throughput_per_s']:>10} "
+              f"{stage['p50_ms']:>9.3f} {stage['p95_ms']:>9.3f} {stage['p99_ms']:>9.3f}")
+    for mode in modes:
+        print(f"{mode['mode']:<6} n={mode['size']:<5} {mode['total_s']:>8.2f}s "
+              f"{mode['throughput_per_s']:>8}/s")
+
+    output = args.output or DEFAULT_RESULTS_DIR / f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\n💾 Resultados: {output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"📌 Baseline atualizado: {args.baseline}")
+        return 0
+
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        mismatches = param_mismatches(results, baseline)
+        if mismatches:
+            print("\n⚠️ Parâmetros diferentes do baseline; comparação não realizada:")
+            for mismatch in mismatches:
+                print(f"   • {mismatch}")
+            print("   Rode com os mesmos parâmetros ou grave um novo baseline (--save-baseline)")
+            return 2
+        regressions, missing = compare_with_baseline(results, baseline, args.tolerance)
+        if missing:
+            print(f"\n⚠️ Estágios sem baseline (não comparados): {', '.join(missing)}")
+        if regressions:
+            print("\n❌ Regressões detectadas:")
+            for regression in regressions:
+                print(f"   • {regression}")
+            return 1
+        print("✅ Sem regressões em relação ao baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Geração de dados sintéticos para benchmarks
+
+Produz imagens de placas e dicionários de OCR brutos com tamanho e
+variedade de chaves semelhantes aos reais (aliases do field_mappings.yaml,
+variações de caixa/pontuação e campos desconhecidos).
+"""
+import io
+import random
+from pathlib import Path
+from typing import Dict, List, Any
+
+from config.settings import settings
+
+# Campos que não estão no mapeamento (vão para outros_dados)
+EXTRA_KEYS = [
+    'Diameter', 'Peso Vazio', 'Temperatura de Projeto', 'Fluido', 'Lote',
+    'Eficiência de Junta', 'Sobre-espessura de Corrosão', 'Radiografia',
+    'Tratamento Térmico', 'Comprimento', 'Inspector Stamp', 'Nº Desenho'
+]
+
+VALUE_FACTORIES = {
+    'identificacao': lambda r: f"VP-{r.randint(100, 999)}",
+    'tag': lambda r: f"TAG-{r.randint(1000, 9999)}",
+    'fabricante': lambda r: r.choice(['ACME Corporation', 'Aalborg Industries',
+                                      'ATA Combustão Técnica', 'Steammaster Ltda']),
+    'numero_serie': lambda r: f"SN-{r.randint(10000, 99999)}",
+    'numero_ordem': lambda r: f"{r.randint(1000, 9999)}/{r.randint(10, 24)}",
+    'ano_fabricacao': lambda r: str(r.randint(1975, 2024)),
+    'tipo': lambda r: r.choice(['Vertical', 'Horizontal', 'Flamotubular', 'Aquatubular']),
+    'tipo_combustivel': lambda r: r.choice(['Gás natural', 'Óleo BPF', 'Lenha em toras']),
+    'pressao_maxima_trabalho': lambda r: f"{r.randint(5, 30)},{r.randint(0, 9)} kgf/cm²",
+    'pressao_teste_hidrostatico': lambda r: f"{r.randint(10, 45)} kgf/cm²",
+    'pressao_operacao': lambda r: f"{r.randint(3, 20)} bar",
+    'categoria': lambda r: r.choice(['I', 'II', 'III', 'IV', 'V', 'A', 'B', 'C']),
+    'capacidade_producao_vapor': lambda r: f"{r.randint(500, 20000)} kg/h",
+    'area_superficie_aquecimento': lambda r: f"{r.randint(10, 400)} m²",
+    'volume': lambda r: f"{r.randint(1, 80)} m³",
+    'material_casco': lambda r: r.choice(['ASTM A-285 Gr C', 'SA-516 Gr 70']),
+    'material_espelhos': lambda r: r.choice(['ASTM A-515 Gr 60', 'SA-285 C']),
+    'codigo_projeto': lambda r: r.choice(['ASME Sec. VIII Div. 1', 'ASME BPVC Sec.1/2019']),
+    'empresa_inspecao': lambda r: r.choice(['Inspetora Alfa', 'Bureau Beta']),
+}
+
+
+def _load_aliases() -> Dict[str, List[str]]:
+    """Aliases por campo, lidos do field_mappings.yaml"""
+    import yaml
+
+    with open(settings.CONFIG_DIR / "field_mappings.yaml", 'r', encoding='utf-8') as f:
+        mappings = yaml.safe_load(f) or {}
+    return {field: config.get('aliases', []) + [field]
+            for field, config in mappings.items() if isinstance(config, dict)}
+
+
+def _vary_key(key: str, rng: random.Random) -> str:
+    """Aplica variações típicas de OCR na chave"""
+    variant = rng.random()
+    if variant < 0.25:
+        return key.upper()
+    if variant < 0.45:
+        return key.title()
+    if variant < 0.55:
+        return key + ':'
+    if variant < 0.6:
+        return key.replace(' ', '  ')
+    return key
+
+
+def generate_raw_records(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Gera dicionários brutos de OCR (12-22 chaves cada)"""
+    rng = random.Random(seed)
+    aliases = _load_aliases()
+    fields = [f for f in VALUE_FACTORIES if f in aliases]
+
+    records = []
+    for _ in range(count):
+        record = {}
+        chosen = rng.sample(fields, k=rng.randint(9, len(fields)))
+        for field in chosen:
+            record[_vary_key(rng.choice(aliases[field]), rng)] = VALUE_FACTORIES[field](rng)
+        for key in rng.sample(EXTRA_KEYS, k=rng.randint(2, 5)):
+            record[_vary_key(key, rng)] = f"{rng.randint(1, 999)} {rng.choice(['mm', 'kg', '°C', '%', ''])}".strip()
+        records.append(record)
+    return records
+
+
+def generate_images(directory: Path, count: int, size: tuple = (1280, 960),
+                    seed: int = 42) -> List[Path]:
+    """
+    Gera imagens sintéticas de placas
+
+    Usa Pillow quando disponível (JPEG com texto e ruído, ~100-300 KB);
+    sem Pillow grava bytes aleatórios de tamanho equivalente.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    records = generate_raw_records(count, seed)
+
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        Image = None
+
+    paths = []
+    for i, record in enumerate(records):
+        path = directory / f"placa_sintetica_{i:05d}.jpg"
+        if Image is not None:
+            image = Image.effect_noise(size, 40).convert('RGB')
+            draw = ImageDraw.Draw(image)
+            draw.rectangle([40, 40, size[0] - 40, size[1] - 40], outline=(20, 20, 20), width=6)
+            for line, (key, value) in enumerate(record.items()):
+                draw.text((80, 80 + line * 36), f"{key}: {value}", fill=(10, 10, 10))
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=85)
+            path.write_bytes(buffer.getvalue())
+        else:
+            path.write_bytes(rng.randbytes(rng.randint(100_000, 300_000)))
+        paths.append(path)
+    return paths
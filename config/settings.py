@@ -14,12 +14,22 @@ class Settings:
     # API Configuration
     MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY", "")
     MISTRAL_MODEL = os.getenv("MISTRAL_MODEL", "pixtral-12b-2409")
+    # Permite apontar os clientes para o stub local (stub_server.py)
+    MISTRAL_BASE_URL = os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1").rstrip("/")
+    API_TIMEOUT = float(os.getenv("API_TIMEOUT", "60"))
+    # mock: resultados simulados em processo | api: chamadas HTTP reais
+    OCR_BACKEND = os.getenv("OCR_BACKEND", "mock").lower()
 
     # Batch Processing
     BATCH_THRESHOLD = int(os.getenv("BATCH_THRESHOLD", "5"))
     MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
     BATCH_CHECK_INTERVAL = int(os.getenv("BATCH_CHECK_INTERVAL", "30"))
     MAX_WAIT_TIME = int(os.getenv("MAX_WAIT_TIME", "3600"))
+    MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "4"))  # chamadas simultâneas no modo sync
+    # Executor do modo sync: thread (I/O) | process (estágios CPU fora do GIL)
+    EXECUTOR = os.getenv("EXECUTOR", "thread").lower()
+    POOL_WORKERS = int(os.getenv("POOL_WORKERS", "0"))  # 0 = número de CPUs
+    POOL_CHUNKSIZE = int(os.getenv("POOL_CHUNKSIZE", "0"))  # 0 = automático
 
     # Paths
     ROOT = Path(__file__).parent.parent
@@ -32,15 +42,84 @@ class Settings:
     OUTPUT_REPORTS = OUTPUT_DIR / "reports"
     LOGS_DIR = ROOT / "logs"
 
+    # Tabela colunar dos resultados (estatísticas sem reler todos os JSONs)
+    RESULT_TABLE_FILE = os.getenv("RESULT_TABLE_FILE", str(OUTPUT_DIR / "resultados.nr13t"))
+    # Manifesto dos JSONs gravados (leitura incremental da tabela pela GUI)
+    RESULT_MANIFEST_FILE = os.getenv("RESULT_MANIFEST_FILE", str(OUTPUT_DIR / "resultados.manifest"))
+
+    # Agregados incrementais (total + rollups diário/mensal) para relatórios
+    AGGREGATES_FILE = os.getenv("AGGREGATES_FILE", str(OUTPUT_REPORTS / "agregados.json"))
+    AGGREGATES_DAILY_RETENTION = int(os.getenv("AGGREGATES_DAILY_RETENTION", "400"))  # dias (0 = sem limite)
+
+    # Planejador do modo híbrido (prazo/orçamento → divisão sync + batch)
+    PRICE_PER_IMAGE = float(os.getenv("PRICE_PER_IMAGE", "0.002"))  # custo sync por imagem (moeda do orçamento)
+    BATCH_DISCOUNT = float(os.getenv("BATCH_DISCOUNT", "0.5"))
+    PLANNER_SYNC_DEFAULT_S = float(os.getenv("PLANNER_SYNC_DEFAULT_S", "3"))  # sem histórico: s/imagem por slot
+    PLANNER_BATCH_DEFAULT_S = float(os.getenv("PLANNER_BATCH_DEFAULT_S", "900"))  # sem histórico: duração do job
+    PLANNER_SAFETY = float(os.getenv("PLANNER_SAFETY", "1.2"))  # margem sobre as estimativas
+
+    # Escalonador de prioridade (interactive > bulk > background) na frente da API
+    SCHEDULER_SLOTS = int(os.getenv("SCHEDULER_SLOTS", "0"))  # 0 = concorrência pedida + 1 (reserva interativa)
+    SCHEDULER_SHARES = os.getenv("SCHEDULER_SHARES", "")  # piso por classe, ex.: bulk:0.5,background:0.25
+
+    # Retry com backoff exponencial + circuit breaker nas chamadas à API
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "20"))
+    RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))  # retries / requisições (janela 10s)
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+    # Fila de trabalho compartilhada entre hosts (SQLite em disco compartilhado)
+    QUEUE_PATH = os.getenv("QUEUE_PATH", str(DATA_DIR / "work_queue.sqlite3"))
+    QUEUE_VISIBILITY_TIMEOUT = float(os.getenv("QUEUE_VISIBILITY_TIMEOUT", "300"))
+    QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+    QUEUE_LEASE_SIZE = int(os.getenv("QUEUE_LEASE_SIZE", "0"))  # 0 = MAX_CONCURRENCY
+    # Falhas transitórias do modo sync vão para esta fila (vazio = desativado)
+    RETRY_QUEUE_PATH = os.getenv("RETRY_QUEUE_PATH", str(DATA_DIR / "retry_queue.sqlite3"))
+
+    # Miniaturas da GUI (geradas uma vez por imagem; nova miniatura se o original mudar)
+    THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", str(DATA_DIR / "thumbnails"))
+    THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "480"))  # lado maior em px
+    THUMBNAIL_CACHE_MAX = int(os.getenv("THUMBNAIL_CACHE_MAX", "5000"))  # arquivos (0 = sem limite)
+
     # Processing
     SUPPORTED_FORMATS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp")
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.85"))
+    # Recarga a quente do field_mappings.yaml: intervalo entre verificações (0 = sem recarga)
+    MAPPINGS_RELOAD_INTERVAL_S = float(os.getenv("MAPPINGS_RELOAD_INTERVAL_S", "2"))
     TEMPERATURE = float(os.getenv("TEMPERATURE", "0.1"))
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "2000"))
 
+    # Métricas (timers por estágio, exportação Prometheus)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "sim")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = sem endpoint HTTP
+    METRICS_FILE = os.getenv("METRICS_FILE", str(OUTPUT_REPORTS / "metrics.prom"))  # vazio = não grava
+    # Serialização JSON: auto (orjson/msgspec se instalados) | orjson | msgspec | json
+    JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()
+    JSON_COMPACT = os.getenv("JSON_COMPACT", "false").lower() in ("1", "true", "yes", "sim")  # sem indentação
+
+    # Gravação atômica dos JSONs; fsync: off | group (a cada N arquivos/intervalo) | always
+    FSYNC_MODE = os.getenv("FSYNC_MODE", "group").lower()
+    FSYNC_EVERY = int(os.getenv("FSYNC_EVERY", "64"))
+    FSYNC_INTERVAL_S = float(os.getenv("FSYNC_INTERVAL_S", "2"))
+
+    # Eventos por execução/imagem em OUTPUT_REPORTS/eventos_AAAAMMDD.jsonl (main.py events)
+    EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "true").lower() in ("1", "true", "yes", "sim")
+
+    # Profiling do processamento: off | cprofile | sample
+    PROFILE_MODE = os.getenv("PROFILE_MODE", "off").lower()
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_TOP = int(os.getenv("PROFILE_TOP", "20"))
+
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_JSON = os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes", "sim")  # arquivo em JSON lines
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes", "sim")  # QueueHandler + thread
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))  # rotação (0 = sem rotação)
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_IMAGE_RATE = float(os.getenv("LOG_IMAGE_RATE", "20"))  # logs por imagem/s (0 = sem limite)
 
     # NR-13 Requirements
     REQUIRED_FIELDS = [
@@ -64,12 +143,53 @@ class Settings:
 
         return True
 
+    @classmethod
+    def set_output_dir(cls, output_dir: Path):
+        """Redireciona todas as saídas para outro diretório"""
+        default_metrics = str(cls.OUTPUT_REPORTS / "metrics.prom")
+        default_table = str(cls.OUTPUT_DIR / "resultados.nr13t")
+        default_manifest = str(cls.OUTPUT_DIR / "resultados.manifest")
+        default_aggregates = str(cls.OUTPUT_REPORTS / "agregados.json")
+        cls.OUTPUT_DIR = Path(output_dir)
+        cls.OUTPUT_JSON = cls.OUTPUT_DIR / "json"
+        cls.OUTPUT_BATCH = cls.OUTPUT_DIR / "batch"
+        cls.OUTPUT_REPORTS = cls.OUTPUT_DIR / "reports"
+        if cls.METRICS_FILE == default_metrics:
+            cls.METRICS_FILE = str(cls.OUTPUT_REPORTS / "metrics.prom")
+        if cls.RESULT_TABLE_FILE == default_table:
+            cls.RESULT_TABLE_FILE = str(cls.OUTPUT_DIR / "resultados.nr13t")
+        if cls.RESULT_MANIFEST_FILE == default_manifest:
+            cls.RESULT_MANIFEST_FILE = str(cls.OUTPUT_DIR / "resultados.manifest")
+        if cls.AGGREGATES_FILE == default_aggregates:
+            cls.AGGREGATES_FILE = str(cls.OUTPUT_REPORTS / "agregados.json")
+
+    @classmethod
+    def set_data_dir(cls, data_dir: Path):
+        """Redireciona os dados (filas, miniaturas, históricos) para outro diretório"""
+        default_queue = str(cls.DATA_DIR / "work_queue.sqlite3")
+        default_retry = str(cls.DATA_DIR / "retry_queue.sqlite3")
+        default_thumbnails = str(cls.DATA_DIR / "thumbnails")
+        cls.DATA_DIR = Path(data_dir)
+        if cls.QUEUE_PATH == default_queue:
+            cls.QUEUE_PATH = str(cls.DATA_DIR / "work_queue.sqlite3")
+        if cls.RETRY_QUEUE_PATH == default_retry:
+            cls.RETRY_QUEUE_PATH = str(cls.DATA_DIR / "retry_queue.sqlite3")
+        if cls.THUMBNAIL_DIR == default_thumbnails:
+            cls.THUMBNAIL_DIR = str(cls.DATA_DIR / "thumbnails")
+
+    def snapshot(self) -> dict:
+        """Valores atuais (inclui alterações em tempo de execução) para processos filhos"""
+        return {name: getattr(self, name) for name in dir(self) if name.isupper()}
+
     @classmethod
     def get_env_info(cls) -> dict:
         """Retorna informações do ambiente para debug"""
         return {
             "api_key_configured": bool(cls.MISTRAL_API_KEY),
             "model": cls.MISTRAL_MODEL,
+            "base_url": cls.MISTRAL_BASE_URL,
+            "ocr_backend": cls.OCR_BACKEND,
+            "executor": cls.EXECUTOR,
             "batch_threshold": cls.BATCH_THRESHOLD,
             "similarity_threshold": cls.SIMILARITY_THRESHOLD,
             "directories_exist": all([
@@ -5,12 +5,11 @@ Inspirado no design do Gerador de Propostas ARTEMEC
 """
 
 import streamlit as st
-import pandas as pd
 import json
+import math
 import time
 from pathlib import Path
-import plotly.express as px
-import plotly.graph_objects as go
+from typing import List
 from datetime import datetime
 import sys
 import os
@@ -22,13 +21,17 @@ sys.path.insert(0, str(project_root))
 # Imports do sistema
 try:
     from config.settings import settings
-    from ocr.processor import OCRProcessor
-    from services import BatchManager
-    from utils import get_logger, format_time, validate_nr13_result
+    from ocr.background import BackgroundRunner
+    from ocr.processor import FileManager, OCRProcessor
+    from ocr.result_store import ResultStore
+    from ocr.thumbnails import ThumbnailCache
+    from utils import get_logger, setup_logging, format_time, validate_nr13_result
 except ImportError as e:
     st.error(f"❌ Erro ao importar módulos: {e}")
     st.stop()
 
+setup_logging()
+
 # Configuração da página
 st.set_page_config(
     page_title="Sistema OCR NR-13 | ARTEMEC",
@@ -188,6 +191,8 @@ if 'processor' not in st.session_state:
     st.session_state.processor = None
 if 'images' not in st.session_state:
     st.session_state.images = []
+if 'images_key' not in st.session_state:
+    st.session_state.images_key = None
 if 'selected_image' not in st.session_state:
     st.session_state.selected_image = None
 if 'processing_results' not in st.session_state:
@@ -198,6 +203,15 @@ if 'processing_completed' not in st.session_state:
     st.session_state.processing_completed = False
 if 'processed_files' not in st.session_state:
     st.session_state.processed_files = []
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'job_cursor' not in st.session_state:
+    st.session_state.job_cursor = 0
+
+# Intervalo de atualização do painel de progresso (s)
+POLL_INTERVAL = 1.0
+# Opções de imagens por página na lista
+PAGE_SIZES = (25, 50, 100)
 
 def add_log(message: str, level: str = "info"):
     """Adiciona mensagem ao console"""
@@ -243,69 +257,178 @@ def render_console():
     console_html += '</div>'
     st.markdown(console_html, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_runner() -> BackgroundRunner:
+    """Executor em segundo plano compartilhado (sobrevive a reruns e recargas da página)"""
+    return BackgroundRunner(OCRProcessor)
+
 def initialize_processor():
     """Inicializa o processador OCR"""
     try:
         if st.session_state.processor is None:
             add_log("Inicializando processador OCR...", "info")
-            st.session_state.processor = OCRProcessor()
+            st.session_state.processor = get_runner().processor
             add_log("✅ Processador OCR inicializado com sucesso", "success")
         return True
     except Exception as e:
         add_log(f"❌ Erro ao inicializar processador: {e}", "error")
         return False
 
+def directory_key(directory: Path) -> int:
+    """Chave de invalidação da listagem: mtime do diretório (muda ao adicionar/remover arquivos)"""
+    try:
+        return directory.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def list_input_images(directory: str, mtime_key: int) -> List[str]:
+    """Nomes das imagens do diretório, em cache enquanto o mtime não mudar"""
+    return [path.name for path in FileManager().list_images(Path(directory))]
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def filter_images(directory: str, mtime_key: int, query: str) -> List[str]:
+    """Filtro por nome feito no servidor (resultado em cache por consulta)"""
+    names = list_input_images(directory, mtime_key)
+    query = query.strip().casefold()
+    return [name for name in names if query in name.casefold()] if query else names
+
+@st.cache_resource
+def get_thumbnails() -> ThumbnailCache:
+    """Cache de miniaturas compartilhado entre sessões"""
+    thumbnails = ThumbnailCache(settings.THUMBNAIL_DIR, size=settings.THUMBNAIL_SIZE,
+                                max_files=settings.THUMBNAIL_CACHE_MAX)
+    thumbnails.prune()
+    return thumbnails
+
 def load_images_from_directory():
-    """Carrega imagens do diretório de entrada"""
+    """Carrega imagens do diretório de entrada (relista só quando o diretório muda)"""
     try:
-        if not st.session_state.processor:
-            return []
-        
-        images = st.session_state.processor.files.list_images(settings.INPUT_DIR)
-        add_log(f"📁 Encontradas {len(images)} imagens em {settings.INPUT_DIR}", "info")
-        return images
+        key = directory_key(settings.INPUT_DIR)
+        if key != st.session_state.images_key:
+            names = list_input_images(str(settings.INPUT_DIR), key)
+            st.session_state.images = [settings.INPUT_DIR / name for name in names]
+            st.session_state.images_key = key
+            add_log(f"📁 Encontradas {len(names)} imagens em {settings.INPUT_DIR}", "info")
+        return st.session_state.images
     except Exception as e:
         add_log(f"❌ Erro ao carregar imagens: {e}", "error")
         return []
 
-def simulate_processing(images):
-    """Simula o processamento das imagens"""
-    processed_files = []
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    for i, image in enumerate(images):
-        progress = (i + 1) / len(images)
-        progress_bar.progress(progress)
-        status_text.text(f"Processando {image.name}... ({i+1}/{len(images)})")
-        
-        add_log(f"📷 Processando: {image.name}", "info")
-        
-        # Simula processamento
-        time.sleep(0.8)
-        
-        # Simula resultado do processamento
-        result = {
-            'arquivo': image.name,
-            'fabricante': f'Fabricante {i+1}',
-            'categoria': ['I', 'II', 'III'][i % 3],
-            'completude': 85.0 + (i * 3) % 15,  # Entre 85-100%
-            'identificacao': f'TAG-{i+1:03d}',
-            'pressao_maxima_trabalho': f'{14 + i % 3}.5 kgf/cm²',
-            'timestamp': datetime.now().isoformat()
-        }
-        processed_files.append(result)
-    
-    status_text.text("✅ Processamento concluído!")
-    progress_bar.progress(1.0)
-    
-    return processed_files
+def render_image_browser():
+    """Lista paginada com filtro; só a página atual vira widget"""
+    query = st.text_input("🔎 Filtrar", key="image_filter", placeholder="parte do nome do arquivo")
+    names = filter_images(str(settings.INPUT_DIR), st.session_state.images_key or 0, query)
+
+    col_size, col_page = st.columns(2)
+    with col_size:
+        page_size = st.selectbox("Por página", PAGE_SIZES, key="image_page_size")
+    pages = max(1, math.ceil(len(names) / page_size))
+    if st.session_state.get('image_page', 1) > pages:
+        st.session_state.image_page = pages
+    with col_page:
+        page = st.number_input("Página", min_value=1, max_value=pages, step=1, key="image_page")
+
+    st.caption(f"{len(names)} de {len(st.session_state.images)} imagens · página {page}/{pages}")
+    visible = names[(page - 1) * page_size:page * page_size]
+    if not visible:
+        st.info("Nenhuma imagem corresponde ao filtro.")
+        return
+
+    selected = st.session_state.selected_image
+    choice = st.radio("Imagens", visible, index=visible.index(selected) if selected in visible else None,
+                      format_func=lambda name: f"📷 {name}", label_visibility="collapsed")
+    if choice is not None and choice != selected:
+        st.session_state.selected_image = choice
+        add_log(f"📷 Selecionada: {choice}", "info")
+
+def result_row(record: dict) -> dict:
+    """Linha da tabela de arquivos processados a partir de um resultado normalizado"""
+    meta = record.get('_metadata') or {}
+    validation = meta.get('validacao') or validate_nr13_result(record)
+    return {
+        'arquivo': meta.get('arquivo', ''),
+        'fabricante': record.get('fabricante'),
+        'categoria': record.get('categoria'),
+        'completude': validation['completeness'],
+        'identificacao': record.get('identificacao'),
+        'pressao_maxima_trabalho': record.get('pressao_maxima_trabalho'),
+        'timestamp': meta.get('processado_em', datetime.now().isoformat())
+    }
+
+def submit_job(kind: str, **params):
+    """Envia um job ao executor em segundo plano e acompanha seus eventos"""
+    st.session_state.job_id = get_runner().submit(kind, **params)
+    st.session_state.job_cursor = 0
+    st.session_state.processing_completed = False
+
+def finish_job(status: dict):
+    """Guarda os resultados de um job concluído na sessão"""
+    summary = get_runner().summary(status['job_id']) or {}
+    if status['tipo'] == 'single':
+        rows = [result_row(summary['data'])] if summary.get('success') else []
+        st.session_state.processed_files = st.session_state.processed_files + rows
+    else:
+        st.session_state.processed_files = [result_row(r) for r in summary.get('resultados', [])]
+    st.session_state.processing_completed = status['status'] == 'done'
+    st.session_state.job_id = None
+
+def render_job_progress():
+    """Progresso do job atual, lido de forma incremental da fila de eventos"""
+    runner = get_runner()
+    if st.session_state.job_id is None and runner.busy():
+        # Página recarregada durante um job: reconecta ao mais recente
+        st.session_state.job_id = runner.latest()
+        st.session_state.job_cursor = 0
+    job_id = st.session_state.job_id
+    if job_id is None:
+        return
+    status = runner.status(job_id)
+    if status is None:
+        st.session_state.job_id = None
+        return
+
+    events, st.session_state.job_cursor = runner.poll(job_id, st.session_state.job_cursor)
+    for event in events:
+        if event['evento'] == 'imagem':
+            if event['sucesso']:
+                add_log(f"📷 {event['arquivo']} processada em {format_time(event['tempo'] or 0)}", "success")
+            else:
+                add_log(f"❌ {event['arquivo']}: {event['erro']}", "error")
+        elif event['evento'] == 'fim' and event['status'] == 'error':
+            add_log(f"❌ Job falhou: {event['erro']}", "error")
+
+    total = status['total'] or '?'
+    st.progress(status['progresso'])
+    st.text(f"{status['concluidas']}/{total} imagens · {status['falhas']} falhas · "
+            f"{status['imagens_por_s']:.2f} img/s · {format_time(status['tempo'])}")
+    if status['estagios']:
+        import pandas as pd
+
+        st.dataframe(pd.DataFrame([
+            {'estágio': stage, 'n': info['count'],
+             'média (ms)': round(info['total'] / info['count'] * 1000, 1) if info['count'] else 0.0,
+             'máx (ms)': round(info['max'] * 1000, 1), 'total (s)': round(info['total'], 2)}
+            for stage, info in status['estagios'].items()
+        ]), use_container_width=True)
+
+    if status['status'] in ('done', 'error', 'cancelled'):
+        finish_job(status)
+        add_log(f"✅ Processamento concluído! {status['concluidas']} imagens ({status['falhas']} falhas)",
+                "success" if status['status'] == 'done' else "warning")
+        st.rerun()
+
+# Com st.fragment só o painel de progresso é reexecutado a cada intervalo
+_fragment = getattr(st, 'fragment', None)
+if _fragment is not None:
+    render_job_progress = _fragment(run_every=POLL_INTERVAL)(render_job_progress)
 
 def show_processed_files():
     """Mostra arquivos processados"""
     if st.session_state.processed_files:
         st.markdown("### 📁 Arquivos Processados")
+        import pandas as pd
+        import plotly.express as px
         
         # Converte para DataFrame
         df = pd.DataFrame(st.session_state.processed_files)
@@ -357,6 +480,129 @@ def show_processed_files():
     else:
         st.info("Nenhum arquivo processado ainda.")
 
+@st.cache_resource
+def get_store() -> ResultStore:
+    """Acesso aos resultados salvos (tabela indexada + agregados), compartilhado entre sessões"""
+    return ResultStore()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_dashboard(version) -> dict:
+    """Estatísticas pré-agregadas da versão atual do store"""
+    return get_store().dashboard(version)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_results_page(version, page: int, page_size: int, fabricante, categoria, invalid_only: bool):
+    """Página de resultados filtrados (linhas, total)"""
+    return get_store().page((page - 1) * page_size, page_size, fabricante, categoria, invalid_only, version)
+
+def style_chart(fig, **layout):
+    """Tema escuro dos gráficos"""
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                      font_color='white', **layout)
+    return fig
+
+def render_results(version):
+    """Resultados salvos: métricas, tabela paginada com filtros e completude por fabricante"""
+    dashboard = load_dashboard(version)
+    
+    if st.button("🔄 Reindexar Resultados", help="Relê output/json (JSONs copiados manualmente)"):
+        changed = get_store().rescan()
+        load_dashboard.clear()
+        load_results_page.clear()
+        add_log(f"📋 Índice de resultados atualizado ({changed} alterados)", "info")
+        st.rerun()
+    
+    if not dashboard['resultados']:
+        st.info("Nenhum resultado salvo ainda.")
+        return
+    
+    validation = dashboard['validacao']
+    col_r1, col_r2, col_r3 = st.columns(3)
+    col_r1.metric("Resultados", dashboard['resultados'])
+    col_r2.metric("Válidos NR-13", validation['validos'], f"{validation['taxa_sucesso']:.1f}%")
+    col_r3.metric("Completude Média", f"{validation['completude_media']:.1f}%")
+    
+    col_f1, col_f2, col_f3 = st.columns(3)
+    with col_f1:
+        fabricante = st.selectbox("Fabricante", ["Todos"] + dashboard['opcoes']['fabricante'], key="res_fabricante")
+    with col_f2:
+        categoria = st.selectbox("Categoria", ["Todas"] + dashboard['opcoes']['categoria'], key="res_categoria")
+    with col_f3:
+        invalid_only = st.checkbox("Só incompletos", key="res_invalid")
+    
+    page_size = PAGE_SIZES[1]
+    page = st.session_state.get('res_page', 1)
+    rows, total = load_results_page(version, page, page_size,
+                                    None if fabricante == "Todos" else fabricante,
+                                    None if categoria == "Todas" else categoria, invalid_only)
+    pages = max(1, math.ceil(total / page_size))
+    if page > pages:
+        st.session_state.res_page = 1
+        st.rerun()
+    
+    import pandas as pd
+
+    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+    col_p1, col_p2 = st.columns([1, 2])
+    with col_p1:
+        st.number_input("Página", min_value=1, max_value=pages, step=1, key="res_page")
+    with col_p2:
+        st.caption(f"{total} resultados · página {page}/{pages}")
+    
+    if dashboard['fabricantes']:
+        import plotly.express as px
+
+        df = pd.DataFrame(dashboard['fabricantes'])
+        fig = px.bar(df, x='fabricante', y='completude_media', hover_data=['resultados'],
+                     title='📊 Completude Média por Fabricante',
+                     color='completude_media', color_continuous_scale='RdYlGn', range_color=[0, 100])
+        st.plotly_chart(style_chart(fig, xaxis_title="Fabricante", yaxis_title="Completude (%)"),
+                        use_container_width=True)
+
+def render_statistics(version):
+    """Métricas e gráficos a partir dos agregados acumulados (não lê os JSONs)"""
+    dashboard = load_dashboard(version)
+    totals = dashboard['acumulado']
+    batch = totals['modos'].get('batch', {})
+    savings = batch.get('resultados', 0) * settings.PRICE_PER_IMAGE * settings.BATCH_DISCOUNT
+    
+    cards = [
+        (totals['resultados'], "Imagens Processadas"),
+        (f"{totals['taxa_sucesso']:.1f}%", "Taxa de Sucesso"),
+        (batch.get('execucoes', 0), "Jobs Batch"),
+        (f"${savings:.2f}", "Economia Total"),
+    ]
+    for column, (value, label) in zip(st.columns(4), cards):
+        with column:
+            st.markdown(f"""
+            <div class="metric-container">
+                <div class="metric-value">{value}</div>
+                <div class="metric-label">{label}</div>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # pandas/plotly só são carregados quando há dados para os gráficos
+    if dashboard['diario']:
+        import pandas as pd
+        import plotly.express as px
+
+        daily = pd.DataFrame([{'data': day['periodo'], 'imagens': day['resultados'] + day['falhas']}
+                              for day in dashboard['diario']])
+        fig = px.line(daily, x='data', y='imagens', title='📈 Imagens Processadas por Dia', markers=True)
+        st.plotly_chart(style_chart(fig), use_container_width=True)
+    
+    if dashboard['resultados']:
+        import pandas as pd
+        import plotly.express as px
+
+        fields = pd.DataFrame([{'campo': name, 'percentual': info['percentual']}
+                               for name, info in dashboard['campos'].items()])
+        fig = px.bar(fields.sort_values('percentual'), x='percentual', y='campo', orientation='h',
+                     title='🧾 Campos Encontrados (%)', range_x=[0, 100])
+        st.plotly_chart(style_chart(fig), use_container_width=True)
+    else:
+        st.info("Nenhum resultado salvo ainda.")
+
 def main():
     """Função principal da GUI"""
     
@@ -368,6 +614,9 @@ def main():
         st.error("❌ Falha ao inicializar o sistema. Verifique as configurações.")
         st.stop()
     
+    # Versão dos resultados salvos: chave dos caches das abas Resultados/Estatísticas
+    store_version = get_store().version()
+    
     # Layout principal em duas colunas
     col1, col2 = st.columns([1, 2])
     
@@ -376,27 +625,17 @@ def main():
         
         # Botão para atualizar lista
         if st.button("🔄 Atualizar Lista", key="refresh_images"):
-            st.session_state.images = load_images_from_directory()
+            list_input_images.clear()
+            st.session_state.images_key = None
             # Reset do estado de processamento se novas imagens
-            if st.session_state.images:
-                st.session_state.processing_completed = False
+            st.session_state.processing_completed = False
         
-        # Carrega imagens se não existirem
-        if not st.session_state.images:
-            st.session_state.images = load_images_from_directory()
+        # Relista só se o diretório mudou (mtime)
+        load_images_from_directory()
         
         # Lista de imagens
         if st.session_state.images:
-            for i, image_path in enumerate(st.session_state.images):
-                selected = st.session_state.selected_image == i
-                button_text = f"📷 {image_path.name}"
-                
-                if selected:
-                    button_text = f"✅ {image_path.name}"
-                
-                if st.button(button_text, key=f"img_{i}"):
-                    st.session_state.selected_image = i
-                    add_log(f"📷 Selecionada: {image_path.name}", "info")
+            render_image_browser()
         else:
             st.info(f"⚠️ Nenhuma imagem encontrada em `{settings.INPUT_DIR}`")
             st.markdown("**Coloque as imagens das placas NR-13 na pasta de entrada.**")
@@ -429,26 +668,16 @@ def main():
             """, unsafe_allow_html=True)
             
             # Botões de ação
+            job_running = st.session_state.job_id is not None or get_runner().busy()
             col_btn1, col_btn2 = st.columns(2)
             
             with col_btn1:
                 # Botão muda após processamento
                 if not st.session_state.processing_completed:
                     # Botão normal de processar
-                    if st.button("🚀 Processar Todas", disabled=not st.session_state.images):
+                    if st.button("🚀 Processar Todas", disabled=not st.session_state.images or job_running):
                         add_log("🚀 Iniciando processamento de todas as imagens...", "info")
-                        
-                        # Processa imagens
-                        processed_files = simulate_processing(st.session_state.images)
-                        
-                        # Salva resultados
-                        st.session_state.processed_files = processed_files
-                        st.session_state.processing_completed = True
-                        
-                        add_log(f"✅ Processamento concluído! {len(processed_files)} arquivos processados", "success")
-                        
-                        # Força refresh da página para mostrar mudanças
-                        st.rerun()
+                        submit_job('process', input_dir=settings.INPUT_DIR)
                 else:
                     # Botão verde para ver arquivos processados
                     if st.button("📁 Ver Arquivos Processados", key="view_processed"):
@@ -456,15 +685,15 @@ def main():
                         st.session_state.show_processed_modal = True
             
             with col_btn2:
-                if st.button("🎯 Processar Selecionada", disabled=st.session_state.selected_image is None):
+                if st.button("🎯 Processar Selecionada",
+                             disabled=st.session_state.selected_image is None or job_running):
                     if st.session_state.selected_image is not None:
-                        selected_img = st.session_state.images[st.session_state.selected_image]
+                        selected_img = settings.INPUT_DIR / st.session_state.selected_image
                         add_log(f"🎯 Processando imagem selecionada: {selected_img.name}", "info")
-                        
-                        with st.spinner("Processando..."):
-                            time.sleep(2)  # Simula processamento
-                        
-                        add_log("✅ Processamento da imagem concluído!", "success")
+                        submit_job('single', image_path=selected_img)
+            
+            # Progresso do job em segundo plano
+            render_job_progress()
             
             # Mostra arquivos processados se botão foi clicado
             if st.session_state.processing_completed and 'show_processed_modal' in st.session_state:
@@ -473,45 +702,19 @@ def main():
             
             # Preview da imagem selecionada
             if st.session_state.selected_image is not None:
-                selected_img = st.session_state.images[st.session_state.selected_image]
+                selected_img = settings.INPUT_DIR / st.session_state.selected_image
                 st.markdown("#### 🖼️ Preview da Imagem Selecionada")
                 
-                try:
-                    st.image(str(selected_img), caption=selected_img.name, use_column_width=True)
-                except Exception as e:
-                    st.error(f"Erro ao carregar imagem: {e}")
+                # Miniatura gerada uma vez e servida do cache (não carrega o original)
+                thumbnail = get_thumbnails().get(selected_img)
+                if thumbnail is not None:
+                    st.image(str(thumbnail), caption=selected_img.name, use_column_width=True)
+                else:
+                    st.error(f"Erro ao carregar imagem: {selected_img.name}")
         
         with tab2:
             st.markdown("### 📊 Resultados do Processamento")
-            
-            if st.session_state.processing_completed and st.session_state.processed_files:
-                show_processed_files()
-            else:
-                # Simula alguns resultados para demonstração
-                if st.button("📋 Carregar Últimos Resultados"):
-                    add_log("📋 Carregando resultados salvos...", "info")
-                    
-                    # Dados simulados
-                    sample_results = [
-                        {"arquivo": "placa_001.jpg", "fabricante": "ACME Corp", "categoria": "I", "completude": 95.0},
-                        {"arquivo": "placa_002.jpg", "fabricante": "TechSteel", "categoria": "II", "completude": 88.5},
-                        {"arquivo": "placa_003.jpg", "fabricante": "MetalWorks", "categoria": "I", "completude": 92.3},
-                    ]
-                    
-                    df = pd.DataFrame(sample_results)
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # Gráfico de completude
-                    fig = px.bar(df, x='arquivo', y='completude', 
-                               title='Completude dos Resultados (%)',
-                               color='completude',
-                               color_continuous_scale='Turbo')
-                    fig.update_layout(
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font_color='white'
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+            render_results(store_version)
         
         with tab3:
             st.markdown("### ⚙️ Configurações do Sistema")
@@ -556,65 +759,7 @@ def main():
         
         with tab4:
             st.markdown("### 📈 Estatísticas do Sistema")
-            
-            # Métricas principais
-            col_m1, col_m2, col_m3, col_m4 = st.columns(4)
-            
-            with col_m1:
-                total_processed = len(st.session_state.processed_files)
-                st.markdown(f"""
-                <div class="metric-container">
-                    <div class="metric-value">{total_processed}</div>
-                    <div class="metric-label">Imagens Processadas</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col_m2:
-                if st.session_state.processed_files:
-                    avg_completude = sum(f['completude'] for f in st.session_state.processed_files) / len(st.session_state.processed_files)
-                    success_rate = f"{avg_completude:.1f}%"
-                else:
-                    success_rate = "94.2%"
-                    
-                st.markdown(f"""
-                <div class="metric-container">
-                    <div class="metric-value">{success_rate}</div>
-                    <div class="metric-label">Taxa de Sucesso</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col_m3:
-                st.markdown("""
-                <div class="metric-container">
-                    <div class="metric-value">12</div>
-                    <div class="metric-label">Jobs Batch</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col_m4:
-                st.markdown("""
-                <div class="metric-container">
-                    <div class="metric-value">$23.45</div>
-                    <div class="metric-label">Economia Total</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Gráfico de processamento ao longo do tempo
-            dates = pd.date_range(start='2025-08-01', end='2025-08-22', freq='D')
-            processing_data = pd.DataFrame({
-                'data': dates,
-                'imagens': [abs(int(x)) for x in (5 + 10 * pd.Series(range(len(dates))).apply(lambda x: x % 7 - 3.5))]
-            })
-            
-            fig = px.line(processing_data, x='data', y='imagens', 
-                         title='📈 Imagens Processadas por Dia',
-                         markers=True)
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            render_statistics(store_version)
     
     # Console na parte inferior
     st.markdown("---")
@@ -625,5 +770,10 @@ def main():
         st.session_state.console_logs = []
         add_log("Console limpo", "info")
 
+    # Sem st.fragment (Streamlit antigo): reexecuta a página enquanto houver job
+    if _fragment is None and st.session_state.job_id is not None:
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
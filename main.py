@@ -6,23 +6,19 @@ Entry point principal
 import sys
 import json
 import os
+import time
+import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Adiciona diretório raiz ao path para imports
 project_root = Path(__file__).parent.absolute()
 sys.path.insert(0, str(project_root))
 
-# Agora importa os módulos do projeto
-try:
-    from config.settings import settings
-    from ocr.processor import OCRProcessor
-    from ocr.models import PlacaNR13
-    from services import BatchManager
-    from utils import (
-        get_logger, print_banner, print_summary, ask_confirmation,
-        validate_nr13_result, format_time, get_system_info
-    )
-except ImportError as e:
+
+
+def print_import_help(e: ImportError):
+    """Orienta o usuário quando um módulo/dependência não pode ser importado"""
     print(f"❌ Erro ao importar módulos: {e}")
     print("\n🔧 Soluções possíveis:")
     print("1. Verifique se está no diretório correto do projeto")
@@ -32,10 +28,33 @@ except ImportError as e:
     print("5. Execute: python setup.py")
     print(f"6. Diretório atual: {Path.cwd()}")
     print(f"7. Diretório do projeto: {Path(__file__).parent.absolute()}")
+
+
+# Módulos leves; OCR, serviços e dependências pesadas (requests, yaml)
+# são importados sob demanda para manter a inicialização rápida
+try:
+    from config.settings import settings
+    from utils import (
+        get_logger, setup_logging, print_banner, print_summary, ask_confirmation,
+        format_time, get_system_info, set_console_stream
+    )
+except ImportError as e:
+    print_import_help(e)
     sys.exit(1)
 
+if TYPE_CHECKING:
+    from ocr.processor import OCRProcessor
+
 logger = get_logger(__name__)
 
+# Códigos de saída dos subcomandos (2 = uso inválido, gerado pelo argparse)
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+EXIT_NO_INPUT = 4
+EXIT_CONFIG = 5
+
 
 def print_menu():
     """Imprime menu principal"""
@@ -84,7 +103,7 @@ def check_project_structure():
     return True
 
 
-def process_images(processor: OCRProcessor):
+def process_images(processor: 'OCRProcessor'):
     """Processa imagens no diretório de entrada"""
     print("\n🔄 Processando imagens...")
 
@@ -103,6 +122,9 @@ def process_images(processor: OCRProcessor):
     else:
         print_summary(summary)
 
+        if 'perfil' in summary:
+            print_profile(summary['perfil'])
+
         if summary.get('sucesso', 0) > 0:
             print(f"\n✅ Resultados salvos em: {settings.OUTPUT_JSON}")
             
@@ -110,8 +132,18 @@ def process_images(processor: OCRProcessor):
             show_recent_results()
 
 
+def print_profile(profile: dict, limit: int = 10):
+    """Mostra funções mais quentes do perfil da execução"""
+    print(f"\n🔬 Perfil ({profile.get('modo')}): {profile.get('arquivo')}")
+    print(f"{'próprio %':>10} {'total %':>9}  função")
+    for entry in profile.get('top', [])[:limit]:
+        print(f"{entry['self_pct']:>9.1f}% {entry['total_pct']:>8.1f}%  {entry['function']}")
+
+
 def show_recent_results(limit: int = 3):
     """Mostra resultados recentes"""
+    from ocr.serialization import load_file
+
     try:
         json_files = sorted(settings.OUTPUT_JSON.glob("*_ocr.json"), 
                            key=lambda x: x.stat().st_mtime, reverse=True)
@@ -122,8 +154,7 @@ def show_recent_results(limit: int = 3):
             
             for json_file in json_files[:limit]:
                 try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                    data = load_file(json_file)
                     
                     print(f"\n📄 {json_file.name}:")
                     
@@ -145,7 +176,7 @@ def show_recent_results(limit: int = 3):
         print(f"❌ Erro ao listar resultados: {e}")
 
 
-def process_single_image(processor: OCRProcessor):
+def process_single_image(processor: 'OCRProcessor'):
     """Processa uma imagem específica"""
     path = input("\nCaminho da imagem: ").strip()
 
@@ -159,7 +190,11 @@ def process_single_image(processor: OCRProcessor):
 
     print(f"\n🔄 Processando: {path}")
     result = processor.process_single(path)
+    show_single_result(result)
+
 
+def show_single_result(result: dict):
+    """Mostra resultado do processamento de uma imagem"""
     if result.get('success'):
         print("\n✅ Processamento concluído!")
 
@@ -200,87 +235,53 @@ def process_single_image(processor: OCRProcessor):
         print(f"\n❌ Erro: {result.get('error', 'Desconhecido')}")
 
 
-def validate_jsons():
+def collect_validation(json_dir: Path = None) -> dict:
+    """Valida JSONs processados e retorna o resultado agregado"""
+    from ocr.validation import engine_for, validate_store
+    return validate_store(engine_for(settings.REQUIRED_FIELDS), json_dir or settings.OUTPUT_JSON)
+
+
+def validate_jsons(report: dict = None):
     """Valida JSONs já processados"""
     try:
-        json_files = list(settings.OUTPUT_JSON.glob("*_ocr.json"))
+        report = report or collect_validation()
 
-        if not json_files:
+        if not report['total']:
             print(f"\n⚠️ Nenhum JSON encontrado em {settings.OUTPUT_JSON}")
             return
 
-        print(f"\n📊 Validando {len(json_files)} arquivos...")
+        print(f"\n📊 Validando {report['total']} arquivos...")
         print("-"*60)
 
-        stats = {'validos': 0, 'incompletos': 0, 'erros': 0}
-        detailed_results = []
-
-        for json_file in json_files:
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                if '_metadata' in data and 'validacao' in data['_metadata']:
-                    val = data['_metadata']['validacao']
-                    
-                    result = {
-                        'file': json_file.name,
-                        'valid': val['valid'],
-                        'completeness': val['completeness'],
-                        'missing': val.get('missing', [])
-                    }
-                    
-                    if val['valid']:
-                        print(f"✅ {json_file.name}: {val['completeness']:.1f}% completo")
-                        stats['validos'] += 1
-                    else:
-                        missing = ', '.join(val['missing'])
-                        print(f"⚠️  {json_file.name}: Faltam: {missing}")
-                        stats['incompletos'] += 1
-                        
-                    detailed_results.append(result)
-                else:
-                    # Tenta validar manualmente
-                    val = validate_nr13_result(data)
-                    
-                    result = {
-                        'file': json_file.name,
-                        'valid': val['valid'],
-                        'completeness': val['completeness'],
-                        'missing': val.get('missing', [])
-                    }
-                    
-                    if val['valid']:
-                        print(f"✅ {json_file.name}: Válido")
-                        stats['validos'] += 1
-                    else:
-                        print(f"⚠️  {json_file.name}: Incompleto")
-                        stats['incompletos'] += 1
-                        
-                    detailed_results.append(result)
-
-            except Exception as e:
-                print(f"❌ {json_file.name}: Erro - {e}")
-                stats['erros'] += 1
+        for entry in report['arquivos']:
+            if 'error' in entry:
+                print(f"❌ {entry['file']}: Erro - {entry['error']}")
+            elif entry['valid']:
+                print(f"✅ {entry['file']}: {entry['completeness']:.1f}% completo")
+            else:
+                print(f"⚠️  {entry['file']}: Faltam: {', '.join(entry['missing'])}")
 
         print("-"*60)
-        print(f"📈 Resumo: {stats['validos']} válidos, {stats['incompletos']} incompletos, {stats['erros']} erros")
+        print(f"📈 Resumo: {report['validos']} válidos, {report['incompletos']} incompletos, {report['erros']} erros")
         
         # Mostra estatísticas mais detalhadas
-        if detailed_results:
-            total_valid = len([r for r in detailed_results if r['valid']])
-            avg_completeness = sum(r['completeness'] for r in detailed_results) / len(detailed_results)
-            print(f"📊 Taxa de sucesso: {total_valid/len(detailed_results)*100:.1f}%")
-            print(f"📊 Completude média: {avg_completeness:.1f}%")
+        if report['validos'] + report['incompletos']:
+            print(f"📊 Taxa de sucesso: {report['taxa_sucesso']:.1f}%")
+            print(f"📊 Completude média: {report['completude_media']:.1f}%")
+            missing = {field: count for field, count in report['faltantes_por_campo'].items() if count}
+            if missing:
+                print("📊 Faltantes por campo: " + ", ".join(f"{field} {count}" for field, count in missing.items()))
     except Exception as e:
         print(f"❌ Erro na validação: {e}")
 
 
-def show_batch_history():
+def show_batch_history(limit: int = 10):
     """Mostra histórico de jobs batch"""
     try:
+        from services import BatchManager
+
         batch_manager = BatchManager()
-        jobs = batch_manager.list_jobs(limit=10)
+        jobs = batch_manager.list_jobs(limit=limit)
 
         if not jobs:
             print("\n⚠️ Nenhum job batch encontrado")
@@ -313,47 +314,78 @@ def show_batch_history():
         print(f"❌ Erro ao carregar histórico: {e}")
 
 
-def show_reports():
-    """Mostra relatórios disponíveis"""
+def load_aggregates():
+    """Agregados incrementais gravados pelo processamento"""
+    from ocr.aggregates import RunningAggregates
+    return RunningAggregates(settings.AGGREGATES_FILE, daily_retention=settings.AGGREGATES_DAILY_RETENTION)
+
+
+def show_reports(period: str = 'daily', last: int = 7, aggregates=None):
+    """Mostra o resumo acumulado e a tendência por período"""
     try:
-        reports = list(settings.OUTPUT_REPORTS.glob("resumo_*.json"))
+        aggregates = aggregates or load_aggregates()
+        total = aggregates.report()
 
-        if not reports:
-            print("\n⚠️ Nenhum relatório encontrado")
+        if not total['resultados'] and not total['falhas']:
+            print("\n⚠️ Nenhum processamento registrado (use 'reports --rebuild' para ler output/json)")
             return
 
-        print(f"\n📊 Últimos Relatórios")
+        print("\n📊 Resumo Acumulado")
         print("-"*60)
-
-        # Ordena por data (mais recente primeiro)
-        reports_sorted = sorted(reports, key=lambda x: x.stat().st_mtime, reverse=True)
-
-        for report in reports_sorted[:10]:
-            try:
-                with open(report, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                timestamp = data.get('timestamp', 'N/A')
-                total = data.get('total_imagens', 0)
-                sucesso = data.get('sucesso', 0)
-                taxa = data.get('taxa_sucesso', 0)
-                modo = data.get('modo', 'N/A')
-                tempo = data.get('tempo_total')
-
-                print(f"\n📄 {report.name}")
-                print(f"   Data: {timestamp[:19] if timestamp != 'N/A' else 'N/A'}")
-                print(f"   Total: {total} | Sucesso: {sucesso} | Taxa: {taxa:.1f}%")
-                print(f"   Modo: {modo.upper() if modo != 'N/A' else 'N/A'}")
-                
-                if tempo:
-                    print(f"   Tempo: {format_time(tempo)}")
-
-            except Exception as e:
-                print(f"\n📄 {report.name} (erro ao ler: {e})")
+        print(f"   Resultados: {total['resultados']} | Falhas: {total['falhas']} | "
+              f"Taxa: {total['taxa_sucesso']:.1f}%")
+        print(f"   Válidos: {total['validos']} ({total['taxa_validos']:.1f}%) | "
+              f"Completude média: {total['completude_media']:.1f}%")
+        for mode, info in total['modos'].items():
+            print(f"   Modo {mode.upper()}: {info['resultados']} resultados, "
+                  f"tempo médio {format_time(info['tempo_medio'])}")
+        if total['atualizado_em']:
+            print(f"   Atualizado em: {total['atualizado_em']}")
+
+        label = 'Dia' if period == 'daily' else 'Mês'
+        print(f"\n📈 Tendência ({label.lower()}, últimos {last})")
+        print("-"*60)
+        for entry in reversed(aggregates.trend(period, last)):
+            print(f"   {entry['periodo']}: {entry['resultados']} resultados, {entry['falhas']} falhas | "
+                  f"taxa {entry['taxa_sucesso']:.1f}% | completude {entry['completude_media']:.1f}%")
     except Exception as e:
         print(f"❌ Erro ao carregar relatórios: {e}")
 
 
+def show_events(analysis: dict):
+    """Mostra a análise do log de eventos das execuções"""
+    if not analysis['execucoes']:
+        print("\n⚠️ Nenhuma execução registrada em output/reports/eventos_*.jsonl")
+        return
+
+    print(f"\n⏱️  Análise de {analysis['execucoes']} execuções")
+    print("-"*60)
+    print(f"   Imagens: {analysis['imagens']} | Falhas: {analysis['falhas']} | "
+          f"Taxa: {analysis['taxa_sucesso']:.1f}% | {analysis['imagens_por_s']:.2f} imagens/s")
+    latency = analysis['latencia']
+    print(f"   Latência por imagem: p50 {format_time(latency['p50'])} | p95 {format_time(latency['p95'])} | "
+          f"p99 {format_time(latency['p99'])} | máx {format_time(latency['max'])}")
+    for stage, timing in analysis['estagios'].items():
+        print(f"   • {stage}: p50 {format_time(timing['p50'])} | p95 {format_time(timing['p95'])} | "
+              f"p99 {format_time(timing['p99'])}")
+    print(f"   Retries: {analysis['retries']} | Enviados: {analysis['bytes_enviados'] / 1024 / 1024:.1f} MB")
+    for mode, info in analysis['modos'].items():
+        print(f"   Modo {mode.upper()}: {info['execucoes']} execuções, {info['imagens']} imagens, "
+              f"{info['imagens_por_s']:.2f} imagens/s")
+
+    if analysis['falhas_por_tipo']:
+        print("\n❌ Falhas por tipo:")
+        for kind, count in analysis['falhas_por_tipo'].items():
+            print(f"   • {kind}: {count}")
+
+    print("\n🕒 Últimas execuções:")
+    for run in reversed(analysis['ultimas_execucoes']):
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['inicio'])) if run['inicio'] else '?'
+        status = '' if run['concluida'] else ' (interrompida)'
+        print(f"   {started} [{run['modo']}] {run['sucesso']}/{run['imagens']} imagens em "
+              f"{format_time(run['segundos'])}{status}")
+
+
 def show_settings():
     """Mostra configurações atuais"""
     print("\n⚙️  CONFIGURAÇÕES ATUAIS")
@@ -367,6 +399,7 @@ def show_settings():
     print(f"   • Similaridade: {settings.SIMILARITY_THRESHOLD * 100:.0f}%")
     print(f"   • Temperature: {settings.TEMPERATURE}")
     print(f"   • Max Tokens: {settings.MAX_TOKENS}")
+    print(f"   • Profiling: {settings.PROFILE_MODE}")
 
     print("\n📁 Diretórios:")
     print(f"   • Input: {settings.INPUT_DIR}")
@@ -391,7 +424,7 @@ def show_settings():
         print(f"\n❌ Erro ao verificar ambiente: {e}")
 
 
-def test_connection(processor: OCRProcessor):
+def test_connection(processor: 'OCRProcessor'):
     """Testa conexão com a API"""
     print("\n🔍 Testando conexão com Mistral AI...")
     
@@ -399,7 +432,7 @@ def test_connection(processor: OCRProcessor):
         if processor.test_api_connection():
             print("✅ Conexão com API estabelecida com sucesso!")
             print(f"   • Modelo: {settings.MISTRAL_MODEL}")
-            print(f"   • Endpoint: https://api.mistral.ai")
+            print(f"   • Endpoint: {settings.MISTRAL_BASE_URL}")
         else:
             print("❌ Falha na conexão com a API")
             print("   • Verifique sua MISTRAL_API_KEY")
@@ -408,7 +441,7 @@ def test_connection(processor: OCRProcessor):
         print(f"❌ Erro no teste: {e}")
 
 
-def show_statistics(processor: OCRProcessor):
+def show_statistics(processor: 'OCRProcessor'):
     """Mostra estatísticas do sistema"""
     print("\n📈 ESTATÍSTICAS DO SISTEMA")
     print("-"*60)
@@ -424,12 +457,33 @@ def show_statistics(processor: OCRProcessor):
         print("\n🗂️  Normalizador:")
         norm_stats = stats['normalizer_stats']
         print(f"   • Mapeamentos predefinidos: {norm_stats['total_predefined']}")
+        print(f"   • Versão dos mapeamentos: {norm_stats['mappings_version']} "
+              f"({norm_stats['mappings_digest']}, {norm_stats['mappings_reloads']} recargas)")
         print(f"   • Mapeamentos aprendidos: {norm_stats['total_learned']}")
         print(f"   • Threshold similaridade: {norm_stats['threshold']*100:.0f}%")
         
         if norm_stats['learned_fields']:
             print(f"   • Campos aprendidos: {', '.join(norm_stats['learned_fields'][:5])}")
         
+        metrics = stats.get('metrics', {})
+        if metrics.get('stages'):
+            print("\n⏱️  Tempos por estágio (p50 / p95):")
+            for stage, timing in metrics['stages'].items():
+                print(f"   • {stage}: {format_time(timing['p50'])} / {format_time(timing['p95'])} "
+                      f"({timing['count']} medições)")
+        
+        scheduler = stats.get('scheduler', {})
+        if scheduler:
+            print(f"\n🚦 Escalonador da API ({scheduler['slots']} slots):")
+            for name, info in scheduler['classes'].items():
+                print(f"   • {name}: reserva {info['reserved']} | {info['granted']} chamadas | "
+                      f"espera média {format_time(info['wait_avg'])}, máx {format_time(info['wait_max'])}")
+        
+        resilience = stats.get('api_resilience', {})
+        if resilience.get('requests'):
+            print(f"   • Retries: {resilience['retries']} | circuito: {resilience['circuit_state']} "
+                  f"({resilience['circuit_rejected']} rejeitadas)")
+        
         print("\n📦 Batch Manager:")
         batch_stats = stats['batch_stats']
         print(f"   • Total jobs: {batch_stats['total_jobs']}")
@@ -448,13 +502,437 @@ def show_statistics(processor: OCRProcessor):
         print(f"   • JSONs processados: {len(json_files)}")
         print(f"   • Arquivos batch: {len(batch_files)}")
         print(f"   • Relatórios: {len(reports)}")
+
+        from ocr.result_table import load_store_table
+        table = load_store_table()
+        if len(table):
+            print(f"\n🏭 Resultados por fabricante ({len(table)} registros):")
+            for name, info in list(table.group_by('fabricante', 'completude').items())[:5]:
+                print(f"   • {name or '(não identificado)'}: {info['count']} | completude média {info['mean']:.1f}%")
         
     except Exception as e:
         print(f"❌ Erro ao obter estatísticas: {e}")
 
 
+def parse_args(argv=None) -> argparse.Namespace:
+    """Lê argumentos da linha de comando"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--format', choices=['text', 'json'], default='text',
+                        help="Saída legível (text) ou resumo JSON no stdout (json)")
+    common.add_argument('--output-dir', type=Path, help="Diretório de saída (padrão: output/)")
+
+    parser = argparse.ArgumentParser(
+        description="Sistema OCR para Placas NR-13",
+        epilog="Sem subcomando, abre o menu interativo."
+    )
+    parser.add_argument(
+        '--profile', nargs='?', const='cprofile', choices=['cprofile', 'sample'],
+        help="Gera perfil de cada processamento em output/reports (padrão: cprofile)"
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='COMANDO')
+
+    process = subparsers.add_parser('process', parents=[common], help="Processa todas as imagens")
+    process.add_argument('--input-dir', type=Path, help="Diretório de entrada (padrão: input/)")
+    process.add_argument('--mode', choices=['auto', 'sync', 'batch', 'hybrid'], default='auto',
+                         help="Força o modo (padrão: pelo BATCH_THRESHOLD, ou hybrid com --deadline/--budget)")
+    process.add_argument('--deadline', type=float, metavar='SEGUNDOS',
+                         help="Prazo para o modo hybrid")
+    process.add_argument('--budget', type=float, help="Orçamento para o modo hybrid (moeda de PRICE_PER_IMAGE)")
+    process.add_argument('--plan-only', action='store_true',
+                         help="Mostra o plano sync/batch sem processar")
+    process.add_argument('-j', '--concurrency', type=int,
+                         help=f"Chamadas simultâneas (threads) ou processos no modo sync "
+                              f"(padrão: {settings.MAX_CONCURRENCY} threads / POOL_WORKERS processos)")
+    process.add_argument('--executor', choices=['thread', 'process'],
+                         help=f"Executor do modo sync (padrão: {settings.EXECUTOR})")
+    process.add_argument('--include-results', action='store_true',
+                         help="Inclui os resultados no JSON de saída")
+
+    process_one = subparsers.add_parser('process-one', parents=[common], help="Processa uma imagem")
+    process_one.add_argument('image', type=Path, help="Caminho da imagem")
+
+    subparsers.add_parser('validate', parents=[common], help="Valida JSONs processados")
+    subparsers.add_parser('stats', parents=[common], help="Estatísticas do sistema")
+
+    reports = subparsers.add_parser('reports', parents=[common], help="Resumo acumulado e tendências")
+    reports.add_argument('--period', choices=['daily', 'monthly'], default='daily')
+    reports.add_argument('--last', type=int, default=7, help="Quantidade de períodos (padrão: 7)")
+    reports.add_argument('--rebuild', action='store_true',
+                         help="Recria os agregados a partir dos JSONs em output/json")
+
+    events = subparsers.add_parser('events', parents=[common],
+                                   help="Vazão, latências e falhas a partir do log de eventos")
+    events.add_argument('--last', type=int, help="Analisa só as últimas N execuções")
+    events.add_argument('--since', metavar='AAAAMMDD', help="Só arquivos de eventos a partir desta data")
+
+    jobs = subparsers.add_parser('jobs', parents=[common], help="Histórico de jobs batch")
+    jobs.add_argument('--limit', type=int, default=10)
+
+    queue_common = argparse.ArgumentParser(add_help=False)
+    queue_common.add_argument('--queue', type=Path, help=f"Arquivo da fila (padrão: {settings.QUEUE_PATH})")
+
+    enqueue = subparsers.add_parser('enqueue', parents=[common, queue_common],
+                                    help="Enfileira imagens na fila compartilhada")
+    enqueue.add_argument('--input-dir', type=Path, help="Diretório de entrada (padrão: input/)")
+
+    worker = subparsers.add_parser('worker', parents=[common, queue_common],
+                                   help="Processa itens da fila compartilhada")
+    worker.add_argument('--worker-id', help="Identificador do worker (padrão: host:pid)")
+    worker.add_argument('--lease-size', type=int, help="Itens arrendados por vez")
+    worker.add_argument('--priority', choices=['bulk', 'background'], default='background',
+                        help="Classe no escalonador da API (padrão: background)")
+    worker.add_argument('--wait', type=float, default=0.0,
+                        help="Segundos aguardando novos itens antes de sair (padrão: sai com fila vazia)")
+    worker.add_argument('--include-results', action='store_true',
+                        help="Inclui os resultados no JSON de saída")
+
+    queue_stats = subparsers.add_parser('queue-stats', parents=[common, queue_common],
+                                        help="Situação da fila compartilhada")
+    queue_stats.add_argument('--requeue-dead', action='store_true',
+                             help="Devolve itens da fila morta para nova tentativa")
+    queue_stats.add_argument('--purge-done', action='store_true', help="Remove itens concluídos")
+
+    return parser.parse_args(argv)
+
+
+def emit_json(payload: dict):
+    """Escreve resumo JSON em uma linha no stdout"""
+    print(json.dumps(payload, ensure_ascii=False, default=str))
+
+
+def cmd_process(args) -> int:
+    """Subcomando process"""
+    from ocr.processor import OCRProcessor
+
+    # Prazo/orçamento só valem no modo hybrid; sync/batch os ignorariam em silêncio
+    if args.mode in ('sync', 'batch') and (args.deadline is not None or args.budget is not None):
+        message = f"--deadline/--budget exigem --mode hybrid (ou auto); recebido --mode {args.mode}"
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': 'process', 'error': message})
+        else:
+            print(f"❌ {message}")
+        return EXIT_USAGE
+
+    settings.validate()
+    processor = OCRProcessor()
+
+    # Com SCHEDULER_SLOTS fixo, -j acima dos slots não interativos seria limitado em silêncio
+    scheduler = processor.api.scheduler
+    if (scheduler.fixed and args.concurrency and (args.executor or settings.EXECUTOR) == 'thread'
+            and args.concurrency > scheduler.max_concurrency()):
+        message = (f"-j {args.concurrency} excede os {scheduler.max_concurrency()} slots da API "
+                   f"(SCHEDULER_SLOTS={settings.SCHEDULER_SLOTS}, {scheduler.reserved['interactive']} "
+                   f"reservado(s) para interactive)")
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': 'process', 'error': message})
+        else:
+            print(f"❌ {message}")
+        return EXIT_USAGE
+
+    input_dir = args.input_dir or settings.INPUT_DIR
+    if not processor.files.list_images(input_dir):
+        message = f"Nenhuma imagem encontrada em {input_dir}"
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': 'process', 'error': message})
+        else:
+            print(f"⚠️ {message}")
+        return EXIT_NO_INPUT
+
+    if args.plan_only:
+        total = len(processor.files.list_images(input_dir))
+        plan = processor.plan_hybrid(total, args.concurrency, args.deadline, args.budget)
+        if args.format == 'json':
+            emit_json({'ok': True, 'command': 'process', 'total_imagens': total, 'plano': plan.to_dict()})
+        else:
+            print_plan(plan.to_dict())
+        return EXIT_OK
+
+    summary = processor.process(input_dir=input_dir, mode=args.mode,
+                                concurrency=args.concurrency, executor=args.executor,
+                                deadline=args.deadline, budget=args.budget)
+
+    if 'error' in summary:
+        code = EXIT_ERROR
+    elif summary.get('erros', 0) and summary.get('sucesso', 0):
+        code = EXIT_PARTIAL
+    elif summary.get('erros', 0):
+        code = EXIT_ERROR
+    else:
+        code = EXIT_OK
+
+    if args.format == 'json':
+        if not args.include_results:
+            summary.pop('resultados', None)
+        emit_json({'ok': code == EXIT_OK, 'command': 'process', **summary})
+    elif 'error' in summary:
+        print(f"❌ {summary.get('message', 'Erro no processamento')}")
+    else:
+        print_summary(summary)
+        if 'plano' in summary:
+            print_plan(summary['plano'])
+        if 'perfil' in summary:
+            print_profile(summary['perfil'])
+
+    return code
+
+
+def print_plan(plan: dict):
+    """Mostra a divisão sync/batch escolhida pelo planejador"""
+    print("\n🧭 Plano híbrido:")
+    print(f"   • Sync: {plan['sync_count']} imagens (~{format_time(plan['sync_seconds'])})")
+    print(f"   • Batch: {plan['batch_count']} imagens (~{format_time(plan['batch_seconds'])})")
+    print(f"   • Estimativa: {format_time(plan['estimated_seconds'])} | custo ~{plan['estimated_cost']:.2f}")
+    if plan['deadline'] is not None:
+        print(f"   • Prazo: {format_time(plan['deadline'])}")
+    if plan['budget'] is not None:
+        print(f"   • Orçamento: {plan['budget']:.2f}")
+    print(f"   {'⚠️ ' if plan['at_risk'] else '✅'} {plan['reason']}")
+
+
+def cmd_process_one(args) -> int:
+    """Subcomando process-one"""
+    if not args.image.exists():
+        message = f"Arquivo não encontrado: {args.image}"
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': 'process-one', 'error': message})
+        else:
+            print(f"❌ {message}")
+        return EXIT_NO_INPUT
+
+    from ocr.processor import OCRProcessor
+
+    settings.validate()
+    result = OCRProcessor().process_single(args.image)
+
+    if args.format == 'json':
+        emit_json({'ok': bool(result.get('success')), 'command': 'process-one',
+                   'image': str(args.image), **result})
+    else:
+        show_single_result(result)
+
+    return EXIT_OK if result.get('success') else EXIT_ERROR
+
+
+def cmd_validate(args) -> int:
+    """Subcomando validate"""
+    report = collect_validation()
+
+    if args.format == 'json':
+        emit_json({'ok': report['total'] > 0 and report['validos'] == report['total'],
+                   'command': 'validate', **report})
+    else:
+        validate_jsons(report)
+
+    if not report['total']:
+        return EXIT_NO_INPUT
+    if report['erros']:
+        return EXIT_ERROR
+    return EXIT_PARTIAL if report['incompletos'] else EXIT_OK
+
+
+def cmd_stats(args) -> int:
+    """Subcomando stats"""
+    from ocr.processor import OCRProcessor
+
+    processor = OCRProcessor()
+
+    if args.format == 'json':
+        emit_json({'ok': True, 'command': 'stats', **processor.get_stats()})
+    else:
+        show_statistics(processor)
+    return EXIT_OK
+
+
+def cmd_reports(args) -> int:
+    """Subcomando reports"""
+    aggregates = load_aggregates()
+    if args.rebuild:
+        count = aggregates.rebuild_from_store(settings.OUTPUT_JSON)
+        logger.info(f"Agregados recriados a partir de {count} JSONs")
+
+    if args.format == 'json':
+        emit_json({'ok': True, 'command': 'reports', 'total': aggregates.report(),
+                   'periodo': args.period, 'tendencia': aggregates.trend(args.period, args.last)})
+    else:
+        show_reports(args.period, args.last, aggregates)
+    return EXIT_OK
+
+
+def cmd_events(args) -> int:
+    """Subcomando events"""
+    from ocr.events import analyze_events, read_events
+
+    analysis = analyze_events(read_events(settings.OUTPUT_REPORTS, args.since), last_runs=args.last)
+    if args.format == 'json':
+        emit_json({'ok': True, 'command': 'events', **analysis})
+    else:
+        show_events(analysis)
+    return EXIT_OK if analysis['execucoes'] else EXIT_NO_INPUT
+
+
+def cmd_jobs(args) -> int:
+    """Subcomando jobs"""
+    if args.format == 'json':
+        from services import BatchManager
+
+        jobs = BatchManager().list_jobs(limit=args.limit)
+        emit_json({'ok': True, 'command': 'jobs', 'total': len(jobs), 'jobs': jobs})
+    else:
+        show_batch_history(args.limit)
+    return EXIT_OK
+
+
+def open_queue(args):
+    """Abre a fila compartilhada indicada em --queue ou QUEUE_PATH"""
+    from ocr.work_queue import SQLiteWorkQueue
+
+    return SQLiteWorkQueue(
+        args.queue or Path(settings.QUEUE_PATH),
+        visibility_timeout=settings.QUEUE_VISIBILITY_TIMEOUT,
+        max_attempts=settings.QUEUE_MAX_ATTEMPTS
+    )
+
+
+def cmd_enqueue(args) -> int:
+    """Subcomando enqueue"""
+    from ocr.processor import FileManager
+
+    input_dir = args.input_dir or settings.INPUT_DIR
+    images = FileManager().list_images(input_dir)
+    if not images:
+        message = f"Nenhuma imagem encontrada em {input_dir}"
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': 'enqueue', 'error': message})
+        else:
+            print(f"⚠️ {message}")
+        return EXIT_NO_INPUT
+
+    queue = open_queue(args)
+    added = queue.enqueue(images)
+    stats = queue.stats()
+
+    if args.format == 'json':
+        emit_json({'ok': True, 'command': 'enqueue', 'encontradas': len(images),
+                   'enfileiradas': added, 'fila': stats})
+    else:
+        print(f"📥 {added} de {len(images)} imagens enfileiradas em {queue.db_path}")
+        print(f"   Pendentes: {stats['pending']} | Em processamento: {stats['leased']} | "
+              f"Concluídas: {stats['done']} | Mortas: {stats['dead']}")
+    return EXIT_OK
+
+
+def cmd_worker(args) -> int:
+    """Subcomando worker"""
+    from ocr.processor import OCRProcessor
+
+    settings.validate()
+    processor = OCRProcessor()
+    summary = processor.process_queue(open_queue(args), worker_id=args.worker_id,
+                                      lease_size=args.lease_size, wait=args.wait,
+                                      priority=args.priority)
+
+    if summary['erros'] and summary['sucesso']:
+        code = EXIT_PARTIAL
+    elif summary['erros']:
+        code = EXIT_ERROR
+    elif not summary['total_imagens']:
+        code = EXIT_NO_INPUT
+    else:
+        code = EXIT_OK
+
+    if args.format == 'json':
+        if not args.include_results:
+            summary.pop('resultados', None)
+        emit_json({'ok': code == EXIT_OK, 'command': 'worker', **summary})
+    elif summary['total_imagens']:
+        print_summary(summary)
+    else:
+        print("📭 Nenhum item pronto na fila")
+
+    return code
+
+
+def cmd_queue_stats(args) -> int:
+    """Subcomando queue-stats"""
+    queue = open_queue(args)
+    requeued = queue.requeue_dead() if args.requeue_dead else 0
+    purged = queue.purge_done() if args.purge_done else 0
+    stats = queue.stats()
+    dead = queue.dead_items()
+
+    if args.format == 'json':
+        emit_json({'ok': True, 'command': 'queue-stats', 'fila': stats, 'mortos': dead,
+                   'reenfileirados': requeued, 'removidos': purged})
+        return EXIT_OK
+
+    print(f"📬 Fila: {queue.db_path}")
+    for status in ('pending', 'leased', 'done', 'dead'):
+        print(f"   {status:<8} {stats[status]}")
+    if requeued:
+        print(f"🔁 {requeued} itens da fila morta reenfileirados")
+    if purged:
+        print(f"🧹 {purged} itens concluídos removidos")
+    for item in dead[:10]:
+        print(f"   ❌ {Path(item['path']).name} ({item['attempts']} tentativas): {item['error']}")
+    return EXIT_OK
+
+
+COMMANDS = {
+    'process': cmd_process,
+    'process-one': cmd_process_one,
+    'validate': cmd_validate,
+    'stats': cmd_stats,
+    'reports': cmd_reports,
+    'events': cmd_events,
+    'jobs': cmd_jobs,
+    'enqueue': cmd_enqueue,
+    'worker': cmd_worker,
+    'queue-stats': cmd_queue_stats,
+}
+
+
+def run_command(args) -> int:
+    """Executa subcomando não interativo e retorna o código de saída"""
+    if args.format == 'json':
+        # stdout fica reservado para o resumo JSON
+        set_console_stream(sys.stderr)
+    if args.output_dir:
+        settings.set_output_dir(args.output_dir)
+
+    try:
+        return COMMANDS[args.command](args)
+    except ValueError as e:
+        logger.error(f"Erro de configuração: {e}")
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': args.command, 'error': str(e)})
+        else:
+            print(f"❌ Erro de configuração: {e}")
+        return EXIT_CONFIG
+    except ImportError as e:
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': args.command, 'error': str(e)})
+        else:
+            print_import_help(e)
+        return EXIT_CONFIG
+    except Exception as e:
+        logger.error(f"Erro executando {args.command}: {e}", exc_info=True)
+        if args.format == 'json':
+            emit_json({'ok': False, 'command': args.command, 'error': str(e)})
+        else:
+            print(f"❌ Erro: {e}")
+        return EXIT_ERROR
+
+
 def main():
     """Função principal"""
+    args = parse_args()
+    setup_logging()
+    if args.profile:
+        settings.PROFILE_MODE = args.profile
+
+    if args.command:
+        sys.exit(run_command(args))
+
     try:
         # Verificações iniciais
         print("🔍 Verificando estrutura do projeto...")
@@ -473,6 +951,7 @@ def main():
 
         # Inicializa processador
         print("🔍 Inicializando processador OCR...")
+        from ocr.processor import OCRProcessor
         processor = OCRProcessor()
         print("✅ Processador inicializado")
 
@@ -523,6 +1002,10 @@ def main():
                 print("\n⚠️ Opção inválida!")
                 input("\nPressione Enter para continuar...")
 
+    except ImportError as e:
+        print_import_help(e)
+        sys.exit(1)
+
     except KeyboardInterrupt:
         print("\n\n👋 Sistema interrompido pelo usuário")
         logger.info("Sistema interrompido pelo usuário")
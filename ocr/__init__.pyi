@@ -8,9 +8,15 @@ from pathlib import Path
 class OCRProcessor:
     """Processador OCR para placas NR-13"""
     
-    def __init__(self) -> None: ...
+    def __init__(self, pool_worker: bool = False) -> None: ...
+    
+    def process(self, input_dir: Optional[Path] = None, mode: str = 'auto',
+                concurrency: Optional[int] = None, executor: Optional[str] = None,
+                deadline: Optional[float] = None, budget: Optional[float] = None) -> Dict[str, Any]: ...
     
-    def process(self) -> Dict[str, Any]: ...
+    def process_queue(self, queue: Any, worker_id: Optional[str] = None,
+                      lease_size: Optional[int] = None, wait: float = 0.0,
+                      poll_interval: float = 2.0, priority: str = 'background') -> Dict[str, Any]: ...
     
     def process_single(self, image_path: Union[str, Path]) -> Dict[str, Any]: ...
     
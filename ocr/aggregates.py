@@ -0,0 +1,257 @@
+"""
+Agregados incrementais dos resultados
+
+Em vez de recalcular estatísticas sobre todos os resultados, cada
+resultado atualiza contadores (resultados, falhas, válidos, soma de
+completude, acertos por campo obrigatório, tempo por modo) no total e
+nos rollups diário e mensal. O estado é um JSON pequeno; um relatório
+sobre um ano de dados só lê esse arquivo.
+
+Vários processos podem gravar o mesmo estado (workers da fila): cada um
+acumula um delta em memória e, no flush, soma o delta ao arquivo sob um
+lock (arquivo .lock criado com O_EXCL).
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ocr.serialization import load_file
+from ocr.storage import write_json_atomic
+from ocr.validation import engine_for
+
+PERIODS = ('daily', 'monthly')
+_LOCK_TIMEOUT = 10.0
+_LOCK_STALE = 60.0
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {'resultados': 0, 'falhas': 0, 'validos': 0, 'completude_soma': 0.0,
+            'campos': {}, 'modos': {}}
+
+
+def _merge(target: Dict[str, Any], delta: Dict[str, Any]):
+    """Soma delta em target (recursivo; chaves *_max usam o máximo)"""
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        elif key.endswith('_max'):
+            target[key] = max(target.get(key, 0), value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def describe_bucket(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    """Taxas e médias de um bucket de contadores"""
+    results = bucket.get('resultados', 0)
+    attempts = results + bucket.get('falhas', 0)
+    modes = {}
+    for mode, info in bucket.get('modos', {}).items():
+        count = info.get('resultados', 0)
+        runs = info.get('execucoes', 0)
+        modes[mode] = {
+            'resultados': count,
+            'falhas': info.get('falhas', 0),
+            'tempo_medio': info.get('tempo_soma', 0.0) / count if count else 0.0,
+            'tempo_max': info.get('tempo_max', 0.0),
+            'execucoes': runs,
+            'imagens_por_s': (info.get('imagens_execucoes', 0) / info['execucao_soma']
+                              if info.get('execucao_soma') else 0.0)
+        }
+    return {
+        'resultados': results,
+        'falhas': bucket.get('falhas', 0),
+        'validos': bucket.get('validos', 0),
+        'taxa_sucesso': (results / attempts * 100) if attempts else 0.0,
+        'taxa_validos': (bucket.get('validos', 0) / results * 100) if results else 0.0,
+        'completude_media': bucket.get('completude_soma', 0.0) / results if results else 0.0,
+        'campos': {field: {'encontrados': hits, 'percentual': hits / results * 100 if results else 0.0}
+                   for field, hits in bucket.get('campos', {}).items()},
+        'modos': modes
+    }
+
+
+class _StateLock:
+    """Lock entre processos por arquivo criado com O_EXCL"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        deadline = time.monotonic() + _LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > _LOCK_STALE:
+                        self.path.unlink()  # dono morreu sem liberar
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Lock ocupado: {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class RunningAggregates:
+    """Contadores acumulados com rollups diário e mensal"""
+
+    def __init__(self, path: Path, required_fields: Optional[List[str]] = None,
+                 daily_retention: int = 400):
+        if required_fields is None:
+            from config.settings import settings
+            required_fields = settings.REQUIRED_FIELDS
+        self.path = Path(path)
+        self.engine = engine_for(required_fields)
+        self.daily_retention = daily_retention
+        self._lock = threading.Lock()
+        self._state = self._read()
+        self._delta = self._new_state()
+
+    @staticmethod
+    def _new_state() -> Dict[str, Any]:
+        return {'total': _empty_bucket(), 'daily': {}, 'monthly': {}}
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            state = load_file(self.path)
+            if isinstance(state, dict) and 'total' in state:
+                return state
+        except (OSError, ValueError):
+            pass
+        return self._new_state()
+
+    def _buckets(self, when: Optional[str]):
+        """Buckets do delta afetados por um evento em `when` (ISO) ou agora"""
+        day = (when or time.strftime('%Y-%m-%dT%H:%M:%S'))[:10]
+        return (self._delta['total'],
+                self._delta['daily'].setdefault(day, _empty_bucket()),
+                self._delta['monthly'].setdefault(day[:7], _empty_bucket()))
+
+    # Atualização
+
+    def add_result(self, record: Dict[str, Any], mode: str):
+        """Conta um resultado normalizado"""
+        mask = self.engine.mask(record)
+        found = [name for i, name in enumerate(self.engine.fields) if mask >> i & 1]
+        completeness = len(found) / len(self.engine.fields) * 100 if self.engine.fields else 0.0
+        meta = record.get('_metadata') or {}
+        seconds = float(meta.get('processing_time') or 0.0)
+
+        with self._lock:
+            for bucket in self._buckets(meta.get('processado_em')):
+                bucket['resultados'] += 1
+                bucket['validos'] += mask == self.engine.full_mask
+                bucket['completude_soma'] += completeness
+                fields = bucket['campos']
+                for name in found:
+                    fields[name] = fields.get(name, 0) + 1
+                stats = bucket['modos'].setdefault(mode, {})
+                stats['resultados'] = stats.get('resultados', 0) + 1
+                stats['tempo_soma'] = stats.get('tempo_soma', 0.0) + seconds
+                stats['tempo_max'] = max(stats.get('tempo_max', 0.0), seconds)
+
+    def add_failure(self, mode: str):
+        """Conta uma imagem que falhou"""
+        with self._lock:
+            for bucket in self._buckets(None):
+                bucket['falhas'] += 1
+                stats = bucket['modos'].setdefault(mode, {})
+                stats['falhas'] = stats.get('falhas', 0) + 1
+
+    def record_run(self, mode: str, images: int, seconds: float):
+        """Conta uma execução (duração total) do modo"""
+        with self._lock:
+            for bucket in self._buckets(None):
+                stats = bucket['modos'].setdefault(mode, {})
+                stats['execucoes'] = stats.get('execucoes', 0) + 1
+                stats['imagens_execucoes'] = stats.get('imagens_execucoes', 0) + images
+                stats['execucao_soma'] = stats.get('execucao_soma', 0.0) + seconds
+
+    def _write(self, state: Dict[str, Any]):
+        """Grava o estado (chamado com o lock de arquivo)"""
+        state['atualizado_em'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        write_json_atomic(state, self.path, pretty=False)
+
+    def flush(self):
+        """Soma o delta pendente ao arquivo de estado"""
+        with self._lock:
+            delta, self._delta = self._delta, self._new_state()
+        if not delta['daily'] and not delta['monthly']:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with _StateLock(self.path.with_suffix(self.path.suffix + '.lock')):
+                state = self._read()
+                _merge(state, delta)
+                if self.daily_retention:
+                    for day in sorted(state['daily'])[:-self.daily_retention]:
+                        del state['daily'][day]
+                self._write(state)
+        except Exception:
+            with self._lock:
+                _merge(self._delta, delta)  # tenta de novo no próximo flush
+            raise
+        with self._lock:
+            self._state = state
+
+    # Consulta
+
+    def _current(self) -> Dict[str, Any]:
+        """Estado gravado + delta ainda não gravado"""
+        with self._lock:
+            state = json.loads(json.dumps(self._state))
+            _merge(state, self._delta)
+        return state
+
+    def reload(self):
+        """Relê o arquivo (atualizações de outros processos)"""
+        state = self._read()
+        with self._lock:
+            self._state = state
+
+    def report(self) -> Dict[str, Any]:
+        """Resumo acumulado"""
+        state = self._current()
+        return {**describe_bucket(state['total']), 'atualizado_em': state.get('atualizado_em')}
+
+    def trend(self, period: str = 'daily', last: int = 30) -> List[Dict[str, Any]]:
+        """Últimos `last` períodos (daily: AAAA-MM-DD, monthly: AAAA-MM), do mais antigo ao mais recente"""
+        if period not in PERIODS:
+            raise ValueError(f"Período inválido: {period} (use {', '.join(PERIODS)})")
+        buckets = self._current()[period]
+        return [{'periodo': key, **describe_bucket(buckets[key])} for key in sorted(buckets)[-last:]]
+
+    def rebuild_from_store(self, json_dir: Path, pattern: str = "*_ocr.json") -> int:
+        """Recria o estado a partir dos JSONs do diretório de resultados (sem falhas/execuções)"""
+        with self._lock:
+            self._state = self._new_state()
+            self._delta = self._new_state()
+        count = 0
+        for json_file in Path(json_dir).glob(pattern):
+            try:
+                record = load_file(json_file)
+            except (OSError, ValueError):
+                continue
+            self.add_result(record, (record.get('_metadata') or {}).get('modo', 'sync'))
+            count += 1
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _StateLock(self.path.with_suffix(self.path.suffix + '.lock')):
+            with self._lock:
+                state, self._delta = self._delta, self._new_state()
+            self._write(state)
+        with self._lock:
+            self._state = state
+        return count
@@ -0,0 +1,211 @@
+"""
+Execução em segundo plano para a GUI
+
+O BackgroundRunner mantém um OCRProcessor e uma thread de trabalho que
+sobrevivem às reexecuções do script Streamlit (a GUI guarda o runner
+com st.cache_resource). Os jobs rodam um por vez, na ordem de envio.
+
+O processador publica um evento por imagem concluída (ver
+OCRProcessor.progress) em uma fila; poll() drena a fila para a lista de
+eventos do job e devolve só os eventos a partir do cursor informado,
+então cada sessão do navegador acompanha o progresso de forma
+incremental, inclusive depois de recarregar a página. Os tempos por
+estágio de cada job são somados a partir desses eventos. Só os
+`max_finished` jobs encerrados mais recentes ficam guardados.
+"""
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import get_logger
+
+JOB_KINDS = ('process', 'single')
+FINISHED = ('done', 'error', 'cancelled')
+
+
+@dataclass
+class BackgroundJob:
+    """Job enviado ao runner e seus eventos de progresso"""
+
+    job_id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str = 'queued'  # queued → running → done | error | cancelled
+    total: Optional[int] = None
+    done: int = 0
+    failed: int = 0
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    summary: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    dropped: int = 0  # eventos antigos descartados (índice do primeiro evento em `events`)
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)  # estágio → count/total/max (s)
+    future: Optional[Future] = field(default=None, repr=False)
+
+
+class BackgroundRunner:
+    """Fila de jobs OCR executados fora da thread da interface"""
+
+    def __init__(self, processor_factory: Callable[[], Any], max_events: int = 5000,
+                 max_finished: int = 20):
+        self.logger = get_logger(__name__)
+        self.processor = processor_factory()
+        self.processor.progress = self._on_progress
+        self.max_events = max_events
+        self.max_finished = max_finished
+        self.jobs: Dict[str, BackgroundJob] = {}
+        self._current: Optional[str] = None
+        self._events: 'queue.Queue[Tuple[str, Dict[str, Any]]]' = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ocr-background')
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # Envio e execução
+
+    def submit(self, kind: str = 'process', **params: Any) -> str:
+        """Enfileira um job (process: input_dir/mode/...; single: image_path) e devolve o id"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Tipo de job inválido: {kind} (use {', '.join(JOB_KINDS)})")
+        job = BackgroundJob(job_id=f"job-{next(self._ids)}-{int(time.time())}", kind=kind, params=params)
+        with self._lock:
+            self._prune()
+            self.jobs[job.job_id] = job
+        job.future = self._executor.submit(self._run, job)
+        return job.job_id
+
+    def _prune(self):
+        """Descarta os jobs encerrados mais antigos (eventos e resultados) além de max_finished"""
+        finished = sorted((job for job in self.jobs.values() if job.status in FINISHED),
+                          key=lambda job: job.finished_at or job.submitted_at)
+        for job in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self.jobs[job.job_id]
+
+    def _run(self, job: BackgroundJob):
+        job.status = 'running'
+        job.started_at = time.time()
+        self._current = job.job_id
+        self._events.put((job.job_id, {'evento': 'inicio', 'tipo': job.kind}))
+        try:
+            if job.kind == 'single':
+                job.total = 1
+                summary = self.processor.process_single(Path(job.params['image_path']))
+            else:
+                params = dict(job.params)
+                summary = self.processor.process(params.pop('input_dir', None), **params)
+            job.summary = summary
+            if summary.get('error') is True:
+                job.status, job.error = 'error', summary.get('message')
+            else:
+                job.status = 'done'
+        except Exception as e:
+            self.logger.error(f"Job {job.job_id} falhou: {e}")
+            job.status, job.error = 'error', str(e)
+        finally:
+            job.finished_at = time.time()
+            self._current = None
+            self._events.put((job.job_id, {'evento': 'fim', 'status': job.status, 'erro': job.error}))
+
+    def _on_progress(self, event: Dict[str, Any]):
+        """Callback do processador (chamado na thread de trabalho)"""
+        job_id = self._current
+        if job_id is not None:
+            self._events.put((job_id, event))
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancela um job que ainda não começou"""
+        job = self.jobs.get(job_id)
+        if job is None or job.future is None or not job.future.cancel():
+            return False
+        job.status = 'cancelled'
+        job.finished_at = time.time()
+        self._events.put((job.job_id, {'evento': 'fim', 'status': job.status, 'erro': None}))
+        return True
+
+    # Consulta
+
+    def _drain(self):
+        """Move eventos da fila para os jobs e atualiza os contadores"""
+        with self._lock:
+            while True:
+                try:
+                    job_id, event = self._events.get_nowait()
+                except queue.Empty:
+                    return
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                if event.get('evento') == 'imagem':
+                    job.done += 1
+                    job.failed += not event.get('sucesso')
+                    if event.get('total'):
+                        job.total = event['total']
+                    for stage, seconds in (event.get('estagios') or {}).items():
+                        info = job.stages.setdefault(stage, {'count': 0, 'total': 0.0, 'max': 0.0})
+                        info['count'] += 1
+                        info['total'] += seconds
+                        info['max'] = max(info['max'], seconds)
+                job.events.append(event)
+                overflow = len(job.events) - self.max_events
+                if overflow > 0:
+                    del job.events[:overflow]
+                    job.dropped += overflow
+
+    def poll(self, job_id: str, cursor: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Eventos do job a partir do cursor e o novo cursor"""
+        self._drain()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return [], cursor
+            start = max(cursor - job.dropped, 0)
+            events = job.events[start:]
+            return events, job.dropped + len(job.events)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Situação do job e tempos por estágio das imagens deste job"""
+        self._drain()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            stages = {stage: dict(info) for stage, info in job.stages.items()}
+        elapsed = ((job.finished_at or time.time()) - job.started_at) if job.started_at else 0.0
+        return {
+            'job_id': job.job_id,
+            'tipo': job.kind,
+            'status': job.status,
+            'total': job.total,
+            'concluidas': job.done,
+            'falhas': job.failed,
+            'progresso': min(job.done / job.total, 1.0) if job.total else (1.0 if job.status in FINISHED else 0.0),
+            'tempo': elapsed,
+            'imagens_por_s': job.done / elapsed if elapsed else 0.0,
+            'erro': job.error,
+            'estagios': stages
+        }
+
+    def summary(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Resumo devolvido pelo processador (após o fim do job)"""
+        job = self.jobs.get(job_id)
+        return job.summary if job else None
+
+    def latest(self) -> Optional[str]:
+        """Job mais recente (para reconectar após recarregar a página)"""
+        with self._lock:
+            if not self.jobs:
+                return None
+            return max(self.jobs.values(), key=lambda job: job.submitted_at).job_id
+
+    def busy(self) -> bool:
+        with self._lock:
+            return self._current is not None or any(job.status == 'queued' for job in self.jobs.values())
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,192 @@
+"""
+Log estruturado de eventos de execução
+
+Cada execução grava eventos JSON compactos (uma linha cada) em
+OUTPUT_REPORTS/eventos_AAAAMMDD.jsonl:
+- run_start: modo, imagens, executor/concorrência
+- image: arquivo, sucesso/erro, duração total e por estágio (encode,
+  api, normalize, validate), bytes enviados, tentativas na API
+- run_end: totais da execução
+
+Os eventos ficam em buffer e são gravados em bloco com O_APPEND (vários
+processos podem gravar o mesmo arquivo). analyze_events() lê os arquivos
+e calcula vazão, percentis de latência e falhas por tipo.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ocr.serialization import dumps, loads
+
+_PATTERN = "eventos_*.jsonl"
+
+
+class RunEventLog:
+    """Gravador de eventos de execução em JSONL"""
+
+    def __init__(self, directory: Path, enabled: bool = True, buffer_size: int = 256):
+        self.directory = Path(directory)
+        self.enabled = enabled
+        self.buffer_size = buffer_size
+        self._buffer: List[bytes] = []
+        self._lock = threading.Lock()
+
+    def path_for(self, day: Optional[str] = None) -> Path:
+        return self.directory / f"eventos_{day or time.strftime('%Y%m%d')}.jsonl"
+
+    def emit(self, event: str, run_id: Optional[str], **fields: Any):
+        """Acrescenta um evento ao buffer (grava quando o buffer enche)"""
+        if not self.enabled:
+            return
+        entry = {'ev': event, 'run': run_id, 'ts': round(time.time(), 3)}
+        entry.update((key, value) for key, value in fields.items() if value is not None)
+        line = dumps(entry, pretty=False)
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.buffer_size
+        if full:
+            self.flush()
+
+    def start_run(self, mode: str, images: int, **info: Any) -> str:
+        """Abre uma execução e devolve o id"""
+        run_id = uuid.uuid4().hex[:12]
+        self.emit('run_start', run_id, modo=mode, imagens=images, pid=os.getpid(), **info)
+        return run_id
+
+    def image(self, run_id: Optional[str], mode: str, name: str, result: Dict[str, Any]):
+        """Evento de uma imagem concluída (resultado de _process_single_image ou do batch)"""
+        ok = bool(result.get('success', 'data' in result))
+        stages = result.get('estagios')
+        self.emit('image', run_id, modo=mode, arquivo=name, ok=ok,
+                  erro=None if ok else str(result.get('error')),
+                  retryable=None if ok else result.get('retryable'),
+                  t=round(result['processing_time'], 4) if result.get('processing_time') is not None else None,
+                  estagios={stage: round(seconds, 4) for stage, seconds in stages.items()} if stages else None,
+                  bytes=result.get('bytes'), tentativas=result.get('tentativas'))
+
+    def end_run(self, run_id: Optional[str], summary: Dict[str, Any], seconds: float):
+        """Fecha a execução com os totais e grava o buffer"""
+        self.emit('run_end', run_id, modo=summary.get('modo'), imagens=summary.get('total_imagens'),
+                  sucesso=summary.get('sucesso'), erros=summary.get('erros'),
+                  segundos=round(seconds, 3), erro=summary.get('message') if summary.get('error') else None)
+        self.flush()
+
+    def flush(self):
+        """Grava o buffer no arquivo do dia (uma única escrita com O_APPEND)"""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        path = self.path_for()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, b'\n'.join(lines) + b'\n')
+        finally:
+            os.close(fd)
+
+
+def read_events(directory: Path, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Eventos dos arquivos do diretório (since: AAAAMMDD, inclusive)"""
+    for path in sorted(Path(directory).glob(_PATTERN)):
+        if since and path.stem.split('_')[-1] < since:
+            continue
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    yield loads(line)
+                except ValueError:
+                    continue  # linha parcial (processo interrompido)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    values = sorted(values)
+    last = len(values) - 1
+    result = {f'p{q}': values[min(last, int(round(q / 100 * last)))] for q in (50, 95, 99)}
+    result['max'] = values[-1]
+    return result
+
+
+def _error_kind(message: str) -> str:
+    """Tipo da falha: prefixo da mensagem, sem detalhes variáveis"""
+    kind = message.split(':', 1)[0].strip()
+    return kind[:60] or 'desconhecido'
+
+
+def analyze_events(events: Iterable[Dict[str, Any]], last_runs: Optional[int] = None) -> Dict[str, Any]:
+    """Vazão, latência (p50/p95/p99) total e por estágio e falhas por tipo"""
+    runs: Dict[str, Dict[str, Any]] = {}
+    images: Dict[str, List[Dict[str, Any]]] = {}
+    for event in events:
+        run_id = event.get('run')
+        kind = event.get('ev')
+        if kind == 'run_start':
+            runs.setdefault(run_id, {}).update(inicio=event['ts'], modo=event.get('modo'))
+        elif kind == 'run_end':
+            runs.setdefault(run_id, {}).update(fim=event['ts'], segundos=event.get('segundos'),
+                                               modo=event.get('modo') or runs.get(run_id, {}).get('modo'))
+        elif kind == 'image':
+            images.setdefault(run_id, []).append(event)
+
+    selected = sorted(runs, key=lambda run_id: runs[run_id].get('inicio') or runs[run_id].get('fim') or 0)
+    if last_runs:
+        selected = selected[-last_runs:]
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    failures: Counter = Counter()
+    per_mode: Dict[str, Dict[str, Any]] = {}
+    total_images = succeeded = retries = sent = 0
+    busy_seconds = 0.0
+    run_rows = []
+
+    for run_id in selected:
+        info = runs[run_id]
+        run_images = images.get(run_id, [])
+        ok = sum(1 for event in run_images if event.get('ok'))
+        seconds = info.get('segundos') or ((info['fim'] - info['inicio']) if 'fim' in info and 'inicio' in info else 0.0)
+        total_images += len(run_images)
+        succeeded += ok
+        busy_seconds += seconds
+        mode = per_mode.setdefault(info.get('modo') or '?', {'execucoes': 0, 'imagens': 0, 'segundos': 0.0})
+        mode['execucoes'] += 1
+        mode['imagens'] += len(run_images)
+        mode['segundos'] += seconds
+        for event in run_images:
+            if event.get('t') is not None:
+                latencies.append(event['t'])
+            for stage, value in (event.get('estagios') or {}).items():
+                stages.setdefault(stage, []).append(value)
+            retries += max(0, (event.get('tentativas') or 1) - 1)
+            sent += event.get('bytes') or 0
+            if not event.get('ok'):
+                failures[_error_kind(event.get('erro') or '')] += 1
+        run_rows.append({'run': run_id, 'modo': info.get('modo'), 'inicio': info.get('inicio'),
+                         'imagens': len(run_images), 'sucesso': ok, 'segundos': seconds,
+                         'imagens_por_s': len(run_images) / seconds if seconds else 0.0,
+                         'concluida': 'fim' in info})
+
+    for mode in per_mode.values():
+        mode['imagens_por_s'] = mode['imagens'] / mode['segundos'] if mode['segundos'] else 0.0
+
+    return {
+        'execucoes': len(selected),
+        'imagens': total_images,
+        'sucesso': succeeded,
+        'falhas': total_images - succeeded,
+        'taxa_sucesso': succeeded / total_images * 100 if total_images else 0.0,
+        'imagens_por_s': total_images / busy_seconds if busy_seconds else 0.0,
+        'latencia': _percentiles(latencies),
+        'estagios': {stage: _percentiles(values) for stage, values in sorted(stages.items())},
+        'retries': retries,
+        'bytes_enviados': sent,
+        'falhas_por_tipo': dict(failures.most_common()),
+        'modos': per_mode,
+        'ultimas_execucoes': run_rows[-10:]
+    }
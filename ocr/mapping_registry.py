@@ -0,0 +1,215 @@
+"""
+Registro dos mapeamentos de campos com recarga a quente
+
+O field_mappings.yaml é carregado em um MappingSnapshot imutável:
+mapeamentos, regras de valor (ocr.value_rules) e índices pré-calculados
+(alias limpo → campo, regex compiladas, aliases para o match fuzzy).
+
+MappingRegistry.current() devolve o snapshot atual. No máximo a cada
+MAPPINGS_RELOAD_INTERVAL_S segundos ele compara mtime/tamanho do arquivo
+(um os.stat); se mudou, uma thread reconstrói o snapshot fora do caminho
+quente e troca a referência de uma vez. Quem já pegou um snapshot
+continua com ele até o fim do uso: o normalizador pega um por chamada de
+normalize(), então cada placa é normalizada com uma única versão.
+
+Cada processo (inclusive os workers do pool) tem o seu registro e
+detecta a mudança pelo mesmo arquivo; o hash do conteúdo identifica a
+versão entre processos. YAML inválido mantém a versão anterior.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ocr.value_rules import ValueRule, compile_value_rules
+from utils import get_logger
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+
+
+def clean_text(text: Any) -> str:
+    """Texto em minúsculas, sem pontuação e com espaços normalizados (chaves e aliases)"""
+    if not isinstance(text, str):
+        text = str(text)
+    return _SPACES.sub(' ', _PUNCTUATION.sub(' ', text.lower())).strip()
+
+
+@dataclass(frozen=True)
+class MappingSnapshot:
+    """Versão imutável dos mapeamentos e dos índices compilados"""
+
+    version: int
+    digest: str  # sha1 do conteúdo (igual em todos os processos)
+    stamp: Optional[Tuple[int, int]]  # (mtime_ns, tamanho) do arquivo lido
+    mappings: Dict[str, Any] = field(default_factory=dict)
+    value_rules: Dict[str, ValueRule] = field(default_factory=dict)
+    aliases: Dict[str, str] = field(default_factory=dict)  # alias limpo → campo (primeiro na ordem do YAML)
+    patterns: Tuple[Tuple[str, Any], ...] = ()  # (campo, regex compilada)
+    fuzzy_aliases: Tuple[Tuple[str, str], ...] = ()  # (campo, alias limpo)
+    loaded_at: float = 0.0
+
+
+def build_snapshot(mappings: Dict[str, Any], version: int = 0, digest: str = '',
+                   stamp: Optional[Tuple[int, int]] = None,
+                   on_error: Optional[Callable[[str], None]] = None) -> MappingSnapshot:
+    """Compila os índices e as regras de valor de um dicionário de mapeamentos"""
+    aliases: Dict[str, str] = {}
+    patterns = []
+    fuzzy_aliases = []
+    for field_name, config in mappings.items():
+        if not isinstance(config, dict):
+            continue
+        for alias in config.get('aliases') or []:
+            clean_alias = clean_text(alias)
+            aliases.setdefault(clean_alias, field_name)
+            fuzzy_aliases.append((field_name, clean_alias))
+        for pattern in config.get('regex') or []:
+            try:
+                patterns.append((field_name, re.compile(pattern, re.IGNORECASE)))
+            except re.error as e:
+                if on_error:
+                    on_error(f"Regex inválida em {field_name}: {pattern} ({e})")
+
+    return MappingSnapshot(
+        version=version,
+        digest=digest,
+        stamp=stamp,
+        mappings=mappings,
+        value_rules=compile_value_rules(mappings, on_error=on_error),
+        aliases=aliases,
+        patterns=tuple(patterns),
+        fuzzy_aliases=tuple(fuzzy_aliases),
+        loaded_at=time.time()
+    )
+
+
+class MappingRegistry:
+    """Snapshot atual do field_mappings.yaml, recarregado quando o arquivo muda"""
+
+    def __init__(self, path: Path, interval: float = 2.0,
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.path = Path(path)
+        self.interval = interval  # segundos entre verificações (0 = sem recarga)
+        self.on_error = on_error
+        self.reloads = 0
+        self.failures = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._failed_stamp: Optional[Tuple[int, int]] = None
+        self._next_check = time.monotonic() + interval
+
+        stamp = self._stat()
+        try:
+            self._snapshot = self._load(stamp, version=1)
+        except Exception as e:
+            self._warn(f"Não foi possível carregar mapeamentos: {e}")
+            self._failed_stamp = stamp
+            self._snapshot = build_snapshot({}, stamp=stamp)
+
+    def current(self) -> MappingSnapshot:
+        """Snapshot em uso; dispara a verificação do arquivo quando o intervalo vence"""
+        if self.interval > 0 and time.monotonic() >= self._next_check:
+            self.check()
+        return self._snapshot
+
+    def check(self, wait: bool = False) -> bool:
+        """
+        Compara mtime/tamanho do arquivo com o snapshot atual
+
+        Se mudou, reconstrói em uma thread (ou na chamada, com wait=True).
+        Retorna True se uma recarga foi iniciada.
+        """
+        with self._lock:
+            self._next_check = time.monotonic() + self.interval
+            if self._reloading:
+                return False
+            stamp = self._stat()
+            if stamp == self._snapshot.stamp or stamp == self._failed_stamp:
+                return False
+            self._reloading = True
+
+        if wait:
+            self._reload(stamp)
+        else:
+            threading.Thread(target=self._reload, args=(stamp,), name='mappings-reload', daemon=True).start()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version,
+            'digest': snapshot.digest,
+            'loaded_at': snapshot.loaded_at,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'interval': self.interval
+        }
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def _load(self, stamp: Optional[Tuple[int, int]], version: int) -> MappingSnapshot:
+        """Lê e compila o arquivo (chamado fora do caminho quente)"""
+        import yaml
+
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        mappings = yaml.safe_load(raw) or {}
+        if not isinstance(mappings, dict):
+            raise ValueError("o arquivo deve conter um mapeamento campo → configuração")
+        return build_snapshot(mappings, version=version, digest=hashlib.sha1(raw).hexdigest()[:12],
+                              stamp=stamp, on_error=self._warn)
+
+    def _reload(self, stamp: Optional[Tuple[int, int]]):
+        try:
+            current = self._snapshot
+            snapshot = self._load(stamp, version=current.version + 1)
+            if snapshot.digest == current.digest:
+                # Só o mtime mudou (touch, cópia idêntica): mesma versão
+                snapshot = replace(current, stamp=stamp)
+            else:
+                self.reloads += 1
+            self._snapshot = snapshot  # troca atômica (atribuição de referência)
+            self._failed_stamp = None
+        except Exception as e:
+            self.failures += 1
+            self._failed_stamp = stamp
+            self._warn(f"Mapeamentos não recarregados (mantida a versão {self._snapshot.version}): {e}")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    def _warn(self, message: str):
+        if self.on_error:
+            self.on_error(message)
+
+
+_registries: Dict[str, MappingRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path: Optional[Path] = None) -> MappingRegistry:
+    """Registro único do processo por arquivo (compartilhado por todos os normalizadores)"""
+    from config.settings import settings
+
+    path = Path(path or settings.CONFIG_DIR / "field_mappings.yaml")
+    key = str(path.resolve())
+    with _registries_lock:
+        registry = _registries.get(key)
+        # Processo filho (fork) recria o registro: lock e thread de recarga não são herdados
+        if registry is None or registry._pid != os.getpid():
+            # Avisos pelo logging (stderr/arquivo): o stdout de --format json leva só o resumo
+            registry = MappingRegistry(path, settings.MAPPINGS_RELOAD_INTERVAL_S,
+                                       on_error=get_logger(__name__).warning)
+            _registries[key] = registry
+        return registry
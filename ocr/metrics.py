@@ -0,0 +1,237 @@
+"""
+Instrumentação leve do pipeline OCR
+
+Timers por estágio (encode, api, normalize, validate, write), contadores
+e histogramas agregados em processo. Exporta em formato texto do
+Prometheus (arquivo ou endpoint HTTP). Quando desativado, todas as
+operações retornam imediatamente.
+"""
+import bisect
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+# Limites dos buckets (segundos)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Histograma cumulativo com buckets fixos"""
+
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # último = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimativa do quantil por interpolação dentro do bucket"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+
+class _Timer:
+    """Context manager que registra a duração de um estágio (e a copia em `sink`, se houver)"""
+
+    __slots__ = ('registry', 'stage', 'sink', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str,
+                 sink: Optional[Dict[str, float]] = None):
+        self.registry = registry
+        self.stage = stage
+        self.sink = sink
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if self.sink is not None:
+            self.sink[self.stage] = elapsed
+        self.registry.observe(self.stage, elapsed)
+        return False
+
+
+class _NullTimer:
+    """Timer sem efeito (métricas desativadas)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Registro de contadores e histogramas por estágio"""
+
+    def __init__(self, enabled: bool = True, namespace: str = "nr13_ocr"):
+        self.enabled = enabled
+        self.namespace = namespace
+        self.counters: Dict[str, float] = {}
+        self.stages: Dict[str, Histogram] = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def timer(self, stage: str, sink: Optional[Dict[str, float]] = None):
+        """Mede o bloco e registra no histograma do estágio; `sink` recebe a duração (por imagem)"""
+        if not self.enabled and sink is None:
+            return _NULL_TIMER
+        return _Timer(self, stage, sink)
+
+    def observe(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def export_state(self, reset: bool = False) -> Dict[str, Any]:
+        """Estado bruto (contadores e buckets) para agregar em outro processo"""
+        with self._lock:
+            state = {
+                'counters': dict(self.counters),
+                'stages': {stage: (list(h.counts), h.total, h.count) for stage, h in self.stages.items()}
+            }
+            if reset:
+                self.counters.clear()
+                self.stages.clear()
+        return state
+
+    def merge(self, state: Dict[str, Any]):
+        """Soma o estado exportado por outro registro (ex.: worker do pool de processos)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, value in state['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for stage, (counts, total, count) in state['stages'].items():
+                histogram = self.stages.get(stage)
+                if histogram is None:
+                    histogram = self.stages[stage] = Histogram()
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.total += total
+                histogram.count += count
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.stages.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado agregado (segundos) para get_stats()"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'uptime': time.time() - self.started_at,
+                'counters': dict(self.counters),
+                'stages': {stage: h.to_dict() for stage, h in self.stages.items()}
+            }
+
+    def to_prometheus(self) -> str:
+        """Serializa no formato texto de exposição do Prometheus"""
+        ns = self.namespace
+        lines = []
+
+        with self._lock:
+            for name in sorted(self.counters):
+                lines.append(f"# TYPE {ns}_{name} counter")
+                lines.append(f"{ns}_{name} {self.counters[name]}")
+
+            if self.stages:
+                lines.append(f"# HELP {ns}_stage_seconds Duração de cada estágio do pipeline")
+                lines.append(f"# TYPE {ns}_stage_seconds histogram")
+            for stage in sorted(self.stages):
+                histogram = self.stages[stage]
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{ns}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{ns}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{ns}_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{ns}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: Path) -> bool:
+        """Grava métricas em arquivo (textfile collector do node_exporter)"""
+        if not self.enabled:
+            return False
+        from ocr.storage import atomic_write
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, self.to_prometheus().encode('utf-8'))
+        return True
+
+    def serve(self, port: int, host: str = "0.0.0.0"):
+        """Expõe GET /metrics em thread daemon"""
+        if self._server is not None:
+            return self._server
+
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
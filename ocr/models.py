@@ -1,58 +1,117 @@
 """
 Modelos de dados do sistema NR13 OCR
 """
-from dataclasses import dataclass, asdict, field
-from typing import Optional, Dict, Any, List
+import sys
+from dataclasses import dataclass, asdict, field, fields
 from datetime import datetime
+from operator import attrgetter
+from typing import Optional, Dict, Any, List
 
 
-@dataclass
-class PlacaNR13:
-    """Modelo de dados para placa NR-13"""
-
+# Campos da placa, na ordem de exibição/serialização
+PLACA_FIELDS = (
     # Identificação
-    identificacao: Optional[str] = None
-    tag: Optional[str] = None
-    numero_serie: Optional[str] = None
-    numero_ordem: Optional[str] = None
-
+    'identificacao', 'tag', 'numero_serie', 'numero_ordem',
     # Fabricação
-    fabricante: Optional[str] = None
-    ano_fabricacao: Optional[str] = None
-    tipo: Optional[str] = None
-    modelo: Optional[str] = None
-
+    'fabricante', 'ano_fabricacao', 'tipo', 'modelo',
     # Pressões
-    pressao_maxima_trabalho: Optional[str] = None
-    pressao_teste_hidrostatico: Optional[str] = None
-    pressao_operacao: Optional[str] = None
-
+    'pressao_maxima_trabalho', 'pressao_teste_hidrostatico', 'pressao_operacao',
     # Capacidades e Dimensões
-    capacidade_producao_vapor: Optional[str] = None
-    area_superficie_aquecimento: Optional[str] = None
-    volume: Optional[str] = None
-
+    'capacidade_producao_vapor', 'area_superficie_aquecimento', 'volume',
     # Materiais
-    material_casco: Optional[str] = None
-    material_espelhos: Optional[str] = None
-    tipo_combustivel: Optional[str] = None
-
+    'material_casco', 'material_espelhos', 'tipo_combustivel',
     # Normas e Códigos
-    codigo_projeto: Optional[str] = None
-    categoria: Optional[str] = None
-    norma_fabricacao: Optional[str] = None
-
+    'codigo_projeto', 'categoria', 'norma_fabricacao',
     # Inspeção
-    empresa_inspecao: Optional[str] = None
-    data_ultima_inspecao: Optional[str] = None
-    proxima_inspecao: Optional[str] = None
+    'empresa_inspecao', 'data_ultima_inspecao', 'proxima_inspecao',
+)
+
+# Poucos valores distintos: registros iguais compartilham a mesma string
+_INTERNED_FIELDS = frozenset({
+    'fabricante', 'tipo', 'modelo', 'categoria', 'material_casco', 'material_espelhos',
+    'tipo_combustivel', 'codigo_projeto', 'norma_fabricacao', 'empresa_inspecao',
+})
 
-    # Campos adicionais
-    outros_dados: Dict[str, Any] = field(default_factory=dict)
+_KNOWN_KEYS = frozenset(PLACA_FIELDS + ('outros_dados', '_metadata', '_raw_extraction'))
+_placa_values = attrgetter(*PLACA_FIELDS)
+
+
+class PlacaNR13:
+    """
+    Modelo de dados para placa NR-13
+
+    Registro compacto: atributos em __slots__ e os dicionários
+    (outros_dados, _metadata, _raw_extraction) só são criados quando
+    acessados. to_dict/from_dict copiam apenas o primeiro nível.
+    """
+
+    __slots__ = PLACA_FIELDS + ('_outros', '_meta', '_raw', '_extra')
+
+    def __init__(self, outros_dados: Optional[Dict[str, Any]] = None,
+                 _metadata: Optional[Dict[str, Any]] = None,
+                 _raw_extraction: Optional[Dict[str, Any]] = None, **fields: Optional[str]):
+        for name in PLACA_FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Campos desconhecidos para PlacaNR13: {', '.join(fields)}")
+        self._outros = outros_dados
+        self._meta = _metadata
+        self._raw = _raw_extraction
+        self._extra = None
+
+    # Dicionários materializados sob demanda
+
+    @property
+    def outros_dados(self) -> Dict[str, Any]:
+        if self._outros is None:
+            self._outros = {}
+        return self._outros
+
+    @outros_dados.setter
+    def outros_dados(self, value: Dict[str, Any]):
+        self._outros = value
+
+    @property
+    def _metadata(self) -> Dict[str, Any]:
+        if self._meta is None:
+            self._meta = {}
+        return self._meta
+
+    @_metadata.setter
+    def _metadata(self, value: Dict[str, Any]):
+        self._meta = value
+
+    @property
+    def _raw_extraction(self) -> Dict[str, Any]:
+        if self._raw is None:
+            self._raw = {}
+        return self._raw
+
+    @_raw_extraction.setter
+    def _raw_extraction(self, value: Dict[str, Any]):
+        self._raw = value
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PlacaNR13':
+        """
+        Cria a placa a partir de um resultado normalizado
 
-    # Metadados (não fazem parte da placa)
-    _metadata: Dict[str, Any] = field(default_factory=dict)
-    _raw_extraction: Dict[str, Any] = field(default_factory=dict)
+        Os dicionários aninhados são referenciados, não copiados; chaves
+        desconhecidas são preservadas e voltam em to_dict().
+        """
+        record = cls.__new__(cls)
+        get = data.get
+        for name in PLACA_FIELDS:
+            value = get(name)
+            if value.__class__ is str and name in _INTERNED_FIELDS:
+                value = sys.intern(value)
+            setattr(record, name, value)
+        record._outros = get('outros_dados') or None
+        record._meta = get('_metadata') or None
+        record._raw = get('_raw_extraction') or None
+        extra = {key: value for key, value in data.items() if key not in _KNOWN_KEYS}
+        record._extra = extra or None
+        return record
 
     def to_dict(self, include_metadata: bool = True) -> Dict:
         """
@@ -64,17 +123,26 @@ class PlacaNR13:
         Returns:
             Dicionário com os dados
         """
-        data = asdict(self)
-
-        # Remove campos None
-        data = {k: v for k, v in data.items() if v is not None}
+        data = {name: value for name, value in zip(PLACA_FIELDS, _placa_values(self)) if value is not None}
+        data['outros_dados'] = dict(self._outros) if self._outros else {}
+
+        if include_metadata:
+            data['_metadata'] = dict(self._meta) if self._meta else {}
+            data['_raw_extraction'] = dict(self._raw) if self._raw else {}
+        if self._extra:
+            data.update((key, value) for key, value in self._extra.items()
+                        if include_metadata or not key.startswith('_'))
+        return data
 
-        # Remove metadados se solicitado
-        if not include_metadata:
-            data.pop('_metadata', None)
-            data.pop('_raw_extraction', None)
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
 
-        return data
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={value!r}" for name, value in zip(PLACA_FIELDS, _placa_values(self))
+                           if value is not None)
+        return f"PlacaNR13({fields})"
 
     def validate_nr13(self) -> Dict[str, Any]:
         """
@@ -84,18 +152,9 @@ class PlacaNR13:
             Dicionário com resultado da validação
         """
         from config.settings import settings
+        from ocr.validation import engine_for
 
-        required_fields = settings.REQUIRED_FIELDS
-        found = [f for f in required_fields if getattr(self, f, None)]
-        missing = [f for f in required_fields if not getattr(self, f, None)]
-
-        return {
-            'valid': len(missing) == 0,
-            'completeness': (len(found) / len(required_fields) * 100) if required_fields else 0,
-            'found': found,
-            'missing': missing,
-            'total_required': len(required_fields)
-        }
+        return engine_for(settings.REQUIRED_FIELDS).validate(self)
 
     def get_summary(self) -> Dict[str, str]:
         """Retorna resumo dos campos principais"""
@@ -147,21 +206,48 @@ class BatchJob:
         self.updated_at = datetime.now().isoformat()
 
 
-@dataclass
 class ProcessingResult:
-    """Resultado de processamento de uma imagem"""
-
-    success: bool
-    data: Optional[Dict] = None
-    error: Optional[str] = None
-    image_path: Optional[str] = None
-    processing_time: Optional[float] = None
-    mode: str = "sync"  # sync ou batch
-    validation: Optional[Dict] = None
+    """Resultado de processamento de uma imagem (registro compacto com __slots__)"""
+
+    __slots__ = ('success', 'data', 'error', 'image_path', 'processing_time', 'mode', 'validation')
+
+    def __init__(self, success: bool, data: Optional[Dict] = None, error: Optional[str] = None,
+                 image_path: Optional[str] = None, processing_time: Optional[float] = None,
+                 mode: str = "sync", validation: Optional[Dict] = None):
+        self.success = success
+        self.data = data
+        self.error = error
+        self.image_path = image_path
+        self.processing_time = processing_time
+        self.mode = mode  # sync ou batch
+        self.validation = validation
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProcessingResult':
+        """Cria o resultado a partir de to_dict()"""
+        return cls(data['success'], data.get('data'), data.get('error'), data.get('image_path'),
+                   data.get('processing_time'), data.get('mode', 'sync'), data.get('validation'))
 
     def to_dict(self) -> Dict:
-        """Converte para dicionário"""
-        return asdict(self)
+        """Converte para dicionário (cópia rasa de data/validation)"""
+        return {
+            'success': self.success,
+            'data': dict(self.data) if self.data is not None else None,
+            'error': self.error,
+            'image_path': self.image_path,
+            'processing_time': self.processing_time,
+            'mode': self.mode,
+            'validation': dict(self.validation) if self.validation is not None else None
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (f"ProcessingResult(success={self.success!r}, image_path={self.image_path!r}, "
+                f"mode={self.mode!r}, error={self.error!r})")
 
     def get_filename(self) -> str:
         """Retorna nome do arquivo da imagem"""
@@ -187,8 +273,7 @@ class ProcessingSummary:
 
     def to_dict(self) -> Dict:
         """Converte para dicionário"""
-        data = asdict(self)
-        # Converte results para dict também
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name != 'results'}
         data['results'] = [r.to_dict() for r in self.results]
         return data
 
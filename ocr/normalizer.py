@@ -2,39 +2,99 @@
 Sistema de normalização de campos para placas NR-13
 """
 import re
-import yaml
-import json
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from difflib import SequenceMatcher
 from config.settings import settings
+from ocr.mapping_registry import MappingSnapshot, clean_text, get_registry
+from ocr.serialization import load_file
+from ocr.storage import write_json_atomic
+
+# Inferência por conteúdo em uma varredura: o valor é quebrado em tokens
+# de letras (com "/x" e expoente opcionais: "kgf/cm²", "t/h", "m3") e cada
+# token é procurado na tabela de unidades. Unidades só casam como token
+# inteiro: "500 l" é volume, "Steel" não; "kgf/cm²" é pressão, não área.
+_UNIT_TOKEN = re.compile(r'[^\W\d_]+(?:\s*/\s*[^\W\d_]+)?[²³23]?')
+
+_UNIT_KINDS = {
+    token: kind
+    for kind, tokens in (
+        ('pressao', ('kgf', 'kgf/cm²', 'kgf/cm2', 'kg/cm', 'kg/cm²', 'kg/cm2',
+                     'bar', 'barg', 'bara', 'psi', 'psig', 'psia', 'kpa', 'mpa')),
+        ('vapor', ('kg/h', 't/h', 'ton/h')),
+        ('area', ('m²', 'm2')),
+        ('volume', ('m³', 'm3', 'l', 'lt', 'lts', 'litro', 'litros')),
+    )
+    for token in tokens
+}
+
+_YEAR = re.compile(r'(?:19|20)\d{2}')
+_CATEGORIES = frozenset({'i', 'ii', 'iii', 'iv', 'v', 'a', 'b', 'c', 'd', 'e'})
+_KIND_ANO = frozenset(('ano',))
+_KIND_CATEGORIA = frozenset(('categoria',))
+_NO_KINDS: frozenset = frozenset()
+
+# Tipo → campo, na ordem de prioridade (pressão depende da chave)
+_CONTENT_FIELDS = (
+    ('ano', 'ano_fabricacao'),
+    ('categoria', 'categoria'),
+    ('vapor', 'capacidade_producao_vapor'),
+    ('area', 'area_superficie_aquecimento'),
+    ('volume', 'volume'),
+)
+
+# Chave de uma pressão → campo, na ordem de prioridade
+_PRESSURE_KEY_PATTERN = re.compile(r'(?P<teste>test|hidro)|(?P<operacao>oper)|(?P<maxima>max|trab|pmta)',
+                                   re.IGNORECASE)
+_PRESSURE_FIELDS = (
+    ('teste', 'pressao_teste_hidrostatico'),
+    ('operacao', 'pressao_operacao'),
+    ('maxima', 'pressao_maxima_trabalho'),
+)
+
+
+def classify_content(value: Any) -> frozenset:
+    """Tipos de conteúdo do valor: ano, categoria (valor inteiro) ou pressao, vapor, area, volume"""
+    text = str(value).strip().lower()
+    if _YEAR.fullmatch(text):
+        return _KIND_ANO
+    if text in _CATEGORIES:
+        return _KIND_CATEGORIA
+    kinds = None
+    for token in _UNIT_TOKEN.findall(text):
+        kind = _UNIT_KINDS.get(token)
+        if kind is None and ' ' in token:  # "ton / h"
+            kind = _UNIT_KINDS.get(token.replace(' ', ''))
+        if kind is not None:
+            kinds = {kind} if kinds is None else kinds | {kind}
+    return frozenset(kinds) if kinds else _NO_KINDS
 
 
 class FieldNormalizer:
     """Normalizador inteligente de campos"""
 
     def __init__(self):
-        self.mappings = self._load_mappings()
+        # Mapeamentos, regras de valor e índices compilados (recarregados quando o YAML muda)
+        self.registry = get_registry()
         self.learned = self._load_learned()
         self.threshold = settings.SIMILARITY_THRESHOLD
 
-    def _load_mappings(self) -> Dict:
-        """Carrega mapeamentos do arquivo YAML"""
-        mapping_file = settings.CONFIG_DIR / "field_mappings.yaml"
-        try:
-            with open(mapping_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
-        except Exception as e:
-            print(f"Aviso: Não foi possível carregar mapeamentos: {e}")
-            return {}
+    @property
+    def mappings(self) -> Dict:
+        """Mapeamentos da versão atual do field_mappings.yaml"""
+        return self.registry.current().mappings
+
+    @property
+    def value_rules(self) -> Dict:
+        """Regras de valor por campo (normalize: no YAML) da versão atual"""
+        return self.registry.current().value_rules
 
     def _load_learned(self) -> Dict:
         """Carrega mapeamentos aprendidos"""
         learned_file = settings.DATA_DIR / "learned_mappings.json"
         if learned_file.exists():
             try:
-                with open(learned_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return load_file(learned_file)
             except Exception:
                 pass
         return {}
@@ -51,6 +111,8 @@ class FieldNormalizer:
         """
         normalized = {}
         unmatched = {}
+        # Uma versão dos mapeamentos para a placa inteira, mesmo se o YAML mudar no meio
+        snapshot = self.registry.current()
 
         for raw_key, value in raw_data.items():
             # Pula metadados
@@ -63,10 +125,10 @@ class FieldNormalizer:
                 continue
 
             # Tenta encontrar campo correspondente
-            field = self._find_field(raw_key, value)
+            field = self._find_field(raw_key, value, snapshot)
 
             if field:
-                normalized_value = self._normalize_value(field, value)
+                normalized_value = self._normalize_value(field, value, snapshot)
                 if normalized_value is not None:
                     normalized[field] = normalized_value
             else:
@@ -81,29 +143,33 @@ class FieldNormalizer:
 
         return normalized
 
-    def _find_field(self, raw_key: str, value: Any) -> Optional[str]:
+    def _find_field(self, raw_key: str, value: Any,
+                    snapshot: Optional[MappingSnapshot] = None) -> Optional[str]:
         """
         Encontra campo correspondente para uma chave bruta
 
         Args:
             raw_key: Chave original do OCR
             value: Valor do campo
+            snapshot: Versão dos mapeamentos (padrão: a atual)
 
         Returns:
             Nome do campo normalizado ou None
         """
+        snapshot = snapshot or self.registry.current()
+
         # 1. Match exato
-        field = self._exact_match(raw_key)
+        field = self._exact_match(raw_key, snapshot)
         if field:
             return field
 
         # 2. Match com regex
-        field = self._regex_match(raw_key)
+        field = self._regex_match(raw_key, snapshot)
         if field:
             return field
 
         # 3. Match por similaridade
-        field = self._fuzzy_match(raw_key)
+        field = self._fuzzy_match(raw_key, snapshot)
         if field:
             return field
 
@@ -117,13 +183,7 @@ class FieldNormalizer:
 
     def _clean_text(self, text: str) -> str:
         """Limpa texto para comparação"""
-        if not isinstance(text, str):
-            text = str(text)
-        
-        # Remove pontuação e normaliza espaços
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return clean_text(text)
 
     def _clean_field_name(self, field_name: str) -> str:
         """Limpa nome do campo para usar como chave"""
@@ -136,91 +196,59 @@ class FieldNormalizer:
         clean = re.sub(r'_+', '_', clean)
         return clean.strip('_')
 
-    def _exact_match(self, raw_key: str) -> Optional[str]:
-        """Match exato com aliases"""
-        clean_key = self._clean_text(raw_key)
+    def _exact_match(self, raw_key: str, snapshot: Optional[MappingSnapshot] = None) -> Optional[str]:
+        """Match exato com aliases (índice alias limpo → campo)"""
+        snapshot = snapshot or self.registry.current()
+        return snapshot.aliases.get(self._clean_text(raw_key))
 
-        for field_name, config in self.mappings.items():
-            if 'aliases' in config:
-                for alias in config['aliases']:
-                    if self._clean_text(alias) == clean_key:
-                        return field_name
-        return None
-
-    def _regex_match(self, raw_key: str) -> Optional[str]:
-        """Match usando regex patterns"""
+    def _regex_match(self, raw_key: str, snapshot: Optional[MappingSnapshot] = None) -> Optional[str]:
+        """Match usando regex patterns (compiladas no snapshot; inválidas já descartadas)"""
+        snapshot = snapshot or self.registry.current()
         clean_key = self._clean_text(raw_key)
 
-        for field_name, config in self.mappings.items():
-            if 'regex' in config:
-                for pattern in config['regex']:
-                    try:
-                        if re.search(pattern, clean_key, re.IGNORECASE):
-                            return field_name
-                    except re.error:
-                        # Ignora padrões regex inválidos
-                        continue
+        for field_name, pattern in snapshot.patterns:
+            if pattern.search(clean_key):
+                return field_name
         return None
 
-    def _fuzzy_match(self, raw_key: str) -> Optional[str]:
+    def _fuzzy_match(self, raw_key: str, snapshot: Optional[MappingSnapshot] = None) -> Optional[str]:
         """Match por similaridade de strings"""
+        snapshot = snapshot or self.registry.current()
         clean_key = self._clean_text(raw_key)
         best_match = None
         best_score = 0.0
 
-        for field_name, config in self.mappings.items():
-            if 'aliases' in config:
-                for alias in config['aliases']:
-                    try:
-                        score = SequenceMatcher(None, clean_key,
-                                              self._clean_text(alias)).ratio()
-                        if score > best_score and score >= self.threshold:
-                            best_score = score
-                            best_match = field_name
-                    except Exception:
-                        # Ignora erros de comparação
-                        continue
+        for field_name, alias in snapshot.fuzzy_aliases:
+            try:
+                score = SequenceMatcher(None, clean_key, alias).ratio()
+                if score > best_score and score >= self.threshold:
+                    best_score = score
+                    best_match = field_name
+            except Exception:
+                # Ignora erros de comparação
+                continue
 
         return best_match
 
     def _infer_by_content(self, raw_key: str, value: Any) -> Optional[str]:
-        """Infere o campo baseado no conteúdo"""
+        """Infere o campo baseado no conteúdo (unidades, ano, categoria)"""
         if not value:
             return None
 
-        value_str = str(value).lower().strip()
-        raw_key_lower = raw_key.lower()
-
-        # Detecta pressões por unidades
-        pressure_units = ['kgf', 'bar', 'psi', 'kpa', 'mpa', 'kg/cm']
-        if any(unit in value_str for unit in pressure_units):
-            if any(word in raw_key_lower for word in ['test', 'hidro']):
-                return 'pressao_teste_hidrostatico'
-            elif any(word in raw_key_lower for word in ['oper']):
-                return 'pressao_operacao'
-            elif any(word in raw_key_lower for word in ['max', 'trab', 'pmta']):
-                return 'pressao_maxima_trabalho'
-
-        # Detecta anos (formato 19XX ou 20XX)
-        if re.match(r'^(19|20)\d{2}$', value_str):
-            return 'ano_fabricacao'
-
-        # Detecta categorias NR-13
-        if value_str.upper() in ['I', 'II', 'III', 'IV', 'V', 'A', 'B', 'C', 'D', 'E']:
-            return 'categoria'
-
-        # Detecta capacidade de vapor
-        if any(unit in value_str for unit in ['kg/h', 't/h', 'ton/h']):
-            return 'capacidade_producao_vapor'
-
-        # Detecta área
-        if any(unit in value_str for unit in ['m²', 'm2']):
-            return 'area_superficie_aquecimento'
+        kinds = classify_content(value)
+        if not kinds:
+            return None
 
-        # Detecta volume
-        if any(unit in value_str for unit in ['l', 'm³', 'm3', 'litros']):
-            return 'volume'
+        # Pressões: o campo depende da chave (teste > operação > máxima)
+        if 'pressao' in kinds:
+            key_kinds = {match.lastgroup for match in _PRESSURE_KEY_PATTERN.finditer(raw_key)}
+            for kind, field in _PRESSURE_FIELDS:
+                if kind in key_kinds:
+                    return field
 
+        for kind, field in _CONTENT_FIELDS:
+            if kind in kinds:
+                return field
         return None
 
     def _check_learned(self, raw_key: str) -> Optional[str]:
@@ -233,13 +261,15 @@ class FieldNormalizer:
 
         return None
 
-    def _normalize_value(self, field: str, value: Any) -> Any:
+    def _normalize_value(self, field: str, value: Any,
+                         snapshot: Optional[MappingSnapshot] = None) -> Any:
         """
-        Normaliza o valor de um campo
+        Normaliza o valor de um campo pela regra do campo (ocr.value_rules)
 
         Args:
             field: Nome do campo
             value: Valor a normalizar
+            snapshot: Versão dos mapeamentos (padrão: a atual)
 
         Returns:
             Valor normalizado
@@ -250,30 +280,11 @@ class FieldNormalizer:
         value_str = str(value).strip()
         
         # Remove valores muito curtos ou inválidos
-        if len(value_str) < 1:
+        if not value_str:
             return None
 
-        # Campos numéricos - limpa mas mantém formato
-        if field in ['ano_fabricacao', 'numero_ordem', 'numero_serie']:
-            # Remove caracteres não numéricos mas mantém hífens e barras
-            cleaned = re.sub(r'[^\d\-\/]', '', value_str)
-            return cleaned if cleaned else None
-
-        # Pressões - padroniza formato decimal
-        if 'pressao' in field:
-            # Substitui vírgula por ponto e limpa
-            normalized = value_str.replace(',', '.')
-            return normalized
-
-        # Categoria - sempre maiúscula
-        if field == 'categoria':
-            category = value_str.strip().upper()
-            # Valida se é uma categoria válida
-            valid_categories = ['I', 'II', 'III', 'IV', 'V', 'A', 'B', 'C', 'D', 'E']
-            return category if category in valid_categories else None
-
-        # Default - apenas limpa espaços
-        return value_str
+        rule = (snapshot or self.registry.current()).value_rules.get(field)
+        return rule(value_str) if rule is not None else value_str
 
     def learn_mapping(self, raw_key: str, field: str):
         """
@@ -298,13 +309,13 @@ class FieldNormalizer:
         """Salva mapeamentos aprendidos"""
         learned_file = settings.DATA_DIR / "learned_mappings.json"
         try:
-            with open(learned_file, 'w', encoding='utf-8') as f:
-                json.dump(self.learned, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.learned, learned_file)
         except Exception as e:
             print(f"Erro ao salvar mapeamentos aprendidos: {e}")
 
     def get_mapping_stats(self) -> Dict:
         """Retorna estatísticas dos mapeamentos"""
+        registry = self.registry.stats()
         total_mappings = len(self.mappings)
         total_learned = sum(len(keys) for keys in self.learned.values())
         
@@ -312,5 +323,8 @@ class FieldNormalizer:
             'total_predefined': total_mappings,
             'total_learned': total_learned,
             'threshold': self.threshold,
-            'learned_fields': list(self.learned.keys())
+            'learned_fields': list(self.learned.keys()),
+            'mappings_version': registry['version'],
+            'mappings_digest': registry['digest'],
+            'mappings_reloads': registry['reloads']
         }
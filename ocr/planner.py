@@ -0,0 +1,174 @@
+"""
+Planejador do modo híbrido (sync + batch simultâneos)
+
+Estima, a partir do histórico de execuções, quanto tempo cada modo leva:
+- sync: tempo por imagem em cada slot de concorrência
+  (duração × concorrência efetiva / imagens), mediana das últimas execuções
+- batch: duração = base + por_imagem × n, ajustada por mínimos quadrados
+
+Com prazo e/ou orçamento, escolhe quantas imagens vão para o sync (o
+restante vai para o batch, com desconto) e as duas partes rodam ao mesmo
+tempo:
+- só prazo: menor custo que termina no prazo (menos imagens no sync)
+- só orçamento: plano mais rápido que cabe no orçamento
+- prazo e orçamento: orçamento é limite rígido; se o prazo não couber,
+  o plano fica marcado como em risco
+"""
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ocr.serialization import load_file
+from ocr.storage import write_json_atomic
+
+HISTORY_SIZE = 50
+
+
+class LatencyHistory:
+    """Histórico persistente das durações de execuções sync e batch"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.runs: Dict[str, deque] = {'sync': deque(maxlen=HISTORY_SIZE), 'batch': deque(maxlen=HISTORY_SIZE)}
+        try:
+            data = load_file(self.path)
+            for mode in self.runs:
+                self.runs[mode].extend(data.get(mode, []))
+        except (OSError, ValueError):
+            pass
+
+    def record(self, mode: str, images: int, seconds: float, concurrency: int = 1):
+        """Registra uma execução concluída e grava o arquivo"""
+        if images <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            self.runs[mode].append({'images': images, 'seconds': round(seconds, 3),
+                                    'concurrency': concurrency, 'at': time.strftime('%Y-%m-%dT%H:%M:%S')})
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic({mode: list(runs) for mode, runs in self.runs.items()}, self.path, pretty=False)
+
+    def sync_slot_seconds(self, default: float) -> float:
+        """Mediana do tempo por imagem em cada slot de concorrência"""
+        samples = [run['seconds'] * min(run.get('concurrency', 1), run['images']) / run['images']
+                   for run in self.runs['sync']]
+        return statistics.median(samples) if samples else default
+
+    def batch_model(self, default_base: float) -> Tuple[float, float]:
+        """(base, por_imagem) da duração de um job batch"""
+        runs = list(self.runs['batch'])
+        if not runs:
+            return default_base, 0.0
+        if len({run['images'] for run in runs}) < 2:
+            return statistics.median(run['seconds'] for run in runs), 0.0
+
+        xs = [run['images'] for run in runs]
+        ys = [run['seconds'] for run in runs]
+        mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+        slope = (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+                 / sum((x - mean_x) ** 2 for x in xs))
+        slope = max(slope, 0.0)
+        return max(mean_y - slope * mean_x, 0.0), slope
+
+
+@dataclass
+class HybridPlan:
+    """Divisão das imagens entre sync e batch"""
+
+    sync_count: int
+    batch_count: int
+    estimated_seconds: float
+    estimated_cost: float
+    sync_seconds: float
+    batch_seconds: float
+    deadline: Optional[float] = None
+    budget: Optional[float] = None
+    at_risk: bool = False
+    reason: str = ""
+
+    def split(self, images: List[Path]) -> Tuple[List[Path], List[Path]]:
+        """Primeiras imagens (ordem de listagem) no sync, restante no batch"""
+        return images[:self.sync_count], images[self.sync_count:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class HybridPlanner:
+    """Escolhe quantas imagens processar em sync para cumprir prazo/orçamento"""
+
+    def __init__(self, history: LatencyHistory, concurrency: int, price_per_image: float,
+                 batch_discount: float = 0.5, sync_default: float = 3.0,
+                 batch_default: float = 900.0, safety: float = 1.2):
+        self.concurrency = max(1, concurrency)
+        self.price = price_per_image
+        self.batch_price = price_per_image * (1 - batch_discount)
+        self.safety = safety
+        self.slot_seconds = history.sync_slot_seconds(sync_default)
+        self.batch_base, self.batch_per_image = history.batch_model(batch_default)
+
+    def sync_seconds(self, count: int) -> float:
+        return math.ceil(count / self.concurrency) * self.slot_seconds * self.safety if count else 0.0
+
+    def batch_seconds(self, count: int) -> float:
+        return (self.batch_base + self.batch_per_image * count) * self.safety if count else 0.0
+
+    def cost(self, sync_count: int, total: int) -> float:
+        return sync_count * self.price + (total - sync_count) * self.batch_price
+
+    def _plan(self, sync_count: int, total: int, deadline: Optional[float],
+              budget: Optional[float], at_risk: bool, reason: str) -> HybridPlan:
+        sync_time = self.sync_seconds(sync_count)
+        batch_time = self.batch_seconds(total - sync_count)
+        return HybridPlan(
+            sync_count=sync_count,
+            batch_count=total - sync_count,
+            estimated_seconds=max(sync_time, batch_time),
+            estimated_cost=self.cost(sync_count, total),
+            sync_seconds=sync_time,
+            batch_seconds=batch_time,
+            deadline=deadline,
+            budget=budget,
+            at_risk=at_risk,
+            reason=reason
+        )
+
+    def makespan(self, sync_count: int, total: int) -> float:
+        """Duração estimada com as duas partes rodando ao mesmo tempo"""
+        return max(self.sync_seconds(sync_count), self.batch_seconds(total - sync_count))
+
+    def _fastest(self, max_sync: int, total: int) -> int:
+        """Quantidade no sync (até max_sync) com menor duração; empate favorece o menor custo"""
+        return min(range(max_sync + 1), key=lambda count: (self.makespan(count, total), count))
+
+    def plan(self, total: int, deadline: Optional[float] = None,
+             budget: Optional[float] = None) -> HybridPlan:
+        """Plano para `total` imagens (deadline em segundos, budget na moeda de price_per_image)"""
+        # Máximo de imagens no sync que o orçamento permite
+        max_sync = total
+        if budget is not None:
+            extra = self.price - self.batch_price
+            spare = budget - total * self.batch_price
+            if spare < 0:
+                return self._plan(0, total, deadline, budget, True, "orçamento abaixo do custo todo em batch")
+            max_sync = min(total, int(spare // extra)) if extra > 0 else total
+
+        if deadline is None:
+            return self._plan(self._fastest(max_sync, total), total, deadline, budget, False,
+                              "mais rápido dentro do orçamento")
+
+        # Menor quantidade no sync que termina no prazo (custo cresce com o sync)
+        first_fit = next((count for count in range(total + 1)
+                          if self.makespan(count, total) <= deadline), None)
+        if first_fit is None:
+            return self._plan(self._fastest(max_sync, total), total, deadline, budget, True,
+                              "prazo inviável; plano mais rápido possível")
+        if first_fit > max_sync:
+            return self._plan(self._fastest(max_sync, total), total, deadline, budget, True,
+                              "orçamento não permite cumprir o prazo")
+        return self._plan(first_fit, total, deadline, budget, False, "menor custo dentro do prazo")
@@ -3,16 +3,48 @@
 OCR Processor - Núcleo do sistema de processamento
 """
 import base64
-import json
+import math
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 
 from config.settings import settings
+from ocr.aggregates import RunningAggregates
+from ocr.events import RunEventLog
+from ocr.metrics import MetricsRegistry
 from ocr.models import PlacaNR13
 from ocr.normalizer import FieldNormalizer
-from utils import get_logger, format_time
-from services import BatchManager
+from ocr.planner import HybridPlanner, LatencyHistory
+from ocr.profiling import PROFILE_MODES, RunProfiler
+from ocr.result_table import ResultManifest
+from ocr.storage import commit_pending, write_json_atomic
+from ocr.validation import engine_for
+from ocr.work_queue import LeaseHeartbeat, SQLiteWorkQueue, default_worker_id
+from utils import PER_IMAGE, get_logger, format_time
+from services import BatchManager, MistralAPI
+
+
+EXECUTORS = ('thread', 'process')
+
+# Instância de cada processo do pool, criada uma única vez pelo initializer
+_pool_worker: Optional['OCRProcessor'] = None
+
+
+def _init_pool_worker(overrides: Dict[str, Any]):
+    """Initializer do pool: replica as configurações do pai e carrega o normalizador"""
+    global _pool_worker
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    _pool_worker = OCRProcessor(pool_worker=True)
+
+
+def _process_chunk(chunk: List[Tuple[int, str]],
+                   mode: str = 'sync') -> Tuple[List[Tuple[int, Dict[str, Any]]], Dict[str, Any]]:
+    """Processa um lote no worker; devolve os resultados e as métricas do lote"""
+    outcomes = [(i, _pool_worker._safe_process_image(Path(path), mode=mode)) for i, path in chunk]
+    return outcomes, _pool_worker.metrics.export_state(reset=True)
 
 
 class FileManager:
@@ -22,11 +54,15 @@ class FileManager:
         self.logger = get_logger(__name__)
     
     def list_images(self, directory: Path) -> List[Path]:
-        """Lista imagens no diretório"""
-        images = []
-        for ext in settings.SUPPORTED_FORMATS:
-            images.extend(directory.glob(f"*{ext}"))
-        return sorted(images)
+        """Lista imagens no diretório (uma única leitura do diretório)"""
+        directory = Path(directory)
+        if not directory.is_dir():
+            return []
+        formats = tuple(settings.SUPPORTED_FORMATS)
+        with os.scandir(directory) as entries:
+            names = [entry.name for entry in entries
+                     if entry.name.endswith(formats) and not entry.name.startswith('.')]
+        return [directory / name for name in sorted(names)]
     
     def encode_image(self, image_path: Path) -> str:
         """Codifica imagem em base64"""
@@ -41,87 +77,500 @@ class FileManager:
 class OCRProcessor:
     """Processador principal de OCR"""
     
-    def __init__(self):
+    def __init__(self, pool_worker: bool = False):
+        """
+        Args:
+            pool_worker: Instância enxuta de um processo do pool (sem
+                BatchManager nem endpoint de métricas)
+        """
         self.logger = get_logger(__name__)
         self.normalizer = FieldNormalizer()
-        self.batch_manager = BatchManager()
+        self.validator = engine_for(settings.REQUIRED_FIELDS)
+        self.batch_manager = None if pool_worker else BatchManager()
+        self.api = MistralAPI()
         self.files = FileManager()
         
         # Estatísticas
         self.processed_count = 0
         self.error_count = 0
+        self.metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)
+        # Ouvinte de progresso: recebe um evento por imagem concluída (ver ocr.background)
+        self.progress: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._run_id: Optional[str] = None
+        if pool_worker:
+            return
+        self.events = RunEventLog(settings.OUTPUT_REPORTS, enabled=settings.EVENTS_ENABLED)
+        self.latency_history = LatencyHistory(settings.DATA_DIR / "latency_history.json")
+        self.aggregates = RunningAggregates(settings.AGGREGATES_FILE,
+                                            daily_retention=settings.AGGREGATES_DAILY_RETENTION)
+        if self.metrics.enabled and settings.METRICS_PORT:
+            self.metrics.serve(settings.METRICS_PORT)
         
         self.logger.info("OCRProcessor inicializado")
     
-    def process(self) -> Dict[str, Any]:
-        """Processa todas as imagens do diretório de entrada"""
+    def process(self, input_dir: Optional[Path] = None, mode: str = 'auto',
+                concurrency: Optional[int] = None, executor: Optional[str] = None,
+                deadline: Optional[float] = None, budget: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Processa todas as imagens do diretório de entrada
+
+        Args:
+            input_dir: Diretório de entrada (padrão: settings.INPUT_DIR)
+            mode: auto (pelo BATCH_THRESHOLD, ou hybrid se houver prazo/orçamento),
+                sync, batch ou hybrid
+            concurrency: Chamadas simultâneas (threads) ou processos no modo sync
+            executor: thread ou process (padrão: settings.EXECUTOR)
+            deadline: Prazo em segundos para o modo hybrid
+            budget: Orçamento (moeda de PRICE_PER_IMAGE) para o modo hybrid
+        """
+        if settings.PROFILE_MODE in PROFILE_MODES:
+            profiler = RunProfiler(
+                settings.PROFILE_MODE,
+                settings.OUTPUT_REPORTS,
+                interval=settings.PROFILE_INTERVAL_MS / 1000.0,
+                top=settings.PROFILE_TOP
+            )
+            summary = profiler.run(self._process_all, input_dir, mode, concurrency, executor,
+                                   deadline, budget)
+            summary['perfil'] = profiler.to_dict()
+            self.logger.info(f"Perfil gravado em {profiler.artifact}\n{profiler.format_top(10)}")
+            return summary
+
+        return self._process_all(input_dir, mode, concurrency, executor, deadline, budget)
+
+    def _process_all(self, input_dir: Optional[Path], mode: str, concurrency: Optional[int],
+                     executor: Optional[str] = None, deadline: Optional[float] = None,
+                     budget: Optional[float] = None) -> Dict[str, Any]:
+        """Lista imagens e escolhe o modo de processamento"""
+        start_time = time.time()
+        summary: Optional[Dict[str, Any]] = None
         try:
-            start_time = time.time()
+            input_dir = Path(input_dir) if input_dir else settings.INPUT_DIR
             
             # Lista imagens
-            images = self.files.list_images(settings.INPUT_DIR)
+            images = self.files.list_images(input_dir)
             if not images:
                 return {
                     'error': True,
-                    'message': f'Nenhuma imagem encontrada em {settings.INPUT_DIR}'
+                    'message': f'Nenhuma imagem encontrada em {input_dir}'
                 }
             
             total_images = len(images)
             self.logger.info(f"Processando {total_images} imagens")
             
             # Decide modo de processamento
-            if total_images <= settings.BATCH_THRESHOLD:
-                return self._process_sync(images, start_time)
+            if mode == 'auto' and (deadline is not None or budget is not None):
+                mode = 'hybrid'
+            elif mode == 'auto':
+                mode = 'sync' if total_images <= settings.BATCH_THRESHOLD else 'batch'
+
+            executor = executor or settings.EXECUTOR
+            if executor not in EXECUTORS:
+                raise ValueError(f"Executor inválido: {executor} (use {', '.join(EXECUTORS)})")
+
+            self._start_run(mode, total_images, executor=executor if mode != 'batch' else None,
+                            concorrencia=concurrency or settings.MAX_CONCURRENCY)
+            if mode == 'hybrid':
+                summary = self._process_hybrid(images, start_time, concurrency, executor, deadline, budget)
+            elif mode == 'sync':
+                summary = self._run_sync(images, start_time, concurrency, executor)
             else:
-                return self._process_batch(images, start_time)
+                summary = self._process_batch(images, start_time)
+            return summary
                 
         except Exception as e:
             self.logger.error(f"Erro no processamento: {e}")
-            return {
+            summary = {
                 'error': True,
                 'message': str(e)
             }
+            return summary
+        finally:
+            self._commit_writes()
+            self._end_run(summary, start_time)
+            self.export_metrics()
+
+    def _start_run(self, mode: str, images: int, **info: Any):
+        """Abre a execução no log de eventos"""
+        self._run_id = self.events.start_run(mode, images, **info)
+
+    def _end_run(self, summary: Optional[Dict[str, Any]], start_time: float):
+        """Fecha a execução no log de eventos (falha aqui não interrompe o processamento)"""
+        if self._run_id is None:
+            return
+        run_id, self._run_id = self._run_id, None
+        try:
+            self.events.end_run(run_id, summary or {}, time.time() - start_time)
+        except OSError as e:
+            self.logger.warning(f"Não foi possível gravar eventos da execução: {e}")
+
+    def _record_run(self, mode: str, images: int, seconds: float):
+        """Conta a execução nos agregados e grava o estado"""
+        self.aggregates.record_run(mode, images, seconds)
+        self._flush_aggregates()
+
+    def _flush_aggregates(self):
+        """Grava os agregados pendentes (falha aqui não interrompe o processamento)"""
+        try:
+            self.aggregates.flush()
+        except Exception as e:
+            self.logger.warning(f"Não foi possível gravar agregados: {e}")
+
+    def _commit_writes(self):
+        """fsync dos JSONs ainda pendentes no grupo (FSYNC_MODE=group)"""
+        try:
+            commit_pending()
+        except OSError as e:
+            self.logger.warning(f"Falha no fsync dos resultados: {e}")
+
+    def _flush_events(self):
+        """Grava os eventos em buffer (worker de longa duração)"""
+        try:
+            self.events.flush()
+        except OSError as e:
+            self.logger.warning(f"Não foi possível gravar eventos: {e}")
+
+    def export_metrics(self):
+        """Grava métricas no arquivo Prometheus configurado"""
+        if not settings.METRICS_FILE:
+            return
+        try:
+            self.metrics.dump(Path(settings.METRICS_FILE))
+        except Exception as e:
+            self.logger.warning(f"Não foi possível gravar métricas: {e}")
     
-    def _process_sync(self, images: List[Path], start_time: float) -> Dict[str, Any]:
-        """Processamento síncrono (até 5 imagens)"""
+    def _run_sync(self, images: List[Path], start_time: float, concurrency: Optional[int],
+                  executor: str, tag: str = '', mode: str = 'sync') -> Dict[str, Any]:
+        """Modo sync no executor escolhido (threads ou processos)"""
+        if executor == 'process':
+            return self._process_pool(images, start_time, concurrency, tag, mode)
+        return self._process_sync(images, start_time, concurrency, tag, mode)
+
+    def plan_hybrid(self, total: int, concurrency: Optional[int] = None,
+                    deadline: Optional[float] = None, budget: Optional[float] = None):
+        """Plano sync + batch pelo histórico de latências"""
+        concurrency = concurrency or settings.MAX_CONCURRENCY
+        if self.api.scheduler.fixed:
+            concurrency = min(concurrency, self.api.scheduler.max_concurrency())
+        planner = HybridPlanner(
+            self.latency_history,
+            concurrency=concurrency,
+            price_per_image=settings.PRICE_PER_IMAGE,
+            batch_discount=settings.BATCH_DISCOUNT,
+            sync_default=settings.PLANNER_SYNC_DEFAULT_S,
+            batch_default=settings.PLANNER_BATCH_DEFAULT_S,
+            safety=settings.PLANNER_SAFETY
+        )
+        return planner.plan(total, deadline=deadline, budget=budget)
+
+    def _process_hybrid(self, images: List[Path], start_time: float, concurrency: Optional[int],
+                        executor: str, deadline: Optional[float],
+                        budget: Optional[float]) -> Dict[str, Any]:
+        """Divide as imagens entre sync e batch pelo plano e executa as duas partes ao mesmo tempo"""
+        plan = self.plan_hybrid(len(images), concurrency, deadline, budget)
+        sync_images, batch_images = plan.split(images)
+        self.logger.info(
+            f"Plano híbrido: {plan.sync_count} sync + {plan.batch_count} batch, "
+            f"~{format_time(plan.estimated_seconds)}, custo ~{plan.estimated_cost:.2f} ({plan.reason})"
+        )
+        if plan.at_risk:
+            self.logger.warning(f"Plano híbrido em risco: {plan.reason}")
+
+        parts = {}
+        with ThreadPoolExecutor(max_workers=1) as background:
+            batch_future = (background.submit(self._process_batch, batch_images, start_time, '_batch', 'hybrid')
+                            if batch_images else None)
+            if sync_images:
+                parts['sync'] = self._run_sync(sync_images, start_time, concurrency, executor, '_sync', 'hybrid')
+            if batch_future:
+                parts['batch'] = batch_future.result()
+
         results = []
         success_count = 0
-        
-        for i, image_path in enumerate(images, 1):
-            self.logger.info(f"Processando {i}/{len(images)}: {image_path.name}")
-            
-            try:
-                result = self._process_single_image(image_path)
-                if result.get('success'):
-                    results.append(result['data'])
-                    success_count += 1
-                    self.processed_count += 1
-                else:
-                    self.error_count += 1
-                    self.logger.error(f"Erro em {image_path.name}: {result.get('error')}")
-                    
-            except Exception as e:
+        requeued = 0
+        for part in parts.values():
+            results.extend(part.get('resultados', []))
+            success_count += part.get('sucesso', 0)
+            requeued += part.get('reenfileiradas', 0)
+
+        return {
+            'modo': 'hybrid',
+            'plano': plan.to_dict(),
+            'partes': {name: {k: v for k, v in part.items() if k != 'resultados'}
+                       for name, part in parts.items()},
+            'total_imagens': len(images),
+            'sucesso': success_count,
+            'erros': len(images) - success_count,
+            'reenfileiradas': requeued,
+            'taxa_sucesso': (success_count / len(images)) * 100,
+            'tempo_total': time.time() - start_time,
+            'resultados': results
+        }
+
+    def _reserve_api_slots(self, workers: int) -> int:
+        """Ajusta os slots do escalonador para `workers` chamadas simultâneas (limitado por SCHEDULER_SLOTS)"""
+        allowed = self.api.scheduler.ensure_capacity(workers)
+        if allowed < workers:
+            self.logger.warning(f"SCHEDULER_SLOTS={settings.SCHEDULER_SLOTS} limita a {allowed} "
+                                f"chamadas simultâneas (pedido: {workers})")
+        return allowed
+
+    def _process_sync(self, images: List[Path], start_time: float, concurrency: Optional[int] = None,
+                      tag: str = '', mode: str = 'sync') -> Dict[str, Any]:
+        """
+        Processamento síncrono, com até `concurrency` chamadas simultâneas
+
+        `mode` é gravado em _metadata.modo e nos agregados ('hybrid' na parte sync do híbrido).
+        """
+        workers = self._reserve_api_slots(max(1, min(concurrency or settings.MAX_CONCURRENCY, len(images))))
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(images)
+
+        if workers == 1:
+            for i, image_path in enumerate(images):
+                self.logger.info(f"Processando {i + 1}/{len(images)}: {image_path.name}", extra=PER_IMAGE)
+                outcomes[i] = self._safe_process_image(image_path, mode=mode)
+                self._emit_progress('sync', image_path, outcomes[i], i + 1, len(images))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(self._safe_process_image, image_path, 'bulk', mode): i
+                           for i, image_path in enumerate(images)}
+                for done, future in enumerate(as_completed(futures), 1):
+                    i = futures[future]
+                    outcomes[i] = future.result()
+                    self.logger.info(f"Concluído {done}/{len(images)}: {images[i].name}", extra=PER_IMAGE)
+                    self._emit_progress('sync', images[i], outcomes[i], done, len(images))
+
+        results = []
+        failures = []
+        success_count = 0
+        for image_path, result in zip(images, outcomes):
+            if result.get('success'):
+                results.append(result['data'])
+                success_count += 1
+                self.processed_count += 1
+                self.metrics.inc('images_processed_total')
+                self.aggregates.add_result(result['data'], mode)
+            else:
+                failures.append((image_path, result))
                 self.error_count += 1
-                self.logger.error(f"Erro processando {image_path.name}: {e}")
+                self.metrics.inc('images_failed_total')
+                self.aggregates.add_failure(mode)
+                self.logger.error(f"Erro em {image_path.name}: {result.get('error')}")
         
         # Salva resultados
         if results:
-            self._save_results(results, 'sync')
+            self._save_results(results, 'sync', tag, total=len(images))
         
         processing_time = time.time() - start_time
+        self.latency_history.record('sync', len(images), processing_time, workers)
+        self._record_run('sync', len(images), processing_time)
         
         return {
             'modo': 'sync',
             'total_imagens': len(images),
             'sucesso': success_count,
             'erros': len(images) - success_count,
+            'reenfileiradas': self._queue_for_retry(failures),
             'taxa_sucesso': (success_count / len(images)) * 100,
             'tempo_total': processing_time,
             'resultados': results
         }
     
-    def _process_batch(self, images: List[Path], start_time: float) -> Dict[str, Any]:
-        """Processamento em batch (>5 imagens)"""
+    def _process_pool(self, images: List[Path], start_time: float, workers: Optional[int] = None,
+                      tag: str = '', mode: str = 'sync') -> Dict[str, Any]:
+        """
+        Modo sync em pool de processos
+
+        Cada processo carrega o FieldNormalizer uma vez (initializer) e
+        recebe lotes de imagens; os resultados são gravados na ordem de
+        conclusão, à medida que os lotes retornam.
+        """
+        workers = max(1, min(workers or settings.POOL_WORKERS or os.cpu_count() or 1, len(images)))
+        chunksize = settings.POOL_CHUNKSIZE or math.ceil(len(images) / (workers * 4))
+        indexed = [(i, str(image_path)) for i, image_path in enumerate(images)]
+        chunks = [indexed[k:k + chunksize] for k in range(0, len(indexed), chunksize)]
+        self.logger.info(f"Pool de {workers} processos, {len(chunks)} lotes de até {chunksize} imagens")
+
+        timestamp = time.strftime('%Y%m%d_%H%M%S') + tag
+        results = []
+        failures = []
+        done = 0
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                                 initargs=(settings.snapshot(),)) as executor:
+            futures = {executor.submit(_process_chunk, chunk, mode): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    outcomes, state = future.result()
+                    self.metrics.merge(state)
+                except Exception as e:
+                    outcomes = [(i, {'success': False, 'error': f"worker: {e}"}) for i, _ in futures[future]]
+
+                for i, result in outcomes:
+                    done += 1
+                    self._emit_progress('sync', images[i], result, done, len(images))
+                    if result.get('success'):
+                        results.append(result['data'])
+                        self._write_result(result['data'], timestamp, len(results))
+                        self.processed_count += 1
+                        self.metrics.inc('images_processed_total')
+                        self.aggregates.add_result(result['data'], mode)
+                    else:
+                        failures.append((images[i], result))
+                        self.error_count += 1
+                        self.metrics.inc('images_failed_total')
+                        self.aggregates.add_failure(mode)
+                        self.logger.error(f"Erro em {images[i].name}: {result.get('error')}")
+                self.logger.info(f"Concluído {done}/{len(images)}", extra=PER_IMAGE)
+
+        if results:
+            self._write_summary(results, 'sync', timestamp, total=len(images))
+
+        self.latency_history.record('sync', len(images), time.time() - start_time, workers)
+        self._record_run('sync', len(images), time.time() - start_time)
+        success_count = len(results)
+        return {
+            'modo': 'sync',
+            'executor': 'process',
+            'workers': workers,
+            'total_imagens': len(images),
+            'sucesso': success_count,
+            'erros': len(images) - success_count,
+            'reenfileiradas': self._queue_for_retry(failures),
+            'taxa_sucesso': (success_count / len(images)) * 100,
+            'tempo_total': time.time() - start_time,
+            'resultados': results
+        }
+
+    def _queue_for_retry(self, failures: List[Tuple[Path, Dict[str, Any]]]) -> int:
+        """
+        Enfileira falhas transitórias na fila de retry (RETRY_QUEUE_PATH)
+        para uma passada posterior: python main.py worker --queue <fila>
+        """
+        paths = [image_path for image_path, result in failures if result.get('retryable', True)]
+        if not paths or not settings.RETRY_QUEUE_PATH:
+            return 0
+        try:
+            queue = SQLiteWorkQueue(Path(settings.RETRY_QUEUE_PATH),
+                                    visibility_timeout=settings.QUEUE_VISIBILITY_TIMEOUT,
+                                    max_attempts=settings.QUEUE_MAX_ATTEMPTS)
+            try:
+                added = queue.enqueue(paths, reset_finished=True)
+            finally:
+                queue.close()
+        except Exception as e:
+            self.logger.error(f"Não foi possível enfileirar {len(paths)} falhas para retry: {e}")
+            return 0
+        self.logger.warning(f"{added} imagens enfileiradas para nova tentativa em {settings.RETRY_QUEUE_PATH}")
+        return added
+
+    def process_queue(self, queue: SQLiteWorkQueue, worker_id: Optional[str] = None,
+                      lease_size: Optional[int] = None, wait: float = 0.0,
+                      poll_interval: float = 2.0, priority: str = 'background') -> Dict[str, Any]:
+        """
+        Drena uma fila compartilhada; vários hosts podem rodar ao mesmo tempo
+
+        Cada item arrendado é processado, gravado como <imagem>_ocr.json
+        (nome estável: reprocessamento após lease expirado sobrescreve em
+        vez de duplicar) e confirmado com ack; falhas voltam à fila com
+        nack. Termina quando a fila fica `wait` segundos sem itens prontos.
+        As chamadas à API usam a classe `priority` do escalonador.
+        """
+        worker_id = worker_id or default_worker_id()
+        lease_size = self._reserve_api_slots(
+            max(1, lease_size or settings.QUEUE_LEASE_SIZE or settings.MAX_CONCURRENCY))
+        start_time = time.time()
+
+        self.logger.info(f"Worker {worker_id} drenando fila {queue.db_path} (lotes de {lease_size})")
+        self._start_run('queue', queue.stats().get('pending', 0), worker=worker_id, lote=lease_size)
+        summary: Optional[Dict[str, Any]] = None
+
+        try:
+            summary = self._drain_queue(queue, worker_id, lease_size, wait, poll_interval, priority, start_time)
+            return summary
+        finally:
+            self._end_run(summary, start_time)
+
+    def _drain_queue(self, queue: SQLiteWorkQueue, worker_id: str, lease_size: int, wait: float,
+                     poll_interval: float, priority: str, start_time: float) -> Dict[str, Any]:
+        """Laço do worker de process_queue"""
+        idle_since = None
+        results = []
+        failed = 0
+        lost_leases = 0
+
+        with ThreadPoolExecutor(max_workers=lease_size) as executor:
+            while True:
+                items = queue.lease(worker_id, lease_size)
+                if not items:
+                    idle_since = idle_since or time.time()
+                    if time.time() - idle_since >= wait:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                idle_since = None
+
+                # Leases renovados até o ack/nack: o lote pode passar do prazo de visibilidade
+                with LeaseHeartbeat(queue, items) as heartbeat:
+                    outcomes = executor.map(lambda item: self._safe_process_image(Path(item.path), priority, 'queue'),
+                                            items)
+                    written = []
+                    for item, result in zip(items, outcomes):
+                        self._emit_progress('queue', Path(item.path), result, None, None)
+                        if not result.get('success'):
+                            failed += 1
+                            self.error_count += 1
+                            self.metrics.inc('images_failed_total')
+                            self.aggregates.add_failure('queue')
+                            heartbeat.release(item)
+                            queue.nack(item, str(result.get('error')),
+                                       delay=self.api.resilience.policy.backoff(item.attempts),
+                                       retry=result.get('retryable', True))
+                            self.logger.error(f"Erro em {Path(item.path).name} "
+                                              f"(tentativa {item.attempts}): {result.get('error')}")
+                            continue
+
+                        result['data']['_metadata']['worker'] = worker_id
+                        written.append((item, result, self._write_named_result(Path(item.path), result['data'])))
+
+                    # ack só depois do fsync do lote: item confirmado tem o JSON em disco
+                    self._commit_writes()
+                    for item, result, output_path in written:
+                        heartbeat.release(item)
+                        if not queue.ack(item, str(output_path)):
+                            lost_leases += 1
+                            self.logger.warning(f"Lease expirado antes do ack: {Path(item.path).name}")
+                            continue
+                        results.append(result['data'])
+                        self.processed_count += 1
+                        self.metrics.inc('images_processed_total')
+                        self.aggregates.add_result(result['data'], 'queue')
+                self._flush_aggregates()
+                self._flush_events()
+
+        total = len(results) + failed
+        self._record_run('queue', total, time.time() - start_time)
+        return {
+            'modo': 'queue',
+            'worker': worker_id,
+            'total_imagens': total,
+            'sucesso': len(results),
+            'erros': failed,
+            'leases_perdidos': lost_leases,
+            'taxa_sucesso': (len(results) / total) * 100 if total else 0.0,
+            'tempo_total': time.time() - start_time,
+            'fila': queue.stats(),
+            'resultados': results
+        }
+
+    def _process_batch(self, images: List[Path], start_time: float, tag: str = '',
+                       mode: str = 'batch') -> Dict[str, Any]:
+        """
+        Processamento em batch (>5 imagens); `mode` vai para _metadata.modo e os agregados
+
+        Itens sem `data` e imagens ausentes do resultado vão para a fila de
+        retry, como no modo sync; se o job falha, todas as imagens vão.
+        """
         self.logger.info(f"Iniciando processamento batch de {len(images)} imagens")
         
         try:
@@ -130,60 +579,119 @@ class OCRProcessor:
             
             # Aguarda conclusão
             results = self.batch_manager.wait_for_completion(job_id)
-            
-            if results:
-                # Normaliza e salva resultados
-                normalized_results = []
-                for result in results:
-                    if 'data' in result:
-                        normalized = self.normalizer.normalize(result['data'])
-                        normalized_results.append(normalized)
-                
-                if normalized_results:
-                    self._save_results(normalized_results, 'batch')
-                
-                processing_time = time.time() - start_time
-                success_count = len(normalized_results)
-                
-                return {
-                    'modo': 'batch',
-                    'job_id': job_id,
-                    'total_imagens': len(images),
-                    'sucesso': success_count,
-                    'erros': len(images) - success_count,
-                    'taxa_sucesso': (success_count / len(images)) * 100,
-                    'tempo_total': processing_time,
-                    'resultados': normalized_results
-                }
-            else:
-                return {
-                    'error': True,
-                    'message': 'Falha no processamento batch'
-                }
-                
         except Exception as e:
             self.logger.error(f"Erro no processamento batch: {e}")
-            return {
-                'error': True,
-                'message': str(e)
-            }
-    
+            return self._batch_failed(images, str(e), mode)
+
+        if not results:
+            return self._batch_failed(images, 'Falha no processamento batch', mode)
+
+        # Normaliza e salva resultados
+        normalized_results = []
+        failures = []
+        pending = dict.fromkeys(images)  # imagens ainda sem resultado (na ordem de entrada)
+        for done, result in enumerate(results, 1):
+            image_path = self._batch_image_path(images, result)
+            pending.pop(image_path, None)
+            self._emit_progress('batch', image_path or result.get('arquivo') or '', result, done, len(results))
+            normalized = None
+            if 'data' in result:
+                try:
+                    with self.metrics.timer('normalize'):
+                        normalized = self.normalizer.normalize(result['data'])
+                except Exception as e:
+                    result = {**result, 'error': f"normalização: {e}"}
+            if normalized is not None:
+                normalized['_metadata'] = {
+                    'arquivo': image_path.name if image_path is not None else result.get('arquivo'),
+                    'processado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'modo': mode,
+                    'job_id': job_id
+                }
+                normalized['_metadata']['validacao'] = self.validator.validate(normalized)
+                normalized_results.append(normalized)
+                self.processed_count += 1
+                self.metrics.inc('images_processed_total')
+                self.aggregates.add_result(normalized, mode)
+            elif image_path is not None:  # sem imagem conhecida: conta entre as ausentes abaixo
+                failures.append((image_path, result))
+                self.error_count += 1
+                self.metrics.inc('images_failed_total')
+                self.aggregates.add_failure(mode)
+                self.logger.error(f"Erro em {image_path.name}: {result.get('error')}")
+
+        # Imagens que o job não devolveu
+        for image_path in pending:
+            failures.append((image_path, {'error': 'sem resultado no job batch'}))
+            self.error_count += 1
+            self.metrics.inc('images_failed_total')
+            self.aggregates.add_failure(mode)
+        if pending:
+            self.logger.error(f"{len(pending)} imagens sem resultado no job {job_id}")
+
+        if normalized_results:
+            self._save_results(normalized_results, 'batch', tag, total=len(images))
+        
+        processing_time = time.time() - start_time
+        self.latency_history.record('batch', len(images), processing_time)
+        self._record_run('batch', len(images), processing_time)
+        success_count = len(normalized_results)
+        
+        return {
+            'modo': 'batch',
+            'job_id': job_id,
+            'total_imagens': len(images),
+            'sucesso': success_count,
+            'erros': len(images) - success_count,
+            'reenfileiradas': self._queue_for_retry(failures),
+            'taxa_sucesso': (success_count / len(images)) * 100,
+            'tempo_total': processing_time,
+            'resultados': normalized_results
+        }
+
+    def _batch_failed(self, images: List[Path], message: str, mode: str) -> Dict[str, Any]:
+        """Job batch sem resultados: todas as imagens contam como falha e vão para a fila de retry"""
+        self.error_count += len(images)
+        self.metrics.inc('images_failed_total', len(images))
+        for _ in images:
+            self.aggregates.add_failure(mode)
+        return {
+            'error': True,
+            'message': message,
+            'total_imagens': len(images),
+            'sucesso': 0,
+            'erros': len(images),
+            'reenfileiradas': self._queue_for_retry([(image_path, {'error': message}) for image_path in images])
+        }
+
+    @staticmethod
+    def _batch_image_path(images: List[Path], result: Dict[str, Any]) -> Optional[Path]:
+        """Imagem de um resultado batch pelo image_index (ou pelo nome em `arquivo`)"""
+        index = result.get('image_index', -1)
+        if isinstance(index, int) and 0 <= index < len(images):
+            return images[index]
+        name = result.get('arquivo')
+        return next((image_path for image_path in images if image_path.name == name), None) if name else None
+
     def process_single(self, image_path: Union[str, Path]) -> Dict[str, Any]:
         """Processa uma única imagem"""
         image_path = Path(image_path)
+        start_time = time.time()
+        self._start_run('single', 1)
+        result: Optional[Dict[str, Any]] = None
         
         try:
-            result = self._process_single_image(image_path)
+            result = self._process_single_image(image_path, priority='interactive', mode='single')
+            self._emit_progress('single', image_path, result, 1, 1)
             
             if result.get('success'):
                 # Salva resultado individual
-                filename = f"{image_path.stem}_ocr.json"
-                output_path = settings.OUTPUT_JSON / filename
-                
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(result['data'], f, indent=2, ensure_ascii=False)
-                
+                output_path = self._write_named_result(image_path, result['data'])
                 self.logger.info(f"Resultado salvo: {output_path}")
+                self.aggregates.add_result(result['data'], 'single')
+            else:
+                self.aggregates.add_failure('single')
+            self._flush_aggregates()
             
             return result
             
@@ -193,44 +701,105 @@ class OCRProcessor:
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            self._commit_writes()
+            success = bool(result and result.get('success'))
+            self._end_run({'modo': 'single', 'total_imagens': 1, 'sucesso': int(success),
+                           'erros': int(not success)}, start_time)
     
-    def _process_single_image(self, image_path: Path) -> Dict[str, Any]:
-        """Processa uma imagem individual"""
+    def _emit_progress(self, mode: str, image: Union[str, Path], result: Dict[str, Any],
+                       done: Optional[int], total: Optional[int]):
+        """Registra a imagem concluída no log de eventos e avisa o ouvinte de progresso"""
+        try:
+            self.events.image(self._run_id, mode, getattr(image, 'name', image), result)
+        except OSError as e:
+            self.logger.warning(f"Não foi possível gravar eventos: {e}")
+        if self.progress is None:
+            return
+        try:
+            self.progress({
+                'evento': 'imagem',
+                'modo': mode,
+                'arquivo': getattr(image, 'name', image),
+                'sucesso': bool(result.get('success', 'data' in result)),
+                'erro': result.get('error'),
+                'tempo': result.get('processing_time'),
+                'estagios': result.get('estagios'),
+                'concluidas': done,
+                'total': total
+            })
+        except Exception as e:
+            self.logger.warning(f"Falha no ouvinte de progresso: {e}")
+
+    def _safe_process_image(self, image_path: Path, priority: str = 'bulk', mode: str = 'sync') -> Dict[str, Any]:
+        """Processa imagem convertendo exceções em resultado de falha"""
+        try:
+            return self._process_single_image(image_path, priority, mode)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _process_single_image(self, image_path: Path, priority: str = 'bulk', mode: str = 'sync') -> Dict[str, Any]:
+        """Processa uma imagem individual (priority: classe no escalonador da API; mode: gravado em _metadata)"""
         start_time = time.time()
+        timings: Dict[str, float] = {}  # duração por estágio desta imagem (log de eventos)
+        trace: Dict[str, Any] = {'estagios': timings}
         
         try:
             # Codifica imagem
-            image_data = self.files.encode_image(image_path)
+            with self.metrics.timer('encode', timings):
+                image_data = self.files.encode_image(image_path)
+            self.metrics.inc('bytes_encoded_total', len(image_data))
+            trace['bytes'] = len(image_data)
             
-            # Simula processamento OCR (substitua pela integração real com Mistral)
-            ocr_result = self._mock_ocr_processing(image_path.name)
+            # Chamada OCR (API real/stub ou mock em processo)
+            if settings.OCR_BACKEND == 'api':
+                with self.metrics.timer('api', timings):
+                    response = self.api.process_image(image_data, image_path.name, priority)
+                trace['tentativas'] = self.api.resilience.last_attempts()
+                if not response.get('success'):
+                    self.metrics.inc('api_errors_total')
+                    return {
+                        'success': False,
+                        'error': response.get('error'),
+                        'retryable': response.get('retryable', True),
+                        'processing_time': time.time() - start_time,
+                        **trace
+                    }
+                ocr_result = response['data']
+            else:
+                with self.metrics.timer('api', timings):
+                    ocr_result = self._mock_ocr_processing(image_path.name)
             
             # Normaliza campos
-            normalized_data = self.normalizer.normalize(ocr_result)
+            with self.metrics.timer('normalize', timings):
+                normalized_data = self.normalizer.normalize(ocr_result)
             
             # Adiciona metadata
             normalized_data['_metadata'] = {
                 'arquivo': image_path.name,
                 'processado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
-                'modo': 'sync',
+                'modo': mode,
                 'processing_time': time.time() - start_time
             }
             
             # Valida resultado
-            validation = self._validate_result(normalized_data)
+            with self.metrics.timer('validate', timings):
+                validation = self.validator.validate(normalized_data)
             normalized_data['_metadata']['validacao'] = validation
             
             return {
                 'success': True,
                 'data': normalized_data,
-                'processing_time': time.time() - start_time
+                'processing_time': time.time() - start_time,
+                **trace
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e),
-                'processing_time': time.time() - start_time
+                'processing_time': time.time() - start_time,
+                **trace
             }
     
     def _mock_ocr_processing(self, filename: str) -> Dict[str, Any]:
@@ -247,63 +816,63 @@ class OCRProcessor:
             'Diameter': '1200 mm'
         }
     
-    def _validate_result(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Valida resultado contra requisitos NR-13"""
-        found_fields = []
-        missing_fields = []
-        
-        for field in settings.REQUIRED_FIELDS:
-            if field in data and data[field]:
-                found_fields.append(field)
-            else:
-                missing_fields.append(field)
-        
-        total_required = len(settings.REQUIRED_FIELDS)
-        completeness = (len(found_fields) / total_required) * 100
-        is_valid = len(missing_fields) == 0
-        
-        return {
-            'valid': is_valid,
-            'completeness': completeness,
-            'total_required': total_required,
-            'found': found_fields,
-            'missing': missing_fields
-        }
-    
-    def _save_results(self, results: List[Dict], mode: str):
-        """Salva resultados em arquivos JSON"""
-        timestamp = time.strftime('%Y%m%d_%H%M%S')
+    def _save_results(self, results: List[Dict], mode: str, tag: str = '', total: Optional[int] = None):
+        """Salva resultados em arquivos JSON (tag distingue partes gravadas no mesmo segundo)"""
+        timestamp = time.strftime('%Y%m%d_%H%M%S') + tag
         
         # Salva cada resultado individualmente
         for i, result in enumerate(results):
-            filename = f"placa_{timestamp}_{i+1:03d}_ocr.json"
-            output_path = settings.OUTPUT_JSON / filename
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            self._write_result(result, timestamp, i + 1)
         
-        # Salva resumo do processamento
+        self._write_summary(results, mode, timestamp, total)
+
+    def _write_result(self, result: Dict, timestamp: str, index: int):
+        """Grava o JSON de um resultado"""
+        output_path = settings.OUTPUT_JSON / f"placa_{timestamp}_{index:03d}_ocr.json"
+        with self.metrics.timer('write'):
+            write_json_atomic(result, output_path)
+        self._register_result(output_path)
+
+    def _register_result(self, output_path: Path):
+        """Registra o JSON no manifesto lido pela GUI (falha não interrompe o processamento)"""
+        try:
+            ResultManifest(settings.RESULT_MANIFEST_FILE).append(output_path.name)
+        except OSError as e:
+            self.logger.warning(f"Falha ao registrar {output_path.name} no manifesto: {e}")
+
+    def _write_named_result(self, image_path: Path, result: Dict) -> Path:
+        """Grava o JSON de uma imagem como <nome>_ocr.json"""
+        output_path = settings.OUTPUT_JSON / f"{image_path.stem}_ocr.json"
+        with self.metrics.timer('write'):
+            write_json_atomic(result, output_path)
+        self._register_result(output_path)
+        return output_path
+
+    def _write_summary(self, results: List[Dict], mode: str, timestamp: str, total: Optional[int] = None):
+        """Salva resumo do processamento (total: imagens da execução, incluindo falhas)"""
+        total = max(total or 0, len(results))
         summary = {
             'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
             'modo': mode,
-            'total_imagens': len(results),
+            'total_imagens': total,
             'sucesso': len(results),
-            'erros': 0,
-            'taxa_sucesso': 100.0,
+            'erros': total - len(results),
+            'taxa_sucesso': (len(results) / total) * 100 if total else 0.0,
             'arquivos_gerados': len(results)
         }
         
         summary_path = settings.OUTPUT_REPORTS / f"resumo_{timestamp}.json"
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False)
+        write_json_atomic(summary, summary_path)
         
         self.logger.info(f"Resultados salvos: {len(results)} arquivos")
     
     def test_api_connection(self) -> bool:
         """Testa conexão com a API"""
         try:
+            if settings.OCR_BACKEND == 'api':
+                return self.api.test_connection()
+
             # Mock do teste de conexão
-            # Substitua pela verificação real com Mistral AI
             self.logger.info("Testando conexão com API...")
             time.sleep(1)  # Simula latência
             return True
@@ -320,6 +889,9 @@ class OCRProcessor:
             'processed_count': self.processed_count,
             'error_count': self.error_count,
             'success_rate': success_rate,
-            'normalizer_stats': self.normalizer.get_stats(),
+            'normalizer_stats': self.normalizer.get_mapping_stats(),
+            'metrics': self.metrics.snapshot(),
+            'api_resilience': self.api.resilience.snapshot(),
+            'scheduler': self.api.scheduler.snapshot(),
             'batch_stats': self.batch_manager.get_stats()
         }
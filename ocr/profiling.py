@@ -0,0 +1,198 @@
+"""
+Profiling opcional do loop de processamento
+
+Dois modos:
+- cprofile: determinístico (cProfile), gera .prof + resumo .txt
+- sample: amostragem periódica das pilhas, baixo overhead,
+  gera pilhas colapsadas (.folded, compatível com flamegraph) + resumo .txt
+
+Os dois cobrem a thread que chama o processamento e as threads criadas
+durante ele (ThreadPoolExecutor do modo sync, workers da fila): no
+cprofile cada thread nova recebe o seu profiler (threading.setprofile)
+e as estatísticas são somadas no fim; a amostragem percorre as pilhas
+dessas threads e prefixa cada pilha com o nome da thread. Com
+`--executor process` o trabalho roda em outros processos, que não são
+perfilados: use o executor de threads para investigar o processamento.
+
+Os artefatos são gravados em output/reports ao lado dos resumo_*.json.
+"""
+import io
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+class StackSampler:
+    """Amostra periodicamente a pilha de uma thread e das threads criadas depois do start()"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self._ignored: set = set()
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.self_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        # Threads já existentes (log, métricas...) não fazem parte da execução
+        self._ignored = set(sys._current_frames()) - {self.thread_id}
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self._ignored:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+
+                self.samples += 1
+                self.self_counts[stack[0]] += 1
+                for function in set(stack):
+                    self.total_counts[function] += 1
+                thread_name = names.get(ident, str(ident)).split('_')[0]  # ThreadPoolExecutor-0_3 → agrupado
+                self.stacks[';'.join([thread_name, *reversed(stack)])] += 1
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """Funções com mais amostras próprias"""
+        total = max(self.samples, 1)
+        return [
+            {
+                'function': function,
+                'self_pct': count / total * 100,
+                'total_pct': self.total_counts[function] / total * 100,
+                'samples': count
+            }
+            for function, count in self.self_counts.most_common(limit)
+        ]
+
+
+class RunProfiler:
+    """Executa uma função sob profiling e grava o artefato da execução"""
+
+    def __init__(self, mode: str, output_dir: Path, interval: float = 0.005, top: int = 20):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de profiling inválido: {mode} (use {', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top_n = top
+        self.artifact: Optional[Path] = None
+        self.hot_functions: List[Dict[str, Any]] = []
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Executa fn(*args, **kwargs) e grava o perfil mesmo em caso de erro"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.output_dir / f"perfil_{time.strftime('%Y%m%d_%H%M%S')}"
+
+        if self.mode == 'cprofile':
+            import cProfile
+
+            profiler = cProfile.Profile()
+            thread_profilers: List[Any] = []
+            lock = threading.Lock()
+
+            def start_thread_profiler(frame, event, arg):
+                # Primeiro evento de uma thread nova: troca o gancho por um cProfile próprio
+                sys.setprofile(None)
+                thread_profiler = cProfile.Profile()
+                with lock:
+                    thread_profilers.append(thread_profiler)
+                thread_profiler.enable()
+
+            # A partir do 3.12 o cProfile usa sys.monitoring e já vê todas as threads
+            per_thread = sys.version_info < (3, 12)
+            if per_thread:
+                threading.setprofile(start_thread_profiler)
+            try:
+                return profiler.runcall(fn, *args, **kwargs)
+            finally:
+                if per_thread:
+                    threading.setprofile(None)
+                with lock:
+                    profilers = [profiler, *thread_profilers]
+                self._write_cprofile(profilers, stem)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+            self._write_samples(sampler, stem)
+
+    def _write_cprofile(self, profilers: List[Any], stem: Path):
+        """Soma os profilers (thread principal + threads de trabalho) em um único .prof"""
+        import pstats
+
+        stats = pstats.Stats(profilers[0])
+        for thread_profiler in profilers[1:]:
+            try:
+                stats.add(thread_profiler)
+            except TypeError:
+                continue  # thread sem nenhuma chamada registrada
+        self.artifact = stem.with_suffix('.prof')
+        stats.dump_stats(str(self.artifact))
+
+        total = stats.total_tt or 1e-9
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        self.hot_functions = [
+            {
+                'function': f"{name} ({Path(filename).name}:{line})",
+                'self_pct': tottime / total * 100,
+                'total_pct': cumtime / total * 100,
+                'calls': ncalls
+            }
+            for (filename, line, name), (_, ncalls, tottime, cumtime, _) in rows[:self.top_n]
+        ]
+
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats('cumulative').print_stats(self.top_n * 2)
+        stem.with_suffix('.txt').write_text(buffer.getvalue(), encoding='utf-8')
+
+    def _write_samples(self, sampler: StackSampler, stem: Path):
+        self.artifact = stem.with_suffix('.folded')
+        self.artifact.write_text(
+            '\n'.join(f"{stack} {count}" for stack, count in sampler.stacks.most_common()) + '\n',
+            encoding='utf-8'
+        )
+        self.hot_functions = sampler.top(self.top_n)
+        stem.with_suffix('.txt').write_text(
+            f"Amostras: {sampler.samples} (intervalo {self.interval * 1000:.1f}ms)\n\n"
+            + self.format_top(),
+            encoding='utf-8'
+        )
+
+    def format_top(self, limit: Optional[int] = None) -> str:
+        """Tabela textual das funções mais quentes"""
+        lines = [f"{'próprio %':>10} {'total %':>9}  função"]
+        for entry in self.hot_functions[:limit or self.top_n]:
+            lines.append(f"{entry['self_pct']:>9.1f}% {entry['total_pct']:>8.1f}%  {entry['function']}")
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumo para anexar ao resultado do processamento"""
+        return {
+            'modo': self.mode,
+            'arquivo': str(self.artifact) if self.artifact else None,
+            'top': self.hot_functions
+        }
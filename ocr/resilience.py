@@ -0,0 +1,265 @@
+"""
+Resiliência das chamadas à API de OCR
+
+- RetryPolicy: backoff exponencial com jitter completo (respeita Retry-After)
+- RetryBudget: limita retries a uma fração das requisições recentes,
+  evitando que falhas em massa multipliquem a carga no upstream
+- CircuitBreaker: após chamadas consecutivas com falha rejeita chamadas
+  localmente por um período e libera uma requisição de teste (half-open)
+- ResilientCaller: combina os três em volta de uma função que envia a
+  requisição HTTP
+
+A classificação de erros considera idempotência: 429/503 e falhas de
+conexão (a requisição não chegou a ser processada) podem sempre ser
+repetidas; timeouts de leitura e 500/502/504 só em operações
+idempotentes, pois o servidor pode já ter executado a operação.
+
+O circuito recebe um resultado por chamada (não por tentativa). 429 é
+contrapressão do upstream, não degradação: é repetido após Retry-After
+mas não conta como falha.
+"""
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+# Rejeitadas antes do processamento: seguro repetir qualquer operação
+ALWAYS_RETRYABLE_STATUS = frozenset({429, 503})
+# Limite de taxa: repetida, mas fora da contagem do circuit breaker
+BACKPRESSURE_STATUS = frozenset({429})
+# Resultado incerto: repetir apenas operações idempotentes
+IDEMPOTENT_RETRYABLE_STATUS = frozenset({408, 500, 502, 504})
+
+
+class CircuitOpenError(Exception):
+    """Chamada rejeitada localmente porque o circuito está aberto"""
+
+
+def is_retryable_status(status_code: int, idempotent: bool = True) -> bool:
+    """Indica se a resposta HTTP justifica nova tentativa"""
+    if status_code in ALWAYS_RETRYABLE_STATUS:
+        return True
+    return idempotent and status_code in IDEMPOTENT_RETRYABLE_STATUS
+
+
+def is_retryable_exception(exc: BaseException, idempotent: bool = True) -> bool:
+    """Indica se a exceção de transporte justifica nova tentativa (sem importar requests)"""
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if 'ConnectTimeout' in names or 'NewConnectionError' in names:
+        return True  # conexão nem foi estabelecida
+    if names & {'Timeout', 'ConnectionError', 'ChunkedEncodingError', 'TimeoutError'}:
+        return idempotent
+    return False
+
+
+def _retry_after_seconds(retry_after: Optional[str]) -> Optional[float]:
+    """Segundos do Retry-After (número ou data HTTP); None se ausente ou inválido"""
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class RetryPolicy:
+    """Backoff exponencial com jitter completo"""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 20.0,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Espera antes da tentativa `attempt + 1` (attempt começa em 1)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay = self._rng.uniform(0, ceiling)
+        wait = _retry_after_seconds(retry_after)
+        if wait is not None:
+            delay = max(delay, min(wait, self.max_delay))
+        return delay
+
+
+class RetryBudget:
+    """Permite retries até min_retries + ratio × requisições na janela"""
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """Consome uma retry do orçamento, se houver"""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """Circuito closed → open (após falhas consecutivas) → half-open (1 teste)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Indica se a chamada pode seguir para o upstream"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_neutral(self):
+        """Chamada sem veredito (ex.: só 429): não altera o estado, só libera o teste do half-open"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class ResilientCaller:
+    """Executa requisições com retry, orçamento de retries e circuit breaker"""
+
+    def __init__(self, policy: RetryPolicy, budget: RetryBudget, breaker: CircuitBreaker,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.policy = policy
+        self.budget = budget
+        self.breaker = breaker
+        self._sleep = sleep
+        self.counters = {'requests': 0, 'attempts': 0, 'retries': 0,
+                         'budget_exhausted': 0, 'circuit_rejected': 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def call(self, send: Callable[[], Any], idempotent: bool = True) -> Any:
+        """
+        Chama send() (que retorna uma resposta HTTP) até obter resposta
+        definitiva. Devolve a última resposta, mesmo com erro HTTP, para o
+        chamador tratar; relança a exceção de transporte final ou
+        CircuitOpenError quando o circuito está aberto.
+
+        O circuito recebe um resultado por chamada: sucesso se alguma
+        tentativa obteve resposta definitiva, falha se houve erro de
+        transporte ou 5xx/408, e nenhum veredito se só houve 429.
+        """
+        self._count('requests')
+        self.budget.record_request()
+        attempt = self._local.attempts = 0
+
+        if not self.breaker.allow():
+            self._count('circuit_rejected')
+            raise CircuitOpenError("circuito aberto: upstream degradado, chamada rejeitada")
+
+        succeeded = degraded = False
+        try:
+            while True:
+                attempt += 1
+                self._local.attempts = attempt
+                self._count('attempts')
+                retry_after = None
+                try:
+                    response = send()
+                except Exception as e:
+                    degraded = True
+                    if not is_retryable_exception(e, idempotent) or not self._may_retry(attempt):
+                        raise
+                else:
+                    status = response.status_code
+                    if status not in ALWAYS_RETRYABLE_STATUS and status not in IDEMPOTENT_RETRYABLE_STATUS:
+                        succeeded = True
+                        return response
+                    if status not in BACKPRESSURE_STATUS:
+                        degraded = True
+                    if not is_retryable_status(status, idempotent) or not self._may_retry(attempt):
+                        return response
+                    retry_after = response.headers.get('Retry-After')
+
+                self._count('retries')
+                self._sleep(self.policy.backoff(attempt, retry_after))
+        finally:
+            if succeeded:
+                self.breaker.record_success()
+            elif degraded:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_neutral()
+
+    def last_attempts(self) -> int:
+        """Tentativas da última chamada feita pela thread atual"""
+        return getattr(self._local, 'attempts', 0)
+
+    def _may_retry(self, attempt: int) -> bool:
+        if attempt >= self.policy.max_attempts:
+            return False
+        if self.breaker.state == CircuitBreaker.OPEN:
+            return False  # outras chamadas abriram o circuito durante esta
+        if not self.budget.try_acquire():
+            self._count('budget_exhausted')
+            return False
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Contadores e estado do circuito para get_stats()"""
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, 'circuit_state': self.breaker.state,
+                'consecutive_failures': self.breaker.failures}
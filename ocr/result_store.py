@@ -0,0 +1,123 @@
+"""
+Leitura dos resultados para a GUI
+
+A GUI não relê os JSONs de output/json a cada interação: consulta a
+tabela colunar (ocr.result_table), que indexa esses JSONs, e os
+agregados incrementais (ocr.aggregates). O processador registra cada
+JSON gravado no manifesto; version() (tamanho do manifesto e mtime dos
+agregados) muda a cada resultado e serve de chave de st.cache_data.
+Quando a versão muda, a tabela lê só os JSONs novos do manifesto.
+"""
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ocr.aggregates import RunningAggregates
+from ocr.result_table import ResultManifest, ResultTable, load_store_table
+
+# (bytes do manifesto, mtime_ns do arquivo de agregados)
+StoreVersion = Tuple[int, int]
+
+# Colunas exibidas na tabela de resultados
+RESULT_COLUMNS = ('arquivo', 'fabricante', 'categoria', 'identificacao',
+                  'pressao_maxima_trabalho', 'numero_ordem', 'processado_em')
+
+
+class ResultStore:
+    """Consultas de leitura sobre a tabela de resultados e os agregados"""
+
+    def __init__(self, json_dir: Optional[Union[str, Path]] = None,
+                 table_path: Optional[Union[str, Path]] = None,
+                 aggregates_path: Optional[Union[str, Path]] = None,
+                 manifest_path: Optional[Union[str, Path]] = None):
+        from config.settings import settings
+
+        self.json_dir = Path(json_dir or settings.OUTPUT_JSON)
+        self.table_path = Path(table_path or settings.RESULT_TABLE_FILE)
+        self.manifest = ResultManifest(Path(manifest_path or settings.RESULT_MANIFEST_FILE))
+        self.aggregates = RunningAggregates(Path(aggregates_path or settings.AGGREGATES_FILE))
+        self._table: Optional[ResultTable] = None
+        self._synced_version: Optional[StoreVersion] = None
+        self._lock = threading.RLock()
+
+    def version(self) -> StoreVersion:
+        """Versão do store (bytes do manifesto, mtime dos agregados): muda a cada resultado"""
+        try:
+            aggregates_mtime = self.aggregates.path.stat().st_mtime_ns
+        except OSError:
+            aggregates_mtime = 0
+        return self.manifest.size(), aggregates_mtime
+
+    def _sync(self, version: Optional[StoreVersion]) -> ResultTable:
+        """Tabela e agregados na versão pedida (chamado com o lock)"""
+        version = self.version() if version is None else version
+        if self._table is None:
+            self._table = load_store_table(self.table_path, self.json_dir, self.manifest, scan=False)
+            self.aggregates.reload()
+        elif version != self._synced_version:
+            self._table.update_from_manifest(self.manifest, self.json_dir)
+            self.aggregates.reload()
+        self._synced_version = version
+        return self._table
+
+    def rescan(self) -> int:
+        """Relista o diretório de resultados (JSONs gravados fora do processador) e regrava a tabela"""
+        with self._lock:
+            table = self._sync(None)
+            table.meta['manifest_offset'] = self.manifest.size()
+            changed = table.update_from_store(self.json_dir)
+            table.save(self.table_path)
+            self._synced_version = None  # invalida o cache da GUI
+        return changed
+
+    def dashboard(self, version: Optional[StoreVersion] = None, top: int = 15, days: int = 30) -> Dict[str, Any]:
+        """Estatísticas pré-agregadas para os gráficos da GUI"""
+        with self._lock:
+            table = self._sync(version)
+            validation = table.validation_summary()
+            manufacturers = table.group_by('fabricante', 'completude')
+            categories = table.count_by('categoria')
+            fields = table.field_counts()
+            total = len(table)
+        return {
+            'versao': self._synced_version,
+            'resultados': total,
+            'validacao': validation,
+            'fabricantes': [{'fabricante': name or '(vazio)', 'resultados': info['count'],
+                             'completude_media': info['mean'] or 0.0}
+                            for name, info in list(manufacturers.items())[:top]],
+            'categorias': [{'categoria': name or '(vazio)', 'resultados': count}
+                           for name, count in categories.items()],
+            'opcoes': {'fabricante': sorted(name for name in manufacturers if name),
+                       'categoria': sorted(name for name in categories if name)},
+            'campos': {name: {'encontrados': count, 'percentual': count / total * 100 if total else 0.0}
+                       for name, count in fields.items()},
+            'acumulado': self.aggregates.report(),
+            'diario': self.aggregates.trend('daily', days)
+        }
+
+    def page(self, offset: int = 0, limit: int = 50, fabricante: Optional[str] = None,
+             categoria: Optional[str] = None, invalid_only: bool = False,
+             version: Optional[StoreVersion] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Uma página de resultados filtrados e o total de linhas que passam no filtro"""
+        with self._lock:
+            table = self._sync(version)
+            rows: Any = range(len(table))
+            for name, value in (('fabricante', fabricante), ('categoria', categoria)):
+                if value:
+                    matches = table.where(name, value)
+                    rows = matches if isinstance(rows, range) else sorted(set(rows) & set(matches))
+            masks = table.column('mascara')
+            fields = len(table.required_fields)
+            if invalid_only:
+                full = (1 << fields) - 1
+                rows = [row for row in rows if masks[row] != full]
+            total = len(rows)
+
+            page = []
+            for row in rows[offset:offset + limit]:
+                data = table.row(row)
+                entry = {name: data.get(name) for name in RESULT_COLUMNS}
+                entry['completude'] = bin(masks[row]).count('1') / fields * 100 if fields else 0.0
+                page.append(entry)
+        return page, total
@@ -0,0 +1,584 @@
+"""
+Tabela colunar de resultados
+
+Uma coluna por campo normalizado do PlacaNR13 mais colunas de metadados,
+para estatísticas sem percorrer listas de dicionários aninhados:
+- fabricante, categoria e materiais: codificação por dicionário
+  (códigos int32 + lista de valores; -1 = vazio)
+- demais textos: lista de strings (no arquivo: offsets + bytes UTF-8)
+- processing_time/mtime: float64; presenca/mascara: uint32
+  (presenca: bit i = PLACA_FIELDS[i] preenchido; mascara: máscara de
+  validação dos campos obrigatórios, ver ocr.validation)
+
+A tabela cresce registro a registro (append/upsert) ou sincronizando o
+diretório de resultados: update_from_store lista o diretório e lê só
+JSONs novos ou alterados; update_from_manifest lê só os JSONs que o
+processador registrou no manifesto desde a última sincronização.
+save() grava um binário compacto; load() o abre com mmap e as colunas
+viram views sem cópia até a primeira alteração.
+
+Texto vazio é tratado como ausente.
+"""
+import fnmatch
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ocr.models import PLACA_FIELDS
+from ocr.serialization import load_file
+from ocr.storage import atomic_write
+from ocr.validation import _get_numpy, engine_for, is_present
+
+MAGIC = b'NR13TAB1'
+_HEADER = struct.Struct('<8sQ')
+_ALIGN = 8
+
+# Colunas com poucos valores distintos
+DICTIONARY_FIELDS = ('fabricante', 'categoria', 'material_casco', 'material_espelhos')
+
+# Metadados: nome -> tipo
+META_COLUMNS = {
+    'fonte': 'str',            # JSON de origem (chave do upsert)
+    'arquivo': 'str',          # imagem
+    'modo': 'dict',
+    'processado_em': 'str',
+    'processing_time': 'f64',
+    'mtime': 'f64',            # mtime do JSON de origem
+    'presenca': 'u32',
+    'mascara': 'u32',
+}
+
+_TYPECODES = {'dict': 'i', 'f64': 'd', 'u32': 'I'}
+
+
+def _column_kinds() -> Dict[str, str]:
+    kinds = {name: ('dict' if name in DICTIONARY_FIELDS else 'str') for name in PLACA_FIELDS}
+    kinds.update(META_COLUMNS)
+    return kinds
+
+
+def _padding(size: int) -> int:
+    return -size % _ALIGN
+
+
+class _MappedStrings(Sequence):
+    """Coluna de texto lida do arquivo: decodifica sob demanda"""
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if index < 0:
+            index += len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._data[start:end].tobytes().decode('utf-8') if end > start else None
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        data = self._data
+        offsets = self._offsets
+        for i in range(len(offsets) - 1):
+            start, end = offsets[i], offsets[i + 1]
+            yield data[start:end].tobytes().decode('utf-8') if end > start else None
+
+    def release(self):
+        self._offsets.release()
+        self._data.release()
+
+
+class _DictColumn:
+    """Coluna codificada por dicionário"""
+
+    __slots__ = ('codes', 'values', 'index')
+
+    def __init__(self, codes: Any = None, values: Optional[List[str]] = None):
+        self.codes = array('i') if codes is None else codes
+        self.values = values or []
+        self.index = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.values[code] if code >= 0 else None
+
+
+class ResultManifest:
+    """Registro append-only dos JSONs gravados (um nome de arquivo por linha)
+
+    O tamanho do arquivo funciona como número de versão do diretório de
+    resultados: quem lê guarda o offset já consumido e lê só as linhas novas.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def append(self, *names: str):
+        """Registra JSONs gravados (O_APPEND: seguro entre processos)"""
+        data = ''.join(f"{name}\n" for name in names).encode('utf-8')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
+
+    def read_from(self, offset: int) -> Tuple[List[str], int]:
+        """Nomes registrados a partir de `offset` e o novo offset (linha incompleta fica para depois)"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+        end = data.rfind(b'\n') + 1
+        return data[:end].decode('utf-8').splitlines(), offset + end
+
+
+class ResultTable:
+    """Resultados NR-13 em colunas, com group-by/count/mean"""
+
+    def __init__(self, required_fields: Optional[Sequence[str]] = None):
+        if required_fields is None:
+            from config.settings import settings
+            required_fields = settings.REQUIRED_FIELDS
+        self.required_fields = list(required_fields)
+        self.kinds = _column_kinds()
+        self.columns: Dict[str, Any] = {}
+        for name, kind in self.kinds.items():
+            if kind == 'dict':
+                self.columns[name] = _DictColumn()
+            elif kind == 'str':
+                self.columns[name] = []
+            else:
+                self.columns[name] = array(_TYPECODES[kind])
+        self.rows = 0
+        self.meta: Dict[str, Any] = {}  # informações livres gravadas no cabeçalho
+        self._sources: Optional[Dict[str, int]] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    # Construção incremental
+
+    def _row_values(self, record: Dict[str, Any], source: Optional[str], mtime: float) -> Dict[str, Any]:
+        meta = record.get('_metadata') or {}
+        values: Dict[str, Any] = {}
+        presence = 0
+        for bit, name in enumerate(PLACA_FIELDS):
+            value = record.get(name)
+            if is_present(value):
+                presence |= 1 << bit
+                values[name] = value if value.__class__ is str else str(value)
+            else:
+                values[name] = None
+        processing_time = meta.get('processing_time')
+        values.update({
+            'fonte': source or meta.get('arquivo'),
+            'arquivo': meta.get('arquivo'),
+            'modo': meta.get('modo'),
+            'processado_em': meta.get('processado_em'),
+            'processing_time': float(processing_time) if processing_time is not None else math.nan,
+            'mtime': float(mtime),
+            'presenca': presence,
+            'mascara': engine_for(self.required_fields).mask(record),
+        })
+        return values
+
+    def append(self, record: Dict[str, Any], source: Optional[str] = None, mtime: float = 0.0) -> int:
+        """Acrescenta um resultado normalizado; devolve o índice da linha"""
+        values = self._row_values(record, source, mtime)
+        with self._lock:
+            self._materialize()
+            for name, kind in self.kinds.items():
+                column = self.columns[name]
+                if kind == 'dict':
+                    column.codes.append(column.encode(values[name]))
+                else:
+                    column.append(values[name])
+            row = self.rows
+            self.rows += 1
+            if self._sources is not None and values['fonte'] is not None:
+                self._sources[values['fonte']] = row
+            return row
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Acrescenta vários resultados"""
+        count = 0
+        for record in records:
+            self.append(record)
+            count += 1
+        return count
+
+    def upsert(self, record: Dict[str, Any], source: str, mtime: float = 0.0) -> int:
+        """Substitui a linha da mesma fonte (JSON regravado) ou acrescenta"""
+        with self._lock:
+            row = self._source_index().get(source)
+            if row is None:
+                return self.append(record, source, mtime)
+            values = self._row_values(record, source, mtime)
+            self._materialize()
+            for name, kind in self.kinds.items():
+                column = self.columns[name]
+                if kind == 'dict':
+                    column.codes[row] = column.encode(values[name])
+                else:
+                    column[row] = values[name]
+            return row
+
+    def _source_index(self) -> Dict[str, int]:
+        if self._sources is None:
+            self._sources = {source: row for row, source in enumerate(self.columns['fonte'])
+                             if source is not None}
+        return self._sources
+
+    def update_from_store(self, json_dir: Path, pattern: str = "*_ocr.json") -> int:
+        """Lê JSONs novos ou alterados (mtime) do diretório; devolve quantos entraram"""
+        match = re.compile(fnmatch.translate(pattern)).match
+        try:
+            with os.scandir(json_dir) as scan:
+                entries = {entry.name: entry for entry in scan if match(entry.name)}
+        except FileNotFoundError:
+            return 0
+
+        changed = 0
+        with self._lock:
+            sources = self._source_index()
+            mtimes = self.columns['mtime']
+            for name in sorted(entries):
+                try:
+                    mtime = entries[name].stat().st_mtime
+                    row = sources.get(name)
+                    if row is not None and mtimes[row] == mtime:
+                        continue
+                    record = load_file(entries[name].path)
+                except (OSError, ValueError):
+                    continue  # arquivo ilegível ou sendo gravado: entra na próxima sincronização
+                self.upsert(record, name, mtime)
+                mtimes = self.columns['mtime']
+                changed += 1
+        return changed
+
+    def update_from_manifest(self, manifest: ResultManifest, json_dir: Path) -> int:
+        """Lê os JSONs registrados no manifesto desde a última sincronização"""
+        offset = self.meta.get('manifest_offset')
+        size = manifest.size()
+        if offset is None or size < offset:  # tabela sem offset ou manifesto recriado
+            self.meta['manifest_offset'] = size
+            return self.update_from_store(json_dir)
+
+        names, self.meta['manifest_offset'] = manifest.read_from(offset)
+        changed = 0
+        with self._lock:
+            for name in dict.fromkeys(names):
+                path = Path(json_dir) / name
+                try:
+                    mtime = path.stat().st_mtime
+                    record = load_file(path)
+                except (OSError, ValueError):
+                    continue
+                self.upsert(record, name, mtime)
+                changed += 1
+        return changed
+
+    # Acesso
+
+    def column(self, name: str) -> Sequence:
+        """Valores da coluna (códigos para colunas de dicionário: use values())"""
+        column = self.columns[name]
+        return column.codes if self.kinds[name] == 'dict' else column
+
+    def values(self, name: str) -> List[Optional[str]]:
+        """Valores decodificados de uma coluna"""
+        column = self.columns[name]
+        if self.kinds[name] == 'dict':
+            return [column.decode(code) for code in column.codes]
+        return list(column)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Linha como dicionário (campos vazios omitidos)"""
+        data = {}
+        for name, kind in self.kinds.items():
+            column = self.columns[name]
+            value = column.decode(column.codes[index]) if kind == 'dict' else column[index]
+            if value is not None and not (kind == 'f64' and math.isnan(value)):
+                data[name] = value
+        return data
+
+    def where(self, name: str, value: Optional[str]) -> List[int]:
+        """Índices das linhas com coluna == valor"""
+        column = self.columns[name]
+        if self.kinds[name] == 'dict':
+            code = column.index.get(value, -2) if value is not None else -1
+            return [row for row, current in enumerate(column.codes) if current == code]
+        return [row for row, current in enumerate(column) if current == value]
+
+    # Agregações
+
+    def count_by(self, name: str) -> Dict[Optional[str], int]:
+        """Contagem por valor da coluna (None = vazio), em ordem decrescente"""
+        kind = self.kinds[name]
+        if kind == 'dict':
+            column = self.columns[name]
+            np = _get_numpy()
+            if np is not None and self.rows:
+                counts = np.bincount(np.frombuffer(column.codes, dtype=np.int32) + 1,
+                                     minlength=len(column.values) + 1).tolist()
+                counter = {column.decode(code - 1): count for code, count in enumerate(counts) if count}
+            else:
+                counter = {column.decode(code): count for code, count in Counter(column.codes).items()}
+        elif kind == 'str':
+            counter = Counter(self.columns[name])
+        else:
+            raise ValueError(f"count_by não se aplica à coluna numérica {name}")
+        return dict(sorted(counter.items(), key=lambda item: item[1], reverse=True))
+
+    def _numeric(self, name: str) -> Sequence[float]:
+        """Coluna numérica; 'completude' é derivada da máscara de validação"""
+        if name == 'completude':
+            k = len(self.required_fields)
+            table = [bin(mask).count('1') / k * 100 if k else 0.0 for mask in range(1 << k)]
+            return array('d', (table[mask] for mask in self.columns['mascara']))
+        if self.kinds.get(name) not in ('f64', 'u32'):
+            raise ValueError(f"Coluna não numérica: {name}")
+        return self.columns[name]
+
+    def mean_by(self, group: str, value: str) -> Dict[Optional[str], float]:
+        """Média de uma coluna numérica por grupo (NaN ignorado)"""
+        if self.kinds[group] != 'dict':
+            raise ValueError(f"mean_by agrupa apenas colunas de dicionário: {group}")
+        column = self.columns[group]
+        numbers = self._numeric(value)
+        np = _get_numpy()
+        if np is not None and self.rows:
+            codes = np.frombuffer(column.codes, dtype=np.int32) + 1
+            weights = np.asarray(numbers, dtype=np.float64)
+            valid = ~np.isnan(weights)
+            size = len(column.values) + 1
+            sums = np.bincount(codes[valid], weights=weights[valid], minlength=size)
+            counts = np.bincount(codes[valid], minlength=size)
+            return {column.decode(code - 1): float(sums[code] / counts[code])
+                    for code in range(size) if counts[code]}
+
+        sums: Dict[int, float] = {}
+        counts: Dict[int, int] = {}
+        for code, number in zip(column.codes, numbers):
+            if number == number:  # NaN != NaN
+                sums[code] = sums.get(code, 0.0) + number
+                counts[code] = counts.get(code, 0) + 1
+        return {column.decode(code): sums[code] / counts[code] for code in counts}
+
+    def group_by(self, group: str, value: Optional[str] = None) -> Dict[Optional[str], Dict[str, float]]:
+        """count (e mean de `value`, se informado) por grupo"""
+        counts = self.count_by(group)
+        means = self.mean_by(group, value) if value else {}
+        return {key: ({'count': count, 'mean': means.get(key)} if value else {'count': count})
+                for key, count in counts.items()}
+
+    def field_counts(self) -> Dict[str, int]:
+        """Registros com cada campo preenchido (histograma das máscaras de presença)"""
+        histogram = Counter(self.columns['presenca'])
+        return {name: sum(count for mask, count in histogram.items() if mask >> bit & 1)
+                for bit, name in enumerate(PLACA_FIELDS)}
+
+    def validation_summary(self) -> Dict[str, Any]:
+        """Válidos, completude e faltantes por campo (ver ValidationEngine.summarize)"""
+        return engine_for(self.required_fields).summarize(self.columns['mascara'])
+
+    # Persistência
+
+    def save(self, path: Path):
+        """Grava o binário (escrita atômica: arquivo temporário + rename)"""
+        path = Path(path)
+        with self._lock:
+            self._materialize()  # o arquivo mapeado pode ser o próprio destino
+
+            buffers: List[bytes] = []
+            columns_meta = []
+            for name, kind in self.kinds.items():
+                column = self.columns[name]
+                meta: Dict[str, Any] = {'name': name, 'kind': kind}
+                if kind == 'dict':
+                    meta['dictionary'] = column.values
+                    parts = [column.codes.tobytes()]
+                elif kind == 'str':
+                    offsets = array('q', [0])
+                    blob = bytearray()
+                    for value in column:
+                        if value:
+                            blob += value.encode('utf-8')
+                        offsets.append(len(blob))
+                    parts = [offsets.tobytes(), bytes(blob)]
+                else:
+                    parts = [column.tobytes()]
+                meta['buffers'] = []
+                for part in parts:
+                    meta['buffers'].append(len(buffers))
+                    buffers.append(part)
+                columns_meta.append(meta)
+
+            layout = []
+            position = 0
+            for part in buffers:
+                layout.append([position, len(part)])
+                position += len(part) + _padding(len(part))
+
+            header = json.dumps({
+                'rows': self.rows,
+                'byteorder': sys.byteorder,
+                'required_fields': self.required_fields,
+                'meta': self.meta,
+                'columns': columns_meta,
+                'layout': layout
+            }, ensure_ascii=False).encode('utf-8')
+
+            def chunks() -> Iterator[bytes]:
+                yield _HEADER.pack(MAGIC, len(header))
+                yield header
+                yield b'\0' * _padding(_HEADER.size + len(header))
+                for part in buffers:
+                    yield part
+                    yield b'\0' * _padding(len(part))
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, chunks())
+
+    @classmethod
+    def load(cls, path: Path) -> 'ResultTable':
+        """Abre o binário com mmap (colunas sem cópia até a primeira alteração)"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, header_size = _HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} não é uma tabela de resultados")
+            header = json.loads(mapped[_HEADER.size:_HEADER.size + header_size].decode('utf-8'))
+            if header['byteorder'] != sys.byteorder:
+                raise ValueError(f"{path} foi gravado com outra ordem de bytes")
+
+            data_start = _HEADER.size + header_size
+            data_start += _padding(data_start)
+            view = memoryview(mapped)
+            parts = [view[data_start + offset:data_start + offset + size]
+                     for offset, size in header['layout']]
+
+            table = cls(header['required_fields'])
+            for meta in header['columns']:
+                name, kind = meta['name'], meta['kind']
+                if name not in table.kinds:
+                    continue
+                buffers = [parts[index] for index in meta['buffers']]
+                if kind == 'dict':
+                    table.columns[name] = _DictColumn(buffers[0].cast('i'), meta['dictionary'])
+                elif kind == 'str':
+                    table.columns[name] = _MappedStrings(buffers[0].cast('q'), buffers[1])
+                else:
+                    table.columns[name] = buffers[0].cast(_TYPECODES[kind])
+            table.rows = header['rows']
+            table.meta = header.get('meta', {})
+            table._mmap = mapped
+            view.release()
+        except Exception:
+            parts = view = None
+            mapped.close()
+            raise
+        return table
+
+    def _materialize(self):
+        """Copia as colunas mapeadas para memória antes de alterar"""
+        if self._mmap is None:
+            return
+        for name, kind in self.kinds.items():
+            column = self.columns[name]
+            if kind == 'dict':
+                if isinstance(column.codes, memoryview):
+                    codes = array('i')
+                    with column.codes.cast('B') as raw:
+                        codes.frombytes(raw)
+                    column.codes.release()
+                    column.codes = codes
+            elif kind == 'str':
+                if isinstance(column, _MappedStrings):
+                    self.columns[name] = list(column)
+                    column.release()
+            elif isinstance(column, memoryview):
+                copy = array(_TYPECODES[kind])
+                with column.cast('B') as raw:
+                    copy.frombytes(raw)
+                column.release()
+                self.columns[name] = copy
+        self.close()
+
+    def close(self):
+        """Libera o mmap (colunas ainda mapeadas deixam de ser válidas)"""
+        if self._mmap is None:
+            return
+        for name, kind in self.kinds.items():
+            column = self.columns[name]
+            if kind == 'dict' and isinstance(column.codes, memoryview):
+                column.codes.release()
+            elif isinstance(column, (memoryview, _MappedStrings)):
+                column.release()
+        self._mmap.close()
+        self._mmap = None
+
+
+def load_store_table(path: Optional[Path] = None, json_dir: Optional[Path] = None,
+                     manifest: Optional[ResultManifest] = None, scan: bool = True) -> ResultTable:
+    """Tabela persistida, sincronizada com os JSONs novos/alterados e regravada se mudou
+
+    Com scan=False só os JSONs registrados no manifesto depois da última
+    sincronização são lidos (sem listar o diretório).
+    """
+    from config.settings import settings
+
+    path = Path(path or settings.RESULT_TABLE_FILE)
+    table = None
+    if path.exists():
+        try:
+            table = ResultTable.load(path)
+            if table.required_fields != list(settings.REQUIRED_FIELDS):
+                table.close()
+                table = None  # máscaras de validação desatualizadas: reconstrói
+        except (OSError, ValueError, KeyError):
+            table = None
+    if table is None:
+        table = ResultTable()
+
+    json_dir = json_dir or settings.OUTPUT_JSON
+    manifest = manifest or ResultManifest(settings.RESULT_MANIFEST_FILE)
+    offset = table.meta.get('manifest_offset')
+    if scan:
+        table.meta['manifest_offset'] = manifest.size()  # antes da varredura: nada se perde
+        changed = table.update_from_store(json_dir)
+    else:
+        changed = table.update_from_manifest(manifest, json_dir)
+    if changed or offset != table.meta['manifest_offset'] or not path.exists():
+        table.save(path)
+    return table
@@ -0,0 +1,170 @@
+"""
+Escalonador de prioridade na frente do cliente OCR
+
+Três classes, em ordem de prioridade:
+- interactive: "processar uma imagem" (menu, GUI, process-one)
+- bulk: processamento sync de diretórios
+- background: reprocessamento (filas de trabalho/retry)
+
+Há `slots` chamadas simultâneas no total. Cada classe tem uma fração
+reservada (share, piso): até esse número de slots ela é atendida mesmo
+com classes acima esperando. Acima do piso uma classe pega emprestado
+qualquer slot livre, desde que nenhuma classe acima (nem uma abaixo do
+próprio piso) esteja esperando. A reserva de interactive fica ociosa:
+bulk e background nunca a ocupam, então uma requisição interativa
+sempre encontra um slot livre mesmo com um lote saturando a API.
+Com 5 slots e shares padrão: interactive 1, bulk 2, background 1; um
+worker de fila sozinho usa os 4 slots não interativos.
+
+O número de slots cresce com a concorrência pedida (ensure_capacity),
+exceto quando fixado por SCHEDULER_SLOTS.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+PRIORITY_CLASSES = ('interactive', 'bulk', 'background')
+DEFAULT_SHARES = {'interactive': 0.2, 'bulk': 0.5, 'background': 0.2}
+
+
+def parse_shares(spec: str) -> Dict[str, float]:
+    """Lê 'bulk:0.5,background:0.25' (classes omitidas usam o padrão)"""
+    shares = dict(DEFAULT_SHARES)
+    for part in filter(None, (item.strip() for item in spec.split(','))):
+        name, _, value = part.partition(':')
+        if name.strip() not in PRIORITY_CLASSES:
+            raise ValueError(f"Classe de prioridade inválida: {name} (use {', '.join(PRIORITY_CLASSES)})")
+        shares[name.strip()] = float(value)
+    return shares
+
+
+class PriorityScheduler:
+    """Semáforo com classes de prioridade e slots reservados por classe"""
+
+    def __init__(self, slots: int, shares: Optional[Dict[str, float]] = None, fixed: bool = False):
+        self.shares = {**DEFAULT_SHARES, **(shares or {})}
+        self.fixed = fixed  # SCHEDULER_SLOTS: não cresce com a concorrência pedida
+        self._in_use = {name: 0 for name in PRIORITY_CLASSES}
+        self._waiting = {name: 0 for name in PRIORITY_CLASSES}
+        self._waits = {name: {'count': 0, 'total': 0.0, 'max': 0.0} for name in PRIORITY_CLASSES}
+        self._cond = threading.Condition()
+        self._resize(slots)
+
+    def _resize(self, slots: int):
+        """Recalcula os pisos por classe para `slots` slots"""
+        self.slots = max(1, slots)
+        self.reserved: Dict[str, int] = {}
+        remaining = self.slots
+        for name in PRIORITY_CLASSES:
+            share = self.shares[name]
+            reserved = max(1, math.floor(share * self.slots)) if share > 0 else 0
+            if name == PRIORITY_CLASSES[0]:
+                reserved = min(reserved, self.slots - 1)  # sempre sobra slot para as outras classes
+            reserved = min(reserved, remaining)
+            self.reserved[name] = reserved
+            remaining -= reserved
+
+    def max_concurrency(self) -> int:
+        """Chamadas simultâneas possíveis para bulk/background (slots fora da reserva interativa)"""
+        return max(1, self.slots - self.reserved[PRIORITY_CLASSES[0]])
+
+    def ensure_capacity(self, concurrency: int) -> int:
+        """
+        Garante slots para `concurrency` chamadas de bulk/background
+
+        Cresce o número de slots (mantendo a reserva interativa), exceto
+        com slots fixos. Retorna a concorrência efetivamente disponível.
+        """
+        with self._cond:
+            if not self.fixed and concurrency > self.max_concurrency():
+                slots = concurrency + 1
+                self._resize(slots)
+                while self.max_concurrency() < concurrency:  # a reserva interativa cresce junto
+                    slots += 1
+                    self._resize(slots)
+                self._cond.notify_all()
+            return min(concurrency, self.max_concurrency())
+
+    def _can_run(self, name: str) -> bool:
+        total = sum(self._in_use.values())
+        if total >= self.slots:
+            return False
+        interactive = PRIORITY_CLASSES[0]
+        if name != interactive:
+            # Reserva interativa ociosa: nunca emprestada
+            held = max(0, self.reserved[interactive] - self._in_use[interactive])
+            if self.slots - total <= held:
+                return False
+        if self._in_use[name] < self.reserved[name]:
+            return True  # dentro do piso da classe
+        # Empréstimo: classes acima em espera e classes abaixo do piso em espera têm a vez
+        rank = PRIORITY_CLASSES.index(name)
+        for other_rank, other in enumerate(PRIORITY_CLASSES):
+            if other == name or not self._waiting[other]:
+                continue
+            if other_rank < rank or self._in_use[other] < self.reserved[other]:
+                return False
+        return True
+
+    @contextmanager
+    def slot(self, priority: str = 'bulk'):
+        """Ocupa um slot da classe durante o bloco"""
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Classe de prioridade inválida: {priority} (use {', '.join(PRIORITY_CLASSES)})")
+
+        start = time.perf_counter()
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while not self._can_run(priority):
+                    self._cond.wait()
+            finally:
+                self._waiting[priority] -= 1
+            self._in_use[priority] += 1
+            waited = time.perf_counter() - start
+            stats = self._waits[priority]
+            stats['count'] += 1
+            stats['total'] += waited
+            stats['max'] = max(stats['max'], waited)
+
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._in_use[priority] -= 1
+                self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Ocupação, limites e tempos de espera por classe"""
+        with self._cond:
+            return {
+                'slots': self.slots,
+                'classes': {
+                    name: {
+                        'reserved': self.reserved[name],
+                        'in_use': self._in_use[name],
+                        'waiting': self._waiting[name],
+                        'granted': self._waits[name]['count'],
+                        'wait_avg': (self._waits[name]['total'] / self._waits[name]['count']
+                                     if self._waits[name]['count'] else 0.0),
+                        'wait_max': self._waits[name]['max']
+                    }
+                    for name in PRIORITY_CLASSES
+                }
+            }
+
+
+_scheduler: Optional[PriorityScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(slots: int, shares: Optional[Dict[str, float]] = None,
+                  fixed: bool = False) -> PriorityScheduler:
+    """Escalonador único do processo (o orçamento da API é compartilhado por todas as instâncias)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PriorityScheduler(slots, shares, fixed)
+        return _scheduler
@@ -0,0 +1,162 @@
+"""
+Serialização JSON
+
+Todos os JSONs do projeto (resultados, resumos, relatórios, histórico
+de jobs, eventos) passam por dumps()/loads(). O codificador é escolhido
+por JSON_BACKEND: auto usa orjson ou msgspec quando instalados e cai
+para o json da biblioteca padrão. A saída é sempre UTF-8 sem escapes
+(como ensure_ascii=False); JSON_COMPACT=true grava sem indentação, o
+que reduz os arquivos pela metade e o tempo de serialização.
+
+Leitores podem decodificar direto em PlacaNR13 com load_placa().
+"""
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Optional, Union
+
+if TYPE_CHECKING:
+    from ocr.models import PlacaNR13
+
+JSON_BACKENDS = ('auto', 'orjson', 'msgspec', 'json')
+
+_AUTO_ORDER = ('orjson', 'msgspec')
+
+
+class JsonCodec:
+    """Par dumps/loads de um backend"""
+
+    def __init__(self, name: str, dumps: Callable[[Any, bool], bytes],
+                 loads: Callable[[Union[bytes, str]], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self) -> str:
+        return f"JsonCodec({self.name})"
+
+
+def _stdlib_codec() -> JsonCodec:
+    def dumps(obj: Any, pretty: bool) -> bytes:
+        if pretty:
+            text = json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+        else:
+            text = json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=str)
+        return text.encode('utf-8')
+
+    return JsonCodec('json', dumps, json.loads)
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+
+    compact = orjson.OPT_NON_STR_KEYS
+    pretty_opt = compact | orjson.OPT_INDENT_2
+
+    def dumps(obj: Any, pretty: bool) -> bytes:
+        return orjson.dumps(obj, default=str, option=pretty_opt if pretty else compact)
+
+    return JsonCodec('orjson', dumps, orjson.loads)
+
+
+def _msgspec_codec() -> JsonCodec:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=str)
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, pretty: bool) -> bytes:
+        data = encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e  # mesmo tratamento do json.JSONDecodeError
+
+    return JsonCodec('msgspec', dumps, loads)
+
+
+_FACTORIES: Dict[str, Callable[[], JsonCodec]] = {
+    'json': _stdlib_codec,
+    'orjson': _orjson_codec,
+    'msgspec': _msgspec_codec,
+}
+
+_codecs: Dict[str, JsonCodec] = {}
+
+
+def get_codec(backend: Optional[str] = None) -> JsonCodec:
+    """
+    Codec do backend (padrão: settings.JSON_BACKEND), criado uma vez
+
+    auto escolhe o primeiro backend rápido instalado; um backend pedido
+    explicitamente e não instalado gera ImportError.
+    """
+    if backend is None:
+        from config.settings import settings
+
+        backend = settings.JSON_BACKEND
+    codec = _codecs.get(backend)
+    if codec is not None:
+        return codec
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"JSON_BACKEND inválido: {backend} (use {', '.join(JSON_BACKENDS)})")
+
+    if backend == 'auto':
+        codec = None
+        for name in _AUTO_ORDER:
+            try:
+                codec = _FACTORIES[name]()
+                break
+            except ImportError:
+                continue
+        codec = codec or _stdlib_codec()
+    else:
+        codec = _FACTORIES[backend]()
+    _codecs[backend] = codec
+    return codec
+
+
+def dumps(obj: Any, pretty: Optional[bool] = None) -> bytes:
+    """JSON em bytes UTF-8 (pretty padrão: not settings.JSON_COMPACT)"""
+    if pretty is None:
+        from config.settings import settings
+
+        pretty = not settings.JSON_COMPACT
+    return get_codec().dumps(obj, pretty)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decodifica JSON (bytes ou str); erros de sintaxe são ValueError"""
+    return get_codec().loads(data)
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    """Lê e decodifica um arquivo JSON"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def load_placa(source: Union[str, Path, bytes, Dict[str, Any]]) -> 'PlacaNR13':
+    """PlacaNR13 a partir de um arquivo de resultado, bytes JSON ou dicionário"""
+    from ocr.models import PlacaNR13
+
+    if isinstance(source, (bytes, bytearray)):
+        data = loads(source)
+    elif isinstance(source, dict):
+        data = source
+    else:
+        data = load_file(source)
+    if not isinstance(data, dict):
+        raise ValueError("Resultado JSON não é um objeto")
+    return PlacaNR13.from_dict(data)
+
+
+def iter_placas(paths: Iterable[Union[str, Path]]) -> Iterator['PlacaNR13']:
+    """PlacaNR13 de cada arquivo legível (ilegíveis são ignorados)"""
+    for path in paths:
+        try:
+            yield load_placa(path)
+        except (OSError, ValueError):
+            continue
@@ -0,0 +1,156 @@
+"""
+Gravação atômica de arquivos
+
+Todo arquivo é escrito em um temporário no mesmo diretório e trocado
+pelo definitivo com os.replace: leitores (e um processo que caia no
+meio da gravação) veem o conteúdo antigo inteiro ou o novo inteiro,
+nunca um JSON truncado, e gravações concorrentes não se intercalam.
+
+A durabilidade (fsync) segue FSYNC_MODE:
+- off: nenhum fsync (o sistema operacional grava quando quiser)
+- group: os arquivos trocados entram em um grupo; o grupo recebe fsync
+  (arquivos e diretórios) a cada FSYNC_EVERY arquivos, quando o
+  primeiro pendente passa de FSYNC_INTERVAL_S segundos, ao fim de cada
+  execução (commit_pending) e na saída do processo
+- always: fsync do temporário antes da troca e do diretório depois
+"""
+import atexit
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Set, Union
+
+FSYNC_MODES = ('off', 'group', 'always')
+
+# mkstemp cria o temporário com 0600; o arquivo final recebe o modo padrão (0666 - umask)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+
+def _fsync_path(path: Union[str, Path], directory: bool = False):
+    """fsync de um arquivo ou diretório já gravado"""
+    flags = os.O_RDONLY
+    if directory:
+        if not hasattr(os, 'O_DIRECTORY'):
+            return  # Windows: diretórios não aceitam fsync
+        flags |= os.O_DIRECTORY
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FsyncGroup:
+    """Fsync em grupo: um commit a cada `every` arquivos ou `interval` segundos"""
+
+    def __init__(self, every: int = 64, interval: float = 2.0):
+        self.every = max(1, every)
+        self.interval = interval
+        self._pending: List[str] = []
+        self._first_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.commits = 0
+
+    def add(self, path: Union[str, Path]):
+        """Registra um arquivo trocado; faz o commit se o grupo encheu ou venceu"""
+        with self._lock:
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append(str(path))
+            due = (len(self._pending) >= self.every
+                   or time.monotonic() - self._first_at >= self.interval)
+        if due:
+            self.commit()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def commit(self):
+        """fsync dos arquivos pendentes e, uma vez cada, dos seus diretórios"""
+        with self._lock:
+            paths, self._pending = self._pending, []
+        if not paths:
+            return
+        directories: Set[str] = set()
+        for path in paths:
+            try:
+                _fsync_path(path)
+            except FileNotFoundError:
+                continue  # substituído ou removido depois; o novo conteúdo tem seu próprio commit
+            directories.add(os.path.dirname(path) or '.')
+        for directory in directories:
+            _fsync_path(directory, directory=True)
+        self.commits += 1
+
+
+_group: Optional[FsyncGroup] = None
+_group_lock = threading.Lock()
+
+
+def fsync_group() -> FsyncGroup:
+    """Grupo de fsync do processo (configurado por FSYNC_EVERY / FSYNC_INTERVAL_S)"""
+    global _group
+    if _group is None:
+        with _group_lock:
+            if _group is None:
+                from config.settings import settings
+
+                _group = FsyncGroup(settings.FSYNC_EVERY, settings.FSYNC_INTERVAL_S)
+                atexit.register(_group.commit)
+    return _group
+
+
+def commit_pending():
+    """Força o fsync dos arquivos pendentes do grupo (fim de execução, antes de ack)"""
+    if _group is not None:
+        _group.commit()
+
+
+def atomic_write(path: Union[str, Path], data: Union[bytes, Iterable[bytes]], fsync: Optional[str] = None):
+    """
+    Grava `data` (bytes ou blocos de bytes) em `path` via temporário + os.replace
+
+    fsync: off, group ou always (padrão: settings.FSYNC_MODE)
+    """
+    if fsync is None:
+        from config.settings import settings
+
+        fsync = settings.FSYNC_MODE
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if hasattr(os, 'fchmod'):
+                os.fchmod(f.fileno(), _FILE_MODE)
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                f.write(data)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            if fsync == 'always':
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    if fsync == 'always':
+        _fsync_path(path.parent, directory=True)
+    elif fsync == 'group':
+        fsync_group().add(path)
+
+
+def write_json_atomic(data: Any, path: Union[str, Path], pretty: Optional[bool] = None,
+                      fsync: Optional[str] = None):
+    """Serializa `data` em JSON (ocr.serialization) e grava atomicamente"""
+    from ocr.serialization import dumps
+
+    atomic_write(path, dumps(data, pretty), fsync)
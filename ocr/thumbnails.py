@@ -0,0 +1,84 @@
+"""
+Cache de miniaturas para a GUI
+
+Cada imagem de entrada gera uma única vez uma miniatura JPEG em
+THUMBNAIL_DIR; o nome do arquivo é um hash do caminho, mtime, tamanho e
+lado máximo, então uma imagem alterada gera outra miniatura e as
+antigas são removidas por prune(). JPEGs são decodificados já reduzidos
+(Image.draft), sem carregar a resolução original inteira.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+from ocr.storage import atomic_write
+from utils import get_logger
+
+
+class ThumbnailCache:
+    """Miniaturas em disco indexadas pelo estado do arquivo original"""
+
+    def __init__(self, cache_dir: Union[str, Path], size: int = 480,
+                 quality: int = 80, max_files: int = 5000):
+        self.logger = get_logger(__name__)
+        self.cache_dir = Path(cache_dir)
+        self.size = size
+        self.quality = quality
+        self.max_files = max_files
+
+    def key(self, image_path: Path) -> str:
+        """Chave da miniatura (muda quando o original muda)"""
+        stat = image_path.stat()
+        raw = f"{image_path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, image_path: Union[str, Path]) -> Optional[Path]:
+        """Caminho da miniatura (gera se necessário); None se a imagem não puder ser lida"""
+        image_path = Path(image_path)
+        try:
+            thumb_path = self.cache_dir / f"{self.key(image_path)}.jpg"
+        except OSError as e:
+            self.logger.warning(f"Imagem indisponível {image_path}: {e}")
+            return None
+        if thumb_path.exists():
+            return thumb_path
+        try:
+            self._render(image_path, thumb_path)
+        except Exception as e:
+            self.logger.warning(f"Erro gerando miniatura de {image_path.name}: {e}")
+            return None
+        return thumb_path
+
+    def _render(self, image_path: Path, thumb_path: Path):
+        import io
+
+        from PIL import Image
+
+        thumb_path.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(image_path) as image:
+            image.draft('RGB', (self.size, self.size))  # JPEG: decodifica em escala reduzida
+            image.thumbnail((self.size, self.size))
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=self.quality)
+        atomic_write(thumb_path, buffer.getvalue())
+
+    def prune(self) -> int:
+        """Remove as miniaturas mais antigas acima de max_files; devolve quantas removeu"""
+        if not self.max_files or not self.cache_dir.exists():
+            return 0
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.jpg')]
+        excess = len(entries) - self.max_files
+        if excess <= 0:
+            return 0
+        entries.sort(key=lambda entry: entry.stat().st_atime)
+        removed = 0
+        for entry in entries[:excess]:
+            try:
+                os.unlink(entry.path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
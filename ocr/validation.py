@@ -0,0 +1,194 @@
+"""
+Motor único de validação NR-13
+
+Cada registro vira uma máscara de presença com um bit por campo
+obrigatório (bit i = REQUIRED_FIELDS[i] preenchido). Validade,
+completude e campos faltantes de um registro saem da máscara; para um
+conjunto de resultados, as agregações (válidos, completude média,
+faltantes por campo) saem de operações sobre o vetor de máscaras:
+histograma das máscaras (np.bincount, ou Counter sem NumPy) e uma
+tabela com no máximo 2^k entradas.
+
+NumPy é opcional e importado só quando um conjunto é agregado.
+"""
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from ocr.serialization import load_file
+
+# Acima disso o histograma por máscara fica grande; conta bit a bit
+_HISTOGRAM_MAX_FIELDS = 16
+
+_numpy = None
+
+
+def _get_numpy():
+    """Módulo numpy ou None (importado uma vez, sob demanda)"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def is_present(value: Any) -> bool:
+    """Campo preenchido: valor verdadeiro e não só espaços"""
+    if value.__class__ is str:  # caso comum, sem conversão
+        return bool(value.strip())
+    return bool(value) and bool(str(value).strip())
+
+
+class ValidationEngine:
+    """Validação por máscara de presença dos campos obrigatórios"""
+
+    def __init__(self, required_fields: Sequence[str]):
+        if len(required_fields) > 32:
+            raise ValueError("Máximo de 32 campos obrigatórios por máscara")
+        self.fields: Tuple[str, ...] = tuple(required_fields)
+        self.full_mask = (1 << len(self.fields)) - 1
+        self._bits = tuple((1 << i, name) for i, name in enumerate(self.fields))
+        # Resultado por máscara: no máximo 2^k, na prática poucas dezenas
+        self._described: Dict[int, Dict[str, Any]] = {}
+
+    def mask(self, record: Any) -> int:
+        """Máscara de presença de um dict ou objeto (ex.: PlacaNR13)"""
+        if record.__class__ is dict or isinstance(record, Mapping):
+            get = record.get
+        else:
+            get = lambda name: getattr(record, name, None)  # noqa: E731
+        bits = 0
+        # is_present em linha: a chamada por campo pesa no caminho quente
+        for bit, name in self._bits:
+            value = get(name)
+            if value.__class__ is str:
+                if value.strip():
+                    bits |= bit
+            elif value and str(value).strip():
+                bits |= bit
+        return bits
+
+    def describe(self, mask: int) -> Dict[str, Any]:
+        """
+        Resultado de validação a partir da máscara
+
+        O dict é guardado por máscara e compartilhado entre registros:
+        trate-o como somente leitura.
+        """
+        info = self._described.get(mask)
+        if info is not None:
+            return info
+        found = [name for i, name in enumerate(self.fields) if mask >> i & 1]
+        missing = [name for i, name in enumerate(self.fields) if not mask >> i & 1]
+        total = len(self.fields)
+        info = self._described[mask] = {
+            'valid': mask == self.full_mask,
+            'completeness': (len(found) / total * 100) if total else 0,
+            'total_required': total,
+            'found': found,
+            'missing': missing,
+            'mask': mask
+        }
+        return info
+
+    def validate(self, record: Any) -> Dict[str, Any]:
+        """Valida um registro contra os requisitos NR-13"""
+        return self.describe(self.mask(record))
+
+    def masks(self, records: Iterable[Any]) -> array:
+        """Vetor de máscaras (uint32) de um conjunto de registros"""
+        return array('I', (self.mask(record) for record in records))
+
+    def summarize(self, masks: Sequence[int]) -> Dict[str, Any]:
+        """Agregados de validação de um vetor de máscaras"""
+        k = len(self.fields)
+        np = _get_numpy()
+        total = len(masks)
+
+        if k <= _HISTOGRAM_MAX_FIELDS:
+            if np is not None:
+                counts = np.bincount(np.frombuffer(array('I', masks), dtype=np.uint32),
+                                     minlength=1 << k).tolist()
+                histogram = {mask: count for mask, count in enumerate(counts) if count}
+            else:
+                histogram = Counter(masks)
+            found_per_field = [sum(count for mask, count in histogram.items() if mask >> i & 1)
+                               for i in range(k)]
+            found_count = Counter()
+            for mask, count in histogram.items():
+                found_count[bin(mask).count('1')] += count
+            valid = histogram.get(self.full_mask, 0)
+        elif np is not None:
+            vector = np.frombuffer(array('I', masks), dtype=np.uint32)
+            bits = (vector[:, None] >> np.arange(k, dtype=np.uint32)) & 1
+            found_per_field = bits.sum(axis=0).tolist()
+            found_count = Counter(dict(enumerate(np.bincount(bits.sum(axis=1), minlength=k + 1).tolist())))
+            valid = int((vector == self.full_mask).sum())
+        else:
+            found_per_field = [sum(1 for mask in masks if mask >> i & 1) for i in range(k)]
+            found_count = Counter(bin(mask).count('1') for mask in masks)
+            valid = sum(1 for mask in masks if mask == self.full_mask)
+
+        found_total = sum(found_per_field)
+        return {
+            'total': total,
+            'validos': valid,
+            'incompletos': total - valid,
+            'taxa_sucesso': (valid / total * 100) if total else 0.0,
+            'completude_media': (found_total / (total * k) * 100) if total and k else 0.0,
+            'faltantes_por_campo': {name: total - found for name, found in zip(self.fields, found_per_field)},
+            'distribuicao_campos': {n: found_count.get(n, 0) for n in range(k + 1)}
+        }
+
+
+_engines: Dict[Tuple[str, ...], ValidationEngine] = {}
+
+
+def engine_for(required_fields: Sequence[str]) -> ValidationEngine:
+    """Motor compartilhado para uma lista de campos obrigatórios"""
+    key = tuple(required_fields)
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = ValidationEngine(key)
+    return engine
+
+
+def load_store_masks(engine: ValidationEngine, json_dir: Path,
+                     pattern: str = "*_ocr.json") -> Tuple[List[str], array, Dict[str, str]]:
+    """Máscaras dos JSONs do diretório de resultados: (arquivos, máscaras, erros de leitura)"""
+    names: List[str] = []
+    masks = array('I')
+    errors: Dict[str, str] = {}
+    for json_file in sorted(Path(json_dir).glob(pattern)):
+        try:
+            record = load_file(json_file)
+        except (OSError, ValueError) as e:
+            errors[json_file.name] = str(e)
+            continue
+        names.append(json_file.name)
+        masks.append(engine.mask(record))
+    return names, masks, errors
+
+
+def validate_store(engine: ValidationEngine, json_dir: Path,
+                   include_files: bool = True) -> Dict[str, Any]:
+    """Valida todo o diretório de resultados; `arquivos` traz o detalhe por arquivo"""
+    names, masks, errors = load_store_masks(engine, json_dir)
+    report = engine.summarize(masks)
+    # Ilegíveis ficam só em `erros`: total = validos + incompletos e as taxas usam o mesmo total
+    report['erros'] = len(errors)
+
+    if include_files:
+        files: List[Dict[str, Any]] = []
+        for name, mask in zip(names, masks):
+            info = engine.describe(mask)
+            files.append({'file': name, 'valid': info['valid'],
+                          'completeness': info['completeness'], 'missing': info['missing']})
+        files.extend({'file': name, 'error': error} for name, error in errors.items())
+        files.sort(key=lambda entry: entry['file'])
+        report['arquivos'] = files
+    return report
@@ -0,0 +1,215 @@
+"""
+Regras de normalização de valores por campo
+
+Cada campo do field_mappings.yaml pode declarar uma regra em `normalize`:
+
+    pressao_maxima_trabalho:
+      normalize:
+        type: pressure      # converte para `to` (kgf/cm² ou bar)
+        to: kgf/cm²
+        decimals: 2
+
+compile_value_rules() transforma as regras em uma tabela campo →
+função (regex e fatores calculados uma única vez); o normalizador faz
+uma consulta na tabela e uma chamada por valor. Tipos disponíveis
+(RULE_TYPES): text, numeric, pressure, date, choice. Valores que a
+regra não reconhece são mantidos como texto (pressure, date) ou
+descartados (numeric sem dígitos, choice fora da lista).
+"""
+import re
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+
+ValueRule = Callable[[str], Optional[str]]
+
+# Fatores para kgf/cm² por unidade reconhecida
+_PRESSURE_FACTORS = {
+    'kgf/cm2': 1.0,
+    'kg/cm2': 1.0,
+    'kg/cm': 1.0,
+    'kgf': 1.0,
+    'bar': 1.0197162,
+    'mpa': 10.197162,
+    'kpa': 0.010197162,
+    'psi': 0.070306958,
+}
+_PRESSURE_TARGETS = {'kgf/cm²': 1.0, 'bar': 1.0197162}
+
+# Token numérico inteiro: sinal, milhar e decimal ("-1", "1.034,5", "1,034.5")
+_PRESSURE_NUMBER = re.compile(r'(?<![\w.,/\-−+])([-−+]?)(\d[\d.,]*\d|\d)')
+# Unidade logo após o número
+_PRESSURE_UNIT = re.compile(
+    r'\s*(kgf\s*/\s*cm\s*[²2]|kg\s*/\s*cm\s*[²2]?|kgf|bar|psi|[km]pa)[ga]?(?![^\W\d_])',
+    re.IGNORECASE
+)
+
+# dd/mm/aaaa, dd-mm-aa, dd.mm.aaaa, aaaa-mm-dd e mm/aaaa
+_DATE = re.compile(
+    r'(?P<d>\d{1,2})[/.\-](?P<m>\d{1,2})[/.\-](?P<y>\d{4}|\d{2})(?!\d)'
+    r'|(?P<iy>\d{4})-(?P<im>\d{1,2})-(?P<id>\d{1,2})(?!\d)'
+    r'|(?<![\d/.\-])(?P<mm>\d{1,2})/(?P<my>\d{4})(?!\d)'
+)
+
+
+def _format_number(number: float, decimals: int) -> str:
+    """Número com até `decimals` casas, sem zeros à direita"""
+    text = f"{number:.{decimals}f}"
+    return text.rstrip('0').rstrip('.') if '.' in text else text
+
+
+def _plain_number(number: float) -> str:
+    """Número em forma decimal com as casas lidas ("10.5", "1034")"""
+    text = repr(number)
+    return text[:-2] if text.endswith('.0') else text
+
+
+def _parse_number(sign: str, digits: str) -> Optional[float]:
+    """
+    Número com separadores de milhar/decimal em qualquer convenção
+
+    Com os dois separadores, o último é o decimal; um separador repetido
+    é de milhar. "1.034" / "1,034" (um separador seguido de 3 dígitos)
+    é ambíguo e devolve None, assim como agrupamentos inválidos.
+    """
+    separators = [char for char in digits if char in '.,']
+    if not separators:
+        integer, fraction = digits, ''
+    else:
+        last = separators[-1]
+        if len(set(separators)) == 2:
+            if separators.count(last) > 1:
+                return None
+            integer, fraction = digits.rsplit(last, 1)
+            thousands = separators[0]
+        elif len(separators) > 1:
+            integer, fraction, thousands = digits, '', last
+        else:
+            integer, fraction = digits.split(last)
+            if len(fraction) == 3 and integer != '0':
+                return None  # milhar ou decimal?
+            thousands = None
+        if thousands is not None:
+            groups = integer.split(thousands)
+            if any(len(group) != 3 for group in groups[1:]) or not 1 <= len(groups[0]) <= 3:
+                return None
+            integer = ''.join(groups)
+    number = float(f"{integer}.{fraction}" if fraction else integer)
+    return -number if sign in ('-', '−') else number
+
+
+def _text_rule(params: Dict[str, Any], config: Dict[str, Any]) -> ValueRule:
+    """Texto sem espaços nas pontas (padrão)"""
+    return lambda value: value
+
+
+def _numeric_rule(params: Dict[str, Any], config: Dict[str, Any]) -> ValueRule:
+    """Só dígitos e os caracteres de `keep` (padrão: '-/')"""
+    strip = re.compile(r'[^\d' + re.escape(params.get('keep', '-/')) + r']')
+
+    def rule(value: str) -> Optional[str]:
+        return strip.sub('', value) or None
+    return rule
+
+
+def _pressure_rule(params: Dict[str, Any], config: Dict[str, Any]) -> ValueRule:
+    """
+    Número + unidade convertidos para `to` (kgf/cm² ou bar)
+
+    Sem unidade reconhecida logo após o número, só o número é reescrito
+    em forma decimal ("10,5" → "10.5"), sem unidade. O valor fica como
+    veio (texto) quando há mais de um número ou o número é ambíguo.
+    """
+    target = params.get('to', 'kgf/cm²')
+    if target not in _PRESSURE_TARGETS:
+        raise ValueError(f"unidade de pressão inválida: {target} (use {', '.join(_PRESSURE_TARGETS)})")
+    divisor = _PRESSURE_TARGETS[target]
+    decimals = int(params.get('decimals', 2))
+
+    factors = {unit: factor / divisor for unit, factor in _PRESSURE_FACTORS.items()}
+
+    def rule(value: str) -> Optional[str]:
+        numbers = list(_PRESSURE_NUMBER.finditer(value))
+        if len(numbers) != 1:
+            return value
+        number = numbers[0]
+        amount = _parse_number(*number.groups())
+        if amount is None:
+            return value
+        unit = _PRESSURE_UNIT.match(value, number.end())
+        if unit is None:
+            # Leitura sem unidade: número canônico, sem converter nem inventar unidade
+            return value[:number.start()] + _plain_number(amount) + value[number.end():]
+        amount *= factors[''.join(unit.group(1).lower().split()).replace('²', '2')]
+        return f"{_format_number(amount, decimals)} {target}"
+    return rule
+
+
+def _date_rule(params: Dict[str, Any], config: Dict[str, Any]) -> ValueRule:
+    """Data em ISO (AAAA-MM-DD, ou AAAA-MM quando só há mês/ano); ano com 2 dígitos vira 20AA"""
+    def rule(value: str) -> Optional[str]:
+        match = _DATE.search(value)
+        if match is None:
+            return value
+        groups = match.groupdict()
+        if groups['mm'] is not None:
+            month, year, day = int(groups['mm']), groups['my'], None
+        elif groups['iy'] is not None:
+            day, month, year = int(groups['id']), int(groups['im']), groups['iy']
+        else:
+            day, month, year = int(groups['d']), int(groups['m']), groups['y']
+        if len(year) == 2:
+            year = '20' + year
+        try:
+            date(int(year), month, day or 1)
+        except ValueError:
+            return value  # 31/02, mês 13...
+        return f"{year}-{month:02d}" if day is None else f"{year}-{month:02d}-{day:02d}"
+    return rule
+
+
+def _choice_rule(params: Dict[str, Any], config: Dict[str, Any]) -> ValueRule:
+    """Valor da lista `values` (ou `valid_values` do campo); `case`: upper, lower ou keep"""
+    case = params.get('case', 'upper')
+    values = params.get('values') or config.get('valid_values') or []
+    transform = {'upper': str.upper, 'lower': str.lower}.get(case, str)
+    allowed = frozenset(transform(str(value)) for value in values)
+
+    def rule(value: str) -> Optional[str]:
+        value = transform(value)
+        return value if not allowed or value in allowed else None
+    return rule
+
+
+RULE_TYPES: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], ValueRule]] = {
+    'text': _text_rule,
+    'numeric': _numeric_rule,
+    'pressure': _pressure_rule,
+    'date': _date_rule,
+    'choice': _choice_rule,
+}
+
+
+def compile_value_rules(mappings: Dict[str, Any],
+                        on_error: Optional[Callable[[str], None]] = None) -> Dict[str, ValueRule]:
+    """
+    Tabela campo → regra compilada a partir dos mapeamentos
+
+    Campos sem `normalize` ficam fora da tabela (valor só sem espaços
+    nas pontas). Regras inválidas são ignoradas e informadas a on_error.
+    """
+    rules: Dict[str, ValueRule] = {}
+    for field, config in mappings.items():
+        if not isinstance(config, dict) or not config.get('normalize'):
+            continue
+        params = config['normalize']
+        if isinstance(params, str):
+            params = {'type': params}
+        factory = RULE_TYPES.get(params.get('type', 'text'))
+        try:
+            if factory is None:
+                raise ValueError(f"tipo desconhecido: {params.get('type')} (use {', '.join(RULE_TYPES)})")
+            rules[field] = factory(params, config)
+        except (ValueError, TypeError, re.error) as e:
+            if on_error:
+                on_error(f"Regra de normalização inválida em {field}: {e}")
+    return rules
@@ -0,0 +1,279 @@
+"""
+Fila de trabalho compartilhada entre hosts de ingestão
+
+Backend SQLite (arquivo único, sem serviço extra): os hosts enfileiram
+caminhos de imagens e os workers arrendam itens com prazo de
+visibilidade. Item arrendado e não confirmado (worker caiu) volta a
+ficar disponível quando o prazo expira; ack conclui, nack devolve para
+nova tentativa (com atraso opcional) ou para a fila morta após
+`max_attempts`.
+
+O arrendamento usa transação BEGIN IMMEDIATE, então dois workers nunca
+recebem o mesmo item. Em armazenamento compartilhado o sistema de
+arquivos precisa oferecer locks POSIX confiáveis (NFSv4, SMB); o modo
+WAL não é usado por não funcionar em discos de rede.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+QUEUE_STATUSES = ('pending', 'leased', 'done', 'dead')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_token TEXT,
+    leased_by TEXT,
+    leased_until REAL,
+    last_error TEXT,
+    result_path TEXT,
+    enqueued_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_ready ON work_items (status, available_at);
+"""
+
+
+def default_worker_id() -> str:
+    """Identificador do worker: host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class WorkItem:
+    """Item arrendado por um worker"""
+
+    id: int
+    path: str
+    attempts: int
+    lease_token: str
+    leased_until: float
+
+
+class SQLiteWorkQueue:
+    """Fila de imagens com lease/ack/nack em um arquivo SQLite"""
+
+    def __init__(self, db_path: Path, visibility_timeout: float = 300.0, max_attempts: int = 5):
+        self.db_path = Path(db_path)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30.0,
+                                     isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, sql_fn):
+        """Executa sql_fn(conn) em transação com lock de escrita imediato"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = sql_fn(self._conn)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, paths: Iterable[Path], reset_finished: bool = False) -> int:
+        """
+        Enfileira imagens e retorna quantas entraram
+
+        Caminhos já presentes são ignorados; com reset_finished, itens
+        concluídos ou mortos voltam a pendente (nova rodada de tentativas).
+        """
+        now = time.time()
+        rows = [(str(Path(path).absolute()), now, now, now) for path in paths]
+        on_conflict = (
+            "ON CONFLICT(path) DO UPDATE SET status = 'pending', attempts = 0, "
+            "available_at = excluded.available_at, updated_at = excluded.updated_at "
+            "WHERE status IN ('done', 'dead')"
+        ) if reset_finished else "ON CONFLICT(path) DO NOTHING"
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT INTO work_items (path, available_at, enqueued_at, updated_at) "
+                f"VALUES (?, ?, ?, ?) {on_conflict}", rows
+            )
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def lease(self, worker_id: str, limit: int = 1,
+              visibility_timeout: Optional[float] = None) -> List[WorkItem]:
+        """Arrenda até `limit` itens prontos (pendentes ou com lease expirado)"""
+        now = time.time()
+        leased_until = now + (visibility_timeout or self.visibility_timeout)
+
+        def take(conn):
+            # Leases expirados que já esgotaram as tentativas vão para a fila morta
+            conn.execute(
+                "UPDATE work_items SET status = 'dead', lease_token = NULL, updated_at = ?, "
+                "last_error = COALESCE(last_error, 'lease expirado') "
+                "WHERE status = 'leased' AND leased_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT id, path, attempts FROM work_items "
+                "WHERE (status = 'pending' AND available_at <= ?) "
+                "   OR (status = 'leased' AND leased_until < ?) "
+                "ORDER BY available_at, id LIMIT ?",
+                (now, now, limit)
+            ).fetchall()
+
+            items = []
+            for item_id, path, attempts in rows:
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE work_items SET status = 'leased', attempts = attempts + 1, "
+                    "lease_token = ?, leased_by = ?, leased_until = ?, updated_at = ? WHERE id = ?",
+                    (token, worker_id, leased_until, now, item_id)
+                )
+                items.append(WorkItem(item_id, path, attempts + 1, token, leased_until))
+            return items
+
+        return self._transaction(take)
+
+    def extend(self, item: WorkItem, visibility_timeout: Optional[float] = None) -> bool:
+        """Renova o lease de um item ainda em processamento"""
+        leased_until = time.time() + (visibility_timeout or self.visibility_timeout)
+        updated = self._update_leased(item, "leased_until = ?", (leased_until,))
+        if updated:
+            item.leased_until = leased_until
+        return updated
+
+    def ack(self, item: WorkItem, result_path: Optional[str] = None) -> bool:
+        """
+        Confirma o processamento
+
+        Retorna False se o lease expirou e o item foi arrendado por outro
+        worker (o resultado deste worker deve ser tratado como duplicado).
+        """
+        return self._update_leased(
+            item, "status = 'done', lease_token = NULL, result_path = ?, last_error = NULL",
+            (result_path,)
+        )
+
+    def nack(self, item: WorkItem, error: str = "", delay: float = 0.0, retry: bool = True) -> bool:
+        """Devolve o item para nova tentativa (após `delay`) ou para a fila morta"""
+        status = 'dead' if not retry or item.attempts >= self.max_attempts else 'pending'
+        return self._update_leased(
+            item, "status = ?, lease_token = NULL, available_at = ?, last_error = ?",
+            (status, time.time() + delay, error[:1000])
+        )
+
+    def _update_leased(self, item: WorkItem, assignments: str, params: tuple) -> bool:
+        """UPDATE condicionado ao token do lease (ignora leases perdidos)"""
+        def update(conn):
+            cursor = conn.execute(
+                f"UPDATE work_items SET {assignments}, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (*params, time.time(), item.id, item.lease_token)
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(update)
+
+    def requeue_dead(self) -> int:
+        """Devolve os itens da fila morta para pendente, zerando tentativas"""
+        def requeue(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE work_items SET status = 'pending', attempts = 0, available_at = ?, updated_at = ? "
+                "WHERE status = 'dead'", (now, now)
+            )
+            return cursor.rowcount
+
+        return self._transaction(requeue)
+
+    def purge_done(self) -> int:
+        """Remove itens concluídos (permite reenfileirar os mesmos caminhos)"""
+        return self._transaction(
+            lambda conn: conn.execute("DELETE FROM work_items WHERE status = 'done'").rowcount
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Quantidade de itens por status (leases expirados contam como pendentes)"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN status = 'leased' AND leased_until < ? THEN 'pending' ELSE status END, "
+                "COUNT(*) FROM work_items GROUP BY 1", (now,)
+            ).fetchall()
+        counts = {status: 0 for status in QUEUE_STATUSES}
+        counts.update(dict(rows))
+        counts['total'] = sum(count for _, count in rows)
+        return counts
+
+    def dead_items(self, limit: int = 50) -> List[Dict[str, str]]:
+        """Itens da fila morta com o último erro"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, attempts, last_error FROM work_items WHERE status = 'dead' "
+                "ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{'path': path, 'attempts': attempts, 'error': error} for path, attempts, error in rows]
+
+
+class LeaseHeartbeat:
+    """
+    Renova os leases de um lote enquanto ele é processado
+
+    Uma thread chama extend() a cada terço do prazo de visibilidade nos
+    itens ainda não liberados (release), então um lote mais lento que o
+    prazo não volta para a fila nem é processado em dobro por outro worker.
+    """
+
+    def __init__(self, queue: SQLiteWorkQueue, items: Iterable[WorkItem],
+                 interval: Optional[float] = None):
+        self.queue = queue
+        self.interval = interval or max(1.0, queue.visibility_timeout / 3)
+        self._items: Dict[int, WorkItem] = {item.id: item for item in items}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.renewals = 0
+
+    def release(self, item: WorkItem):
+        """Item confirmado ou devolvido: não renova mais"""
+        with self._lock:
+            self._items.pop(item.id, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                items = list(self._items.values())
+            for item in items:
+                try:
+                    if self.queue.extend(item):
+                        self.renewals += 1
+                    else:
+                        self.release(item)  # lease perdido: ack/nack vão falhar e registrar
+                except sqlite3.Error:
+                    continue  # fila ocupada: tenta de novo no próximo ciclo
+
+    def __enter__(self) -> 'LeaseHeartbeat':
+        self._thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
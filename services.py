@@ -2,15 +2,48 @@
 """
 Services - Serviços externos e integrações
 """
+import base64
 import json
+import mimetypes
 import time
-import requests
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from config.settings import settings
-from utils import get_logger
+from ocr.scheduler import get_scheduler, parse_shares
+from ocr.serialization import load_file, loads
+from ocr.storage import write_json_atomic
+from ocr.resilience import (
+    CircuitBreaker, CircuitOpenError, ResilientCaller, RetryBudget, RetryPolicy,
+    is_retryable_exception, is_retryable_status
+)
+from utils import PER_IMAGE, get_logger
+
+
+# Prompt de extração enviado ao modelo de visão
+EXTRACTION_PROMPT = (
+    "Extraia todos os campos da placa de identificação NR-13 desta imagem. "
+    "Responda apenas com um objeto JSON onde cada chave é o rótulo impresso "
+    "na placa e cada valor é o texto correspondente."
+)
+
+# Status da Batch API da Mistral -> status locais
+REMOTE_STATUS_MAP = {
+    'QUEUED': 'running',
+    'RUNNING': 'running',
+    'CANCELLATION_REQUESTED': 'running',
+    'SUCCESS': 'completed',
+    'FAILED': 'failed',
+    'TIMEOUT_EXCEEDED': 'failed',
+    'CANCELLED': 'failed',
+}
+
+
+def encode_file(file_path: Path) -> str:
+    """Lê arquivo e codifica em base64"""
+    with open(file_path, 'rb') as f:
+        return base64.b64encode(f.read()).decode('utf-8')
 
 
 class BatchManager:
@@ -23,13 +56,13 @@ class BatchManager:
         
         # Carrega histórico de jobs
         self.jobs_history = self._load_jobs_history()
+        self.api = MistralAPI()
     
     def _load_jobs_history(self) -> Dict[str, Any]:
         """Carrega histórico de jobs do arquivo"""
         try:
             if self.jobs_file.exists():
-                with open(self.jobs_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return load_file(self.jobs_file)
             return {}
         except Exception as e:
             self.logger.error(f"Erro carregando histórico de jobs: {e}")
@@ -38,13 +71,15 @@ class BatchManager:
     def _save_jobs_history(self):
         """Salva histórico de jobs no arquivo"""
         try:
-            with open(self.jobs_file, 'w', encoding='utf-8') as f:
-                json.dump(self.jobs_history, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.jobs_history, self.jobs_file)
         except Exception as e:
             self.logger.error(f"Erro salvando histórico de jobs: {e}")
     
     def submit_job(self, images: List[Path]) -> str:
         """Submete job batch para processamento"""
+        if settings.OCR_BACKEND == 'api':
+            return self._submit_remote_job(images)
+
         try:
             job_id = f"batch_{int(time.time())}_{len(images)}"
             
@@ -79,6 +114,41 @@ class BatchManager:
             self.logger.error(f"Erro submetendo job batch: {e}")
             raise
     
+    def _submit_remote_job(self, images: List[Path]) -> str:
+        """Submete job na Batch API (arquivo JSONL + criação do job)"""
+        try:
+            self.logger.info(f"Submetendo batch remoto com {len(images)} imagens")
+
+            lines = []
+            for i, image_path in enumerate(images):
+                body = self.api.build_request_body(encode_file(image_path), image_path.name)
+                lines.append(json.dumps({'custom_id': str(i), 'body': body}))
+            payload = ('\n'.join(lines) + '\n').encode('utf-8')
+
+            input_file = self.api.upload_file(payload, f"batch_{int(time.time())}.jsonl")
+            remote_job = self.api.create_batch_job([input_file])
+            job_id = remote_job['id']
+
+            self.jobs_history[job_id] = {
+                'job_id': job_id,
+                'remote': True,
+                'created_at': datetime.now().isoformat(),
+                'started_at': datetime.now().isoformat(),
+                'status': REMOTE_STATUS_MAP.get(remote_job.get('status', 'QUEUED'), 'running'),
+                'total_images': len(images),
+                'images': [str(img) for img in images],
+                'input_file': input_file,
+                'results_count': 0
+            }
+            self._save_jobs_history()
+
+            self.logger.info(f"Job {job_id} submetido com sucesso")
+            return job_id
+
+        except Exception as e:
+            self.logger.error(f"Erro submetendo job batch remoto: {e}")
+            raise
+
     def wait_for_completion(self, job_id: str, max_wait: int = None) -> Optional[List[Dict]]:
         """Aguarda conclusão do job batch"""
         if max_wait is None:
@@ -115,7 +185,10 @@ class BatchManager:
             
             job_data = self.jobs_history[job_id]
             current_status = job_data.get('status', 'unknown')
-            
+
+            if job_data.get('remote') and current_status == 'running':
+                return self._refresh_remote_status(job_id)
+
             # Simula progressão do job
             if current_status == 'running':
                 # Simula processamento baseado no tempo
@@ -136,6 +209,53 @@ class BatchManager:
             self.logger.error(f"Erro verificando status do job {job_id}: {e}")
             return 'error'
     
+    def _refresh_remote_status(self, job_id: str) -> str:
+        """Consulta status do job na Batch API e atualiza histórico"""
+        job_data = self.jobs_history[job_id]
+        remote_job = self.api.get_batch_job(job_id)
+        status = REMOTE_STATUS_MAP.get(remote_job.get('status'), 'unknown')
+
+        if status != job_data.get('status'):
+            job_data['status'] = status
+            job_data['output_file'] = remote_job.get('output_file')
+            job_data['results_count'] = remote_job.get('succeeded_requests', 0)
+            if status == 'completed':
+                job_data['completed_at'] = datetime.now().isoformat()
+            self._save_jobs_history()
+
+        return status
+
+    def _get_remote_results(self, job_data: Dict[str, Any]) -> List[Dict]:
+        """Baixa e interpreta o arquivo de saída do job remoto"""
+        output_file = job_data.get('output_file')
+        if not output_file:
+            return []
+
+        images = job_data.get('images', [])
+        results = []
+        for line in self.api.download_file(output_file).splitlines():
+            if not line.strip():
+                continue
+            entry = loads(line)
+            index = int(entry.get('custom_id', -1))
+            response = entry.get('response') or {}
+            result = {
+                'image_index': index,
+                'arquivo': Path(images[index]).name if 0 <= index < len(images) else None,
+                'success': False
+            }
+            if response.get('status_code') == 200:
+                try:
+                    result['data'] = MistralAPI.parse_completion(response.get('body', {}))
+                    result['success'] = True
+                except (KeyError, IndexError, ValueError) as e:
+                    result['error'] = f"Resposta inválida: {e}"
+            else:
+                result['error'] = str(entry.get('error') or response.get('status_code'))
+            results.append(result)
+
+        return sorted(results, key=lambda r: r['image_index'])
+
     def _get_job_results(self, job_id: str) -> List[Dict]:
         """Obtém resultados do job"""
         try:
@@ -143,6 +263,11 @@ class BatchManager:
                 return []
             
             job_data = self.jobs_history[job_id]
+
+            if job_data.get('remote'):
+                results = self._get_remote_results(job_data)
+                self.logger.info(f"Obtidos {len(results)} resultados para job {job_id}")
+                return results
             
             # Simula resultados do processamento
             results = []
@@ -233,11 +358,37 @@ class MistralAPI:
     def __init__(self):
         self.logger = get_logger(__name__)
         self.api_key = settings.MISTRAL_API_KEY
-        self.base_url = "https://api.mistral.ai/v1"
+        self.base_url = settings.MISTRAL_BASE_URL
+        self.timeout = settings.API_TIMEOUT
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self._session = None
+        self.resilience = ResilientCaller(
+            RetryPolicy(settings.RETRY_MAX_ATTEMPTS, settings.RETRY_BASE_DELAY, settings.RETRY_MAX_DELAY),
+            RetryBudget(settings.RETRY_BUDGET_RATIO),
+            CircuitBreaker(settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_TIMEOUT)
+        )
+        # Sem SCHEDULER_SLOTS os slots crescem com a concorrência pedida (ensure_capacity)
+        self.scheduler = get_scheduler(settings.SCHEDULER_SLOTS or settings.MAX_CONCURRENCY + 1,
+                                       parse_shares(settings.SCHEDULER_SHARES),
+                                       fixed=bool(settings.SCHEDULER_SLOTS))
+
+    @property
+    def session(self):
+        """Sessão HTTP criada no primeiro uso (requests é importado sob demanda)"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def _request(self, method: str, path: str, idempotent: bool = True, **kwargs):
+        """Requisição HTTP com retry, orçamento de retries e circuit breaker"""
+        kwargs.setdefault('headers', self.headers)
+        kwargs.setdefault('timeout', self.timeout)
+        url = f"{self.base_url}{path}"
+        return self.resilience.call(lambda: self.session.request(method, url, **kwargs), idempotent)
     
     def test_connection(self) -> bool:
         """Testa conexão com a API"""
@@ -249,6 +400,14 @@ class MistralAPI:
             if not self.api_key or self.api_key == "your_api_key_here":
                 self.logger.error("API key não configurada")
                 return False
+
+            if settings.OCR_BACKEND == 'api':
+                response = self._request('GET', '/models')
+                if response.status_code != 200:
+                    self.logger.error(f"Falha na conexão: HTTP {response.status_code}")
+                    return False
+                self.logger.info(f"Conexão com {self.base_url} bem-sucedida")
+                return True
             
             # Simula teste bem-sucedido
             time.sleep(0.5)
@@ -259,13 +418,83 @@ class MistralAPI:
             self.logger.error(f"Erro testando conexão: {e}")
             return False
     
-    def process_image(self, image_data: str, image_name: str) -> Dict[str, Any]:
-        """Processa uma imagem via API"""
+    def build_request_body(self, image_data: str, image_name: str) -> Dict[str, Any]:
+        """Monta corpo da requisição de chat/OCR para uma imagem"""
+        mime = mimetypes.guess_type(image_name)[0] or 'image/jpeg'
+        return {
+            'model': settings.MISTRAL_MODEL,
+            'temperature': settings.TEMPERATURE,
+            'max_tokens': settings.MAX_TOKENS,
+            'response_format': {'type': 'json_object'},
+            'messages': [{
+                'role': 'user',
+                'content': [
+                    {'type': 'text', 'text': EXTRACTION_PROMPT},
+                    {'type': 'image_url', 'image_url': f"data:{mime};base64,{image_data}"}
+                ]
+            }]
+        }
+
+    @staticmethod
+    def parse_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+        """Extrai o JSON de campos da resposta de chat completion"""
+        content = body['choices'][0]['message']['content'].strip()
+        if content.startswith('```'):
+            content = content.strip('`')
+            content = content[content.find('{'):]
+        return json.loads(content)
+
+    def upload_file(self, content: bytes, filename: str) -> str:
+        """Envia arquivo JSONL para a Files API e retorna seu id"""
+        # Não idempotente: um timeout após o envio pode já ter criado o arquivo
+        response = self._request(
+            'POST', '/files', idempotent=False,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            files={'file': (filename, content)},
+            data={'purpose': 'batch'}
+        )
+        response.raise_for_status()
+        return response.json()['id']
+
+    def create_batch_job(self, input_files: List[str]) -> Dict[str, Any]:
+        """Cria job na Batch API"""
+        response = self._request(
+            'POST', '/batch/jobs', idempotent=False,
+            json={
+                'input_files': input_files,
+                'model': settings.MISTRAL_MODEL,
+                'endpoint': '/v1/chat/completions'
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_batch_job(self, job_id: str) -> Dict[str, Any]:
+        """Consulta job na Batch API"""
+        response = self._request('GET', f"/batch/jobs/{job_id}")
+        response.raise_for_status()
+        return response.json()
+
+    def download_file(self, file_id: str) -> str:
+        """Baixa conteúdo de um arquivo da Files API"""
+        response = self._request('GET', f"/files/{file_id}/content")
+        response.raise_for_status()
+        return response.content.decode('utf-8')
+
+    def process_image(self, image_data: str, image_name: str, priority: str = 'bulk') -> Dict[str, Any]:
+        """Processa uma imagem via API, aguardando um slot da classe de prioridade"""
+        with self.scheduler.slot(priority):
+            if settings.OCR_BACKEND == 'api':
+                return self._process_image_remote(image_data, image_name)
+            return self._process_image_mock(image_name)
+
+    def _process_image_mock(self, image_name: str) -> Dict[str, Any]:
+        """Resultado simulado (sem chamada HTTP)"""
         try:
             # Mock do processamento
             # Em implementação real, enviaria imagem para Mistral Pixtral
             
-            self.logger.info(f"Processando imagem {image_name} via Mistral AI")
+            self.logger.info(f"Processando imagem {image_name} via Mistral AI", extra=PER_IMAGE)
             
             # Simula latência da API
             time.sleep(2)
@@ -295,43 +524,81 @@ class MistralAPI:
                 'error': str(e)
             }
 
+    def _process_image_remote(self, image_data: str, image_name: str) -> Dict[str, Any]:
+        """Envia imagem para o endpoint de chat completions"""
+        try:
+            self.logger.info(f"Processando imagem {image_name} via {self.base_url}", extra=PER_IMAGE)
+
+            # Extração sem efeitos colaterais: seguro repetir mesmo após timeout
+            response = self._request(
+                'POST', '/chat/completions',
+                json=self.build_request_body(image_data, image_name)
+            )
+
+            if response.status_code != 200:
+                return {
+                    'success': False,
+                    'error': f"HTTP {response.status_code}: {response.text[:200]}",
+                    'status_code': response.status_code,
+                    'retryable': is_retryable_status(response.status_code)
+                }
+
+            return {
+                'success': True,
+                'data': self.parse_completion(response.json())
+            }
+
+        except CircuitOpenError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'retryable': True
+            }
+        except Exception as e:
+            self.logger.error(f"Erro processando imagem {image_name}: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'retryable': is_retryable_exception(e)
+            }
+
 
 class ReportGenerator:
     """Gerador de relatórios"""
     
-    def __init__(self):
+    def __init__(self, aggregates=None):
         self.logger = get_logger(__name__)
+        if aggregates is None:
+            from ocr.aggregates import RunningAggregates
+            aggregates = RunningAggregates(settings.AGGREGATES_FILE,
+                                           daily_retention=settings.AGGREGATES_DAILY_RETENTION)
+        self.aggregates = aggregates
     
     def generate_summary_report(self, results: List[Dict], processing_info: Dict) -> Dict[str, Any]:
         """Gera relatório resumo do processamento"""
         try:
             timestamp = datetime.now().isoformat()
             
-            # Calcula estatísticas
-            total_images = len(results)
-            valid_results = [r for r in results if r.get('_metadata', {}).get('validacao', {}).get('valid', False)]
-            success_rate = (len(valid_results) / total_images * 100) if total_images > 0 else 0
-            
-            # Analisa completude
-            completeness_values = [
-                r.get('_metadata', {}).get('validacao', {}).get('completeness', 0)
-                for r in results
-            ]
-            avg_completeness = sum(completeness_values) / len(completeness_values) if completeness_values else 0
-            
+            # Calcula estatísticas sobre a tabela colunar dos resultados
+            from ocr.result_table import ResultTable
+            table = ResultTable(settings.REQUIRED_FIELDS)
+            table.extend(results)
+            validation = table.validation_summary()
+            total_images = validation['total']
+            success_rate = validation['taxa_sucesso']
+            avg_completeness = validation['completude_media']
+
             # Campos mais encontrados
-            field_counts = {}
-            for result in results:
-                for field in settings.REQUIRED_FIELDS:
-                    if field in result and result[field]:
-                        field_counts[field] = field_counts.get(field, 0) + 1
-            
+            field_counts = {field: total_images - missing
+                            for field, missing in validation['faltantes_por_campo'].items()
+                            if total_images - missing}
+
             report = {
                 'timestamp': timestamp,
                 'processing_info': processing_info,
                 'statistics': {
                     'total_images': total_images,
-                    'valid_results': len(valid_results),
+                    'valid_results': validation['validos'],
                     'success_rate': success_rate,
                     'average_completeness': avg_completeness
                 },
@@ -339,20 +606,27 @@ class ReportGenerator:
                     'field_counts': field_counts,
                     'most_found_fields': sorted(field_counts.items(), key=lambda x: x[1], reverse=True)[:5]
                 },
+                'breakdown': {
+                    'fabricante': table.group_by('fabricante', 'completude'),
+                    'categoria': table.group_by('categoria', 'completude')
+                },
                 'summary': {
                     'modo': processing_info.get('modo', 'unknown'),
                     'tempo_total': processing_info.get('tempo_total', 0),
                     'taxa_sucesso': success_rate,
                     'completude_media': avg_completeness
+                },
+                # Histórico vem dos agregados incrementais (sem reler resultados anteriores)
+                'acumulado': self.aggregates.report(),
+                'tendencia': {
+                    'diaria': self.aggregates.trend('daily', 30),
+                    'mensal': self.aggregates.trend('monthly', 12)
                 }
             }
             
-            # Salva relatório
-            report_filename = f"relatorio_completo_{timestamp.replace(':', '-').split('.')[0]}.json"
-            report_path = settings.OUTPUT_REPORTS / report_filename
-            
-            with open(report_path, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2, ensure_ascii=False)
+            # Salva relatório (sobrescreve o anterior; o histórico está nos agregados)
+            report_path = settings.OUTPUT_REPORTS / "relatorio_completo.json"
+            write_json_atomic(report, report_path)
             
             self.logger.info(f"Relatório gerado: {report_path}")
             return report
@@ -360,3 +634,12 @@ class ReportGenerator:
         except Exception as e:
             self.logger.error(f"Erro gerando relatório: {e}")
             return {}
+
+    def generate_trend_report(self, period: str = 'daily', last: int = 30) -> Dict[str, Any]:
+        """Resumo acumulado e tendência por dia/mês, lidos do estado dos agregados"""
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'acumulado': self.aggregates.report(),
+            'periodo': period,
+            'tendencia': self.aggregates.trend(period, last)
+        }
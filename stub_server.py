@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Stub local da API Mistral para testes de carga
+
+Emula o endpoint de chat/OCR e os endpoints da Batch API (upload de
+arquivos, criação de job, status e download da saída) com latência,
+taxa de erros e limite de requisições (HTTP 429) configuráveis.
+
+Uso:
+    python stub_server.py --port 8089 --latency-ms 800 --error-rate 0.02
+
+Aponte os clientes para o stub pelo .env:
+    MISTRAL_BASE_URL=http://127.0.0.1:8089/v1
+    OCR_BACKEND=api
+"""
+import argparse
+import email.parser
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+
+@dataclass
+class StubConfig:
+    """Parâmetros de comportamento do stub"""
+
+    host: str = "127.0.0.1"
+    port: int = 8089
+
+    # Latência do endpoint de chat: fixed | uniform | lognormal
+    latency_dist: str = "lognormal"
+    latency_ms: float = 800.0
+    latency_jitter: float = 0.35  # uniform: ±fração | lognormal: sigma
+
+    # Erros e limite de requisições
+    error_rate: float = 0.0
+    rate_limit_rps: float = 0.0  # 0 = sem limite
+    rate_limit_burst: int = 10
+    retry_after: float = 1.0
+
+    # Batch API
+    batch_base_delay: float = 60.0
+    batch_per_item: float = 0.5
+    batch_item_error_rate: float = 0.0
+
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> 'StubConfig':
+        """Cria configuração a partir de variáveis STUB_*"""
+        config = cls()
+        for name, value in asdict(config).items():
+            env_value = os.getenv(f"STUB_{name.upper()}")
+            if env_value is None:
+                continue
+            cast = type(value) if value is not None else int
+            setattr(config, name, cast(env_value))
+        return config
+
+
+class TokenBucket:
+    """Limitador de taxa simples (token bucket)"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Consome um token; False se o limite foi atingido"""
+        if self.rate <= 0:
+            return True
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class StubState:
+    """Estado em memória compartilhado entre requisições"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.bucket = TokenBucket(config.rate_limit_rps, config.rate_limit_burst)
+        self.files: Dict[str, bytes] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'rate_limited': 0, 'errors': 0}
+
+    def count(self, key: str):
+        with self.lock:
+            self.counters[key] += 1
+
+    def sample_latency(self) -> float:
+        """Sorteia latência (segundos) conforme a distribuição configurada"""
+        mean = self.config.latency_ms / 1000.0
+        jitter = self.config.latency_jitter
+        with self.lock:
+            if self.config.latency_dist == "fixed":
+                return mean
+            if self.config.latency_dist == "uniform":
+                return max(0.0, self.random.uniform(mean * (1 - jitter), mean * (1 + jitter)))
+            # lognormal com mediana = latency_ms
+            return self.random.lognormvariate(0.0, jitter) * mean
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.random.random() < rate
+
+    def fake_plate(self, seed_text: str) -> Dict[str, str]:
+        """Gera campos de placa plausíveis (determinísticos por imagem)"""
+        rng = random.Random(seed_text)
+        return {
+            'Manufacturer': rng.choice(['ACME Corporation', 'Aalborg', 'ATA Combustão', 'Steammaster']),
+            'Serial Number': f"SN-{rng.randint(10000, 99999)}",
+            'PMTA': f"{rng.randint(5, 30)},{rng.randint(0, 9)} kgf/cm²",
+            'Category': rng.choice(['I', 'II', 'III', 'IV', 'V', 'A', 'B']),
+            'Year': str(rng.randint(1985, 2024)),
+            'Tag': f"TAG-{rng.randint(100, 999)}",
+            'Número de Ordem': str(rng.randint(1000, 9999)),
+            'Material': rng.choice(['Carbon Steel', 'ASTM A-285 Gr C', 'SA-516 Gr 70']),
+            'Volume': f"{rng.randint(1, 50)} m³"
+        }
+
+    def completion_body(self, seed_text: str) -> Dict[str, Any]:
+        """Monta resposta no formato de chat completion"""
+        return {
+            'id': f"cmpl-{uuid.uuid4().hex[:12]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'stub',
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {
+                    'role': 'assistant',
+                    'content': json.dumps(self.fake_plate(seed_text), ensure_ascii=False)
+                }
+            }],
+            'usage': {'prompt_tokens': 1000, 'completion_tokens': 120, 'total_tokens': 1120}
+        }
+
+    def job_view(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza e retorna o estado público de um job batch"""
+        elapsed = time.time() - job['created_at']
+        total = job['total_requests']
+        duration = self.config.batch_base_delay + self.config.batch_per_item * total
+
+        if job['status'] in ('QUEUED', 'RUNNING'):
+            if elapsed >= duration:
+                self._complete_job(job)
+            elif elapsed >= self.config.batch_base_delay:
+                job['status'] = 'RUNNING'
+                done = int((elapsed - self.config.batch_base_delay) / max(self.config.batch_per_item, 1e-6))
+                job['completed_requests'] = min(total, done)
+
+        return {k: v for k, v in job.items() if not k.startswith('_')}
+
+    def _complete_job(self, job: Dict[str, Any]):
+        """Gera arquivo de saída do job"""
+        lines = []
+        failed = 0
+        for request in job['_requests']:
+            custom_id = request.get('custom_id')
+            if self.roll(self.config.batch_item_error_rate):
+                failed += 1
+                lines.append({
+                    'id': uuid.uuid4().hex, 'custom_id': custom_id,
+                    'response': {'status_code': 500, 'body': {}},
+                    'error': {'message': 'stub: erro simulado'}
+                })
+            else:
+                lines.append({
+                    'id': uuid.uuid4().hex, 'custom_id': custom_id,
+                    'response': {'status_code': 200, 'body': self.completion_body(f"{job['id']}:{custom_id}")},
+                    'error': None
+                })
+
+        output_id = uuid.uuid4().hex
+        self.files[output_id] = ('\n'.join(json.dumps(l, ensure_ascii=False) for l in lines) + '\n').encode('utf-8')
+
+        job['status'] = 'SUCCESS'
+        job['output_file'] = output_id
+        job['completed_requests'] = job['total_requests']
+        job['succeeded_requests'] = job['total_requests'] - failed
+        job['failed_requests'] = failed
+        job['completed_at'] = int(time.time())
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Roteia requisições para os endpoints emulados"""
+
+    server_version = "MistralStub/1.0"
+    protocol_version = "HTTP/1.1"
+    # Cabeçalho e corpo no mesmo segmento TCP (evita atraso do Nagle/ACK)
+    disable_nagle_algorithm = True
+    wbufsize = 1 << 16
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        # Silencioso: logs por requisição distorcem o teste de carga
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_bytes(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _admit(self) -> bool:
+        """Aplica limite de taxa e erros simulados; False se já respondeu"""
+        self.state.count('requests')
+        if not self.state.bucket.acquire():
+            self.state.count('rate_limited')
+            self._send_json(429, {'message': 'Requests rate limit exceeded'},
+                            {'Retry-After': str(self.state.config.retry_after)})
+            return False
+        if self.state.roll(self.state.config.error_rate):
+            self.state.count('errors')
+            self._send_json(503, {'message': 'stub: erro simulado'})
+            return False
+        return True
+
+    def do_GET(self):
+        path = self.path.split('?')[0].rstrip('/')
+
+        if path == '/v1/models':
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'pixtral-12b-2409', 'object': 'model'}]})
+        elif path == '/stub/stats':
+            self._send_json(200, {'counters': self.state.counters, 'config': asdict(self.state.config)})
+        elif (match := re.fullmatch(r'/v1/batch/jobs/([\w-]+)', path)):
+            job = self.state.jobs.get(match.group(1))
+            if job is None:
+                self._send_json(404, {'message': 'job not found'})
+            else:
+                self._send_json(200, self.state.job_view(job))
+        elif (match := re.fullmatch(r'/v1/files/([\w-]+)/content', path)):
+            content = self.state.files.get(match.group(1))
+            if content is None:
+                self._send_json(404, {'message': 'file not found'})
+            else:
+                self._send_bytes(200, content, 'application/octet-stream')
+        else:
+            self._send_json(404, {'message': f'rota desconhecida: {path}'})
+
+    def do_POST(self):
+        path = self.path.split('?')[0].rstrip('/')
+        body = self._read_body()
+
+        if path == '/v1/chat/completions':
+            if not self._admit():
+                return
+            time.sleep(self.state.sample_latency())
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError:
+                self._send_json(400, {'message': 'JSON inválido'})
+                return
+            seed_text = str(len(body)) + str(request.get('messages', ''))[-64:]
+            self._send_json(200, self.state.completion_body(seed_text))
+
+        elif path == '/v1/files':
+            filename, content = self._parse_upload(body)
+            if content is None:
+                self._send_json(400, {'message': 'campo file ausente'})
+                return
+            file_id = uuid.uuid4().hex
+            self.state.files[file_id] = content
+            self._send_json(200, {
+                'id': file_id, 'object': 'file', 'bytes': len(content),
+                'filename': filename, 'purpose': 'batch', 'created_at': int(time.time())
+            })
+
+        elif path == '/v1/batch/jobs':
+            if not self._admit():
+                return
+            request = json.loads(body or b'{}')
+            requests_ = []
+            for file_id in request.get('input_files', []):
+                content = self.state.files.get(file_id, b'')
+                requests_.extend(json.loads(l) for l in content.decode('utf-8').splitlines() if l.strip())
+            job_id = uuid.uuid4().hex
+            job = {
+                'id': job_id, 'object': 'batch', 'status': 'QUEUED',
+                'input_files': request.get('input_files', []),
+                'model': request.get('model'), 'endpoint': request.get('endpoint'),
+                'total_requests': len(requests_), 'completed_requests': 0,
+                'succeeded_requests': 0, 'failed_requests': 0,
+                'output_file': None, 'created_at': time.time(),
+                '_requests': requests_
+            }
+            self.state.jobs[job_id] = job
+            self._send_json(200, self.state.job_view(job))
+
+        else:
+            self._send_json(404, {'message': f'rota desconhecida: {path}'})
+
+    def _parse_upload(self, body: bytes) -> Tuple[Optional[str], Optional[bytes]]:
+        """Extrai o campo 'file' de um corpo multipart/form-data"""
+        content_type = self.headers.get('Content-Type', '')
+        message = email.parser.BytesParser().parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body
+        )
+        if not message.is_multipart():
+            return None, None
+        for part in message.get_payload():
+            if part.get_param('name', header='content-disposition') == 'file':
+                return part.get_filename(), part.get_payload(decode=True)
+        return None, None
+
+
+def create_server(config: StubConfig) -> ThreadingHTTPServer:
+    """Cria servidor HTTP do stub (não inicia o loop)"""
+    server = ThreadingHTTPServer((config.host, config.port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(config)
+    return server
+
+
+def start_in_background(config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Inicia o stub em thread daemon (uso em benchmarks)"""
+    server = create_server(config or StubConfig.from_env())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args() -> StubConfig:
+    """Lê configuração da linha de comando (padrões vêm de STUB_*)"""
+    defaults = StubConfig.from_env()
+    parser = argparse.ArgumentParser(description="Stub local da API Mistral (OCR + Batch)")
+    parser.add_argument('--host', default=defaults.host)
+    parser.add_argument('--port', type=int, default=defaults.port)
+    parser.add_argument('--latency-dist', choices=['fixed', 'uniform', 'lognormal'],
+                        default=defaults.latency_dist)
+    parser.add_argument('--latency-ms', type=float, default=defaults.latency_ms)
+    parser.add_argument('--latency-jitter', type=float, default=defaults.latency_jitter)
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate)
+    parser.add_argument('--rate-limit-rps', type=float, default=defaults.rate_limit_rps)
+    parser.add_argument('--rate-limit-burst', type=int, default=defaults.rate_limit_burst)
+    parser.add_argument('--retry-after', type=float, default=defaults.retry_after)
+    parser.add_argument('--batch-base-delay', type=float, default=defaults.batch_base_delay)
+    parser.add_argument('--batch-per-item', type=float, default=defaults.batch_per_item)
+    parser.add_argument('--batch-item-error-rate', type=float, default=defaults.batch_item_error_rate)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    args = parser.parse_args()
+    return StubConfig(**vars(args))
+
+
+def main():
+    """Executa o stub em primeiro plano"""
+    config = parse_args()
+    server = create_server(config)
+    print(f"🧪 Stub Mistral ouvindo em http://{config.host}:{config.port}/v1")
+    print(f"   • Latência: {config.latency_dist} ~{config.latency_ms:.0f}ms")
+    print(f"   • Erros: {config.error_rate:.1%} | Limite: {config.rate_limit_rps or '∞'} req/s")
+    print(f"   • Batch: {config.batch_base_delay:.0f}s + {config.batch_per_item}s/imagem")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stub encerrado")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
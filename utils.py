@@ -2,35 +2,164 @@
 """
 Utils - Utilitários e funções auxiliares
 """
+import atexit
 import os
+import queue
 import sys
+import threading
 import time
 import json
 import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 from config.settings import settings
 
 
+_logging_configured = False
+_log_handlers: List[logging.Handler] = []  # destinos reais (atendidos pelo QueueListener)
+_log_listener: Optional[QueueListener] = None
+
+# extra= dos logs por imagem: sujeitos ao limite LOG_IMAGE_RATE
+PER_IMAGE = {'per_image': True}
+
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Um objeto JSON por linha (ts, level, logger, msg + extras)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class PerImageRateFilter(logging.Filter):
+    """Limita os logs por imagem a `rate` por segundo; os suprimidos são contados no próximo"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._window = 0
+        self._emitted = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rate or not getattr(record, 'per_image', False):
+            return True
+        window = int(time.monotonic())
+        with self._lock:
+            if window != self._window:
+                self._window, self._emitted = window, 0
+            if self._emitted >= self.rate:
+                self.suppressed += 1
+                return False
+            self._emitted += 1
+            suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} (+{suppressed} logs por imagem suprimidos)"
+            record.args = None
+            record.suprimidos = suppressed
+        return True
+
+
+class _ProcessQueueHandler(QueueHandler):
+    """QueueHandler que, em processos filhos (fork), grava direto nos destinos"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self._pid = os.getpid()
+
+    def emit(self, record: logging.LogRecord):
+        if os.getpid() == self._pid:
+            super().emit(record)
+            return
+        for handler in _log_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class _DispatchHandler(logging.Handler):
+    """Handler único na frente do arquivo e do console (modo síncrono, LOG_ASYNC=false)"""
+
+    def emit(self, record: logging.LogRecord):
+        for handler in _log_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
 def setup_logging() -> None:
-    """Configura sistema de logging"""
+    """
+    Configura sistema de logging (arquivo rotativo + console)
+
+    Os loggers só enfileiram os registros (QueueHandler); uma thread
+    (QueueListener) formata e grava no arquivo e no console, então os
+    loops de processamento não esperam por I/O de disco/terminal.
+    Com LOG_JSON o arquivo recebe JSON lines. Deve ser chamada
+    explicitamente pelos pontos de entrada (main.py, GUI); importar este
+    módulo não tem efeitos colaterais.
+    """
+    global _logging_configured, _log_listener
+    if _logging_configured:
+        return
+
     # Garante que diretório de logs existe
     settings.LOGS_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Arquivo de log
-    log_file = settings.LOGS_DIR / f"ocr_{datetime.now().strftime('%Y%m%d')}.log"
-    
-    # Configuração do logging
-    logging.basicConfig(
-        level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    # Arquivo de log (rotação por tamanho; LOG_MAX_BYTES=0 desativa)
+    suffix = 'jsonl' if settings.LOG_JSON else 'log'
+    log_file = settings.LOGS_DIR / f"ocr_{datetime.now().strftime('%Y%m%d')}.{suffix}"
+    file_handler = RotatingFileHandler(log_file, maxBytes=settings.LOG_MAX_BYTES,
+                                       backupCount=settings.LOG_BACKUP_COUNT, encoding='utf-8')
+    file_handler.setFormatter(JsonLinesFormatter() if settings.LOG_JSON
+                              else logging.Formatter(settings.LOG_FORMAT))
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(settings.LOG_FORMAT))
+    _log_handlers[:] = [file_handler, console_handler]
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO))
+    if settings.LOG_ASYNC:
+        handler = _ProcessQueueHandler(queue.SimpleQueue())
+        _log_listener = QueueListener(handler.queue, *_log_handlers, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(stop_logging)
+    else:
+        handler = _DispatchHandler()
+    # Um filtro por registro (não por destino): o limite vale igual para arquivo e console
+    handler.addFilter(PerImageRateFilter(settings.LOG_IMAGE_RATE))
+    root.addHandler(handler)
+    _logging_configured = True
+
+
+def stop_logging() -> None:
+    """Esvazia a fila de logs e encerra a thread de gravação"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+    for handler in _log_handlers:
+        handler.flush()
+
+
+def set_console_stream(stream) -> None:
+    """Redireciona o handler de console (ex.: stderr quando stdout é JSON)"""
+    for handler in _log_handlers + logging.getLogger().handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(stream)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -149,38 +278,8 @@ def get_system_info() -> Dict[str, Any]:
 
 def validate_nr13_result(data: Dict[str, Any]) -> Dict[str, Any]:
     """Valida resultado contra requisitos NR-13"""
-    try:
-        found_fields = []
-        missing_fields = []
-        
-        for field in settings.REQUIRED_FIELDS:
-            if field in data and data[field] and str(data[field]).strip():
-                found_fields.append(field)
-            else:
-                missing_fields.append(field)
-        
-        total_required = len(settings.REQUIRED_FIELDS)
-        completeness = (len(found_fields) / total_required) * 100 if total_required > 0 else 0
-        is_valid = len(missing_fields) == 0
-        
-        return {
-            'valid': is_valid,
-            'completeness': completeness,
-            'total_required': total_required,
-            'found': found_fields,
-            'missing': missing_fields
-        }
-    except Exception as e:
-        logger = get_logger(__name__)
-        logger.error(f"Erro na validação NR-13: {e}")
-        return {
-            'valid': False,
-            'completeness': 0.0,
-            'total_required': len(settings.REQUIRED_FIELDS),
-            'found': [],
-            'missing': settings.REQUIRED_FIELDS,
-            'error': str(e)
-        }
+    from ocr.validation import engine_for
+    return engine_for(settings.REQUIRED_FIELDS).validate(data)
 
 
 def ensure_directories():
@@ -251,8 +350,9 @@ def sanitize_filename(filename: str) -> str:
 def load_json_safe(file_path: Path) -> Optional[Dict[str, Any]]:
     """Carrega arquivo JSON com tratamento de erro"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        from ocr.serialization import load_file
+
+        return load_file(file_path)
     except Exception as e:
         logger = get_logger(__name__)
         logger.error(f"Erro carregando JSON {file_path}: {e}")
@@ -260,13 +360,14 @@ def load_json_safe(file_path: Path) -> Optional[Dict[str, Any]]:
 
 
 def save_json_safe(data: Dict[str, Any], file_path: Path) -> bool:
-    """Salva arquivo JSON com tratamento de erro"""
+    """Salva arquivo JSON (gravação atômica) com tratamento de erro"""
     try:
+        from ocr.storage import write_json_atomic
+
         # Garante que diretório existe
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        write_json_atomic(data, file_path)
         return True
     except Exception as e:
         logger = get_logger(__name__)
@@ -359,10 +460,3 @@ def backup_file(file_path: Path, backup_dir: Optional[Path] = None) -> bool:
         logger.error(f"Erro criando backup de {file_path}: {e}")
         return False
 
-
-# Inicializa logging quando módulo é importado
-try:
-    setup_logging()
-except Exception:
-    # Fallback se configuração falhar
-    logging.basicConfig(level=logging.INFO)